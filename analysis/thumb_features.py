@@ -0,0 +1,251 @@
+# analysis/thumb_features.py
+
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+from analysis.thumb_images import FileHashCache, load_batch
+
+CACHE_PATH = "storage/features/cache.json"
+FEATURE_SIZE = (64, 36)  # (w, h) 16:9, cukup untuk statistik warna / kontras
+BATCH_SIZE = 256
+
+HIGH_CONTRAST = 0.22   # std luma (0..1)
+BRIGHT = 0.6
+DARK = 0.35
+EDGE_THRESHOLD = 0.12  # magnitude gradient (0..1) yang dihitung sebagai tepi
+
+# Palet kasar: 3 warna netral + 8 rentang hue
+COLOR_NAMES = ["hitam", "putih", "abu", "merah", "oranye", "kuning", "hijau", "cyan", "biru", "ungu", "pink"]
+# Batas atas hue (derajat) untuk merah..pink, sisanya (>= 345) kembali merah
+_HUE_EDGES = np.array([15, 40, 70, 165, 195, 255, 290, 345])
+
+
+def extract_features_batch(rgb: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    `rgb` = (N, H, W, 3) uint8 -> dict fitur per gambar (array panjang N).
+    Semua dihitung sekaligus untuk satu batch, tanpa loop per gambar.
+    """
+    x = rgb.astype(np.float32) / 255.0
+    n = len(x)
+    r, g, b = x[..., 0], x[..., 1], x[..., 2]
+
+    luma = 0.299 * r + 0.587 * g + 0.114 * b
+    brightness = luma.mean(axis=(1, 2))
+    contrast = luma.std(axis=(1, 2))
+
+    cmax = x.max(axis=-1)
+    cmin = x.min(axis=-1)
+    chroma = cmax - cmin
+    sat = np.where(cmax > 0, chroma / np.maximum(cmax, 1e-6), 0.0)
+    saturation = sat.mean(axis=(1, 2))
+
+    # Edge density: gradient sederhana (selisih tetangga) pada luma
+    gx = np.abs(np.diff(luma, axis=2))[:, :-1, :]
+    gy = np.abs(np.diff(luma, axis=1))[:, :, :-1]
+    edge_density = (np.hypot(gx, gy) > EDGE_THRESHOLD).mean(axis=(1, 2))
+
+    # Hue (derajat) per pixel
+    safe = np.maximum(chroma, 1e-6)
+    hue = np.where(
+        cmax == r, ((g - b) / safe) % 6,
+        np.where(cmax == g, (b - r) / safe + 2, (r - g) / safe + 4),
+    ) * 60.0
+
+    # Kelas warna per pixel: netral (hitam/putih/abu) kalau saturasi rendah
+    hue_class = np.searchsorted(_HUE_EDGES, hue, side="right")
+    hue_class = np.where(hue_class == len(_HUE_EDGES), 0, hue_class) + 3
+    neutral = np.where(cmax < 0.2, 0, np.where(cmax > 0.85, 1, 2))
+    cls = np.where((sat < 0.25) | (cmax < 0.2), neutral, hue_class)
+
+    k = len(COLOR_NAMES)
+    flat = (cls.reshape(n, -1) + np.arange(n)[:, None] * k).ravel()
+    hist = np.bincount(flat, minlength=n * k).reshape(n, k).astype(np.float32)
+    hist /= np.maximum(hist.sum(axis=1, keepdims=True), 1)
+
+    return {
+        "brightness": brightness,
+        "contrast": contrast,
+        "saturation": saturation,
+        "edge_density": edge_density,
+        "color_hist": hist,
+    }
+
+
+def _to_record(feats: dict, i: int) -> dict:
+    hist = feats["color_hist"][i]
+    top = np.argsort(hist)[::-1][:3]
+    return {
+        "brightness": round(float(feats["brightness"][i]), 4),
+        "contrast": round(float(feats["contrast"][i]), 4),
+        "saturation": round(float(feats["saturation"][i]), 4),
+        "edge_density": round(float(feats["edge_density"][i]), 4),
+        "dominant_colors": [[COLOR_NAMES[c], round(float(hist[c]), 3)] for c in top if hist[c] > 0],
+    }
+
+
+# Satu penulis cache.json dalam satu proses (worker scheduler menyimpan bersamaan)
+_save_lock = threading.Lock()
+
+
+class FeatureCache:
+    """
+    Fitur per sha256 isi file (thumbnail yang sama tidak diproses ulang).
+    """
+
+    def __init__(self, path: str = CACHE_PATH):
+        self.path = path
+        data = self._read(path)
+        self.features: dict[str, dict] = data.get("features", {})
+        self.files: dict = data.get("files", {})
+        self.sha = FileHashCache(self.files)
+
+    @staticmethod
+    def _read(path: str) -> dict:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        """
+        Gabung dengan isi file saat ini (entry dari worker / proses lain tetap
+        ada), lalu tulis ke file tmp unik dan os.replace.
+        """
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with _save_lock:
+            disk = self._read(self.path)
+            self.features = {**disk.get("features", {}), **self.features}
+            self.files = self.sha.entries = {**disk.get("files", {}), **self.sha.entries}
+
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=directory, prefix=".cache-", suffix=".tmp", delete=False
+            ) as f:
+                json.dump({"features": self.features, "files": self.files}, f)
+            try:
+                os.replace(f.name, self.path)
+            except OSError:
+                os.remove(f.name)
+                raise
+
+
+def compute_features(paths: list[str], cache: FeatureCache | None = None) -> dict[str, dict]:
+    """
+    path -> fitur. Yang sudah ada di cache (sha sama) tidak dihitung ulang.
+    """
+    cache = cache or FeatureCache()
+    path_sha = {}
+    todo: dict[str, str] = {}
+    for path in paths:
+        sha = cache.sha.sha(path) if path else None
+        if not sha:
+            continue
+        path_sha[path] = sha
+        if sha not in cache.features and sha not in todo:
+            todo[sha] = path
+
+    items = list(todo.items())
+    for start in range(0, len(items), BATCH_SIZE):
+        batch = items[start:start + BATCH_SIZE]
+        rgb, ok = load_batch([p for _, p in batch], FEATURE_SIZE, mode="RGB")
+        if not ok:
+            continue
+        feats = extract_features_batch(rgb)
+        for j, i in enumerate(ok):
+            cache.features[batch[i][0]] = _to_record(feats, j)
+
+    if todo:
+        cache.save()
+
+    return {p: cache.features[s] for p, s in path_sha.items() if s in cache.features}
+
+
+def summarize_features(features: list[dict]) -> dict:
+    """
+    Agregat per keyword: persentase high-contrast / terang / gelap, warna dominan,
+    dan rata-rata edge density.
+    """
+    if not features:
+        return {}
+
+    n = len(features)
+    contrast = np.array([f["contrast"] for f in features])
+    brightness = np.array([f["brightness"] for f in features])
+    saturation = np.array([f["saturation"] for f in features])
+    edges = np.array([f["edge_density"] for f in features])
+
+    color_votes: dict[str, int] = {}
+    for f in features:
+        if f["dominant_colors"]:
+            name = f["dominant_colors"][0][0]
+            color_votes[name] = color_votes.get(name, 0) + 1
+    top_colors = sorted(color_votes.items(), key=lambda kv: kv[1], reverse=True)[:3]
+
+    return {
+        "count": n,
+        "high_contrast_pct": round(float((contrast >= HIGH_CONTRAST).mean() * 100)),
+        "bright_pct": round(float((brightness >= BRIGHT).mean() * 100)),
+        "dark_pct": round(float((brightness <= DARK).mean() * 100)),
+        "avg_saturation": round(float(saturation.mean()), 3),
+        "avg_edge_density": round(float(edges.mean()), 3),
+        "top_colors": [[name, round(votes * 100 / n)] for name, votes in top_colors],
+    }
+
+
+def features_path(out_dir: str, date: str, safe_keyword: str) -> str:
+    return os.path.join(out_dir, f"features_{date}_{safe_keyword}.json")
+
+
+def save_keyword_features(records: list[dict], out_dir: str, date: str, safe_keyword: str, top_n: int = 10) -> dict:
+    """
+    Hitung fitur thumbnail untuk hasil satu keyword/tanggal dan simpan di samping
+    CSV-nya (features_{date}_{keyword}.json). Return ringkasan top_n thumbnail.
+    """
+    paths = [r.get("screenshot") for r in records if r.get("screenshot")]
+    by_path = compute_features(paths)
+
+    per_video = []
+    for rank, r in enumerate(records, start=1):
+        feats = by_path.get(r.get("screenshot"))
+        if feats:
+            per_video.append({"rank": rank, "url": r.get("url"), "screenshot": r.get("screenshot"), **feats})
+
+    summary = summarize_features([v for v in per_video if v["rank"] <= top_n])
+
+    os.makedirs(out_dir, exist_ok=True)
+    with open(features_path(out_dir, date, safe_keyword), "w", encoding="utf-8") as f:
+        json.dump({"summary": summary, "videos": per_video}, f, ensure_ascii=False, indent=1)
+
+    return summary
+
+
+def load_keyword_summary(out_dir: str, date: str, safe_keyword: str) -> dict:
+    try:
+        with open(features_path(out_dir, date, safe_keyword), encoding="utf-8") as f:
+            return json.load(f).get("summary", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def describe_summary(summary: dict) -> list[str]:
+    """
+    Ringkasan -> baris teks untuk GUI / laporan.
+    """
+    if not summary:
+        return []
+
+    lines = [f"<b>Kontras:</b> {summary['high_contrast_pct']}% high contrast"]
+    if summary["top_colors"]:
+        colors = ", ".join(f"{name} {pct}%" for name, pct in summary["top_colors"])
+        lines.append(f"<b>Warna dominan:</b> {colors}")
+    lines.append(f"<b>Brightness:</b> {summary['bright_pct']}% terang, {summary['dark_pct']}% gelap")
+    lines.append(
+        f"<b>Detail:</b> edge density {summary['avg_edge_density']:.2f}, "
+        f"saturasi {summary['avg_saturation']:.2f}"
+    )
+    return [f"• {line}" for line in lines]
@@ -0,0 +1,310 @@
+# analysis/thumb_hash.py
+
+import json
+import os
+import sys
+
+import numpy as np
+
+from analysis.thumb_images import FileHashCache, list_images, load_batch
+
+SCREENSHOT_DIR = "storage/screenshots"
+INDEX_DIR = "storage/phash"
+BATCH_SIZE = 512
+
+# Multi-index hashing: hash 64-bit dipecah jadi 4 potong 16-bit. Dua hash dengan
+# jarak Hamming <= 3 pasti identik di minimal satu potong (pigeonhole).
+_CHUNKS = 4
+_CHUNK_BITS = 16
+MIH_RADIUS = _CHUNKS - 1
+
+
+# --- Hashing (vectorized per batch) ---
+def _pack_bits(bits: np.ndarray) -> np.ndarray:
+    # (N, 64) bool -> (N,) uint64, bit pertama = MSB
+    return np.packbits(bits.astype(np.uint8), axis=1).view(">u8").ravel().astype(np.uint64)
+
+
+def dhash_batch(gray: np.ndarray) -> np.ndarray:
+    """
+    Difference hash. `gray` = (N, 8, 9) -> (N,) uint64.
+    """
+    g = gray.astype(np.int16)
+    return _pack_bits((g[:, :, 1:] > g[:, :, :-1]).reshape(len(g), -1))
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    m = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    m[0] /= np.sqrt(2)
+    return m
+
+
+_DCT32 = _dct_matrix(32)
+
+
+def phash_batch(gray: np.ndarray) -> np.ndarray:
+    """
+    Perceptual hash (DCT 2D). `gray` = (N, 32, 32) -> (N,) uint64.
+    """
+    coeffs = _DCT32 @ gray.astype(np.float64) @ _DCT32.T
+    low = coeffs[:, :8, :8].reshape(len(gray), -1)
+    # Median tanpa komponen DC supaya tidak didominasi brightness rata-rata
+    median = np.median(low[:, 1:], axis=1, keepdims=True)
+    return _pack_bits(low > median)
+
+
+def hash_images(paths: list[str]) -> tuple[np.ndarray, np.ndarray, list[int]]:
+    """
+    Return (dhash, phash, index path yang berhasil dibaca).
+    """
+    small, ok = load_batch(paths, (9, 8))
+    large, ok_large = load_batch([paths[i] for i in ok], (32, 32))
+    ok = [ok[i] for i in ok_large]
+    small = small[ok_large]
+    return dhash_batch(small), phash_batch(large), ok
+
+
+# --- Jarak Hamming ---
+if hasattr(np, "bitwise_count"):
+    def popcount64(x: np.ndarray) -> np.ndarray:
+        return np.bitwise_count(x)
+else:
+    _POP8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def popcount64(x: np.ndarray) -> np.ndarray:
+        b = np.ascontiguousarray(x, dtype=np.uint64).view(np.uint8).reshape(-1, 8)
+        return _POP8[b].sum(axis=1).reshape(np.shape(x))
+
+
+def hamming(a, b) -> np.ndarray:
+    return popcount64(np.bitwise_xor(np.asarray(a, dtype=np.uint64), np.asarray(b, dtype=np.uint64)))
+
+
+def _chunk(hashes: np.ndarray, i: int) -> np.ndarray:
+    shift = np.uint64(_CHUNK_BITS * i)
+    return ((hashes >> shift) & np.uint64((1 << _CHUNK_BITS) - 1)).astype(np.uint32)
+
+
+class ThumbIndex:
+    """
+    Index pHash untuk semua thumbnail tersimpan.
+
+    - query(): thumbnail mirip (radius <= 3 lewat multi-index hash, lebih dari
+      itu brute force XOR+popcount vectorized; keduanya < 1 detik untuk ratusan
+      ribu gambar)
+    - clusters(): kelompok near-duplicate
+
+    Hash unik per isi file (sha256); satu isi bisa punya banyak path (hard link
+    per tanggal / keyword).
+    """
+
+    def __init__(self, shas: list[str], dhash: np.ndarray, phash: np.ndarray, paths_by_sha: dict[str, list[str]]):
+        self.shas = list(shas)
+        self.dhash = np.asarray(dhash, dtype=np.uint64)
+        self.phash = np.asarray(phash, dtype=np.uint64)
+        self.paths_by_sha = paths_by_sha
+        self._row = {sha: i for i, sha in enumerate(self.shas)}
+
+        # Tabel MIH: per potongan, urutan baris terurut + nilai potongan terurut
+        self._tables = []
+        for i in range(_CHUNKS):
+            keys = _chunk(self.phash, i)
+            order = np.argsort(keys, kind="stable")
+            self._tables.append((keys[order], order))
+
+    def __len__(self):
+        return len(self.shas)
+
+    # --- persistence ---
+    @classmethod
+    def load(cls, index_dir: str = INDEX_DIR) -> "ThumbIndex | None":
+        npz = os.path.join(index_dir, "hashes.npz")
+        files_json = os.path.join(index_dir, "files.json")
+        if not os.path.exists(npz) or not os.path.exists(files_json):
+            return None
+
+        data = np.load(npz)
+        with open(files_json, encoding="utf-8") as f:
+            files = json.load(f)
+
+        paths_by_sha: dict[str, list[str]] = {}
+        for path, (_, _, sha) in files.items():
+            paths_by_sha.setdefault(sha, []).append(path)
+
+        return cls(data["shas"].tolist(), data["dhash"], data["phash"], paths_by_sha)
+
+    def path_for(self, row: int) -> str | None:
+        paths = [p for p in self.paths_by_sha.get(self.shas[row], []) if os.path.exists(p)]
+        return max(paths) if paths else None  # path terbaru (folder tanggal terbesar)
+
+    # --- query ---
+    def _candidates(self, h: np.uint64) -> np.ndarray:
+        rows = []
+        for i, (keys, order) in enumerate(self._tables):
+            k = _chunk(np.array([h], dtype=np.uint64), i)[0]
+            lo, hi = np.searchsorted(keys, [k, k + 1])
+            rows.append(order[lo:hi])
+        return np.unique(np.concatenate(rows)) if rows else np.array([], dtype=np.int64)
+
+    def hash_of(self, path: str, cache: FileHashCache | None = None) -> tuple[np.uint64 | None, int | None]:
+        """
+        (pHash, baris index) untuk file gambar; baris None kalau belum ter-index.
+        """
+        sha = (cache or FileHashCache()).sha(path)
+        if sha in self._row:
+            row = self._row[sha]
+            return self.phash[row], row
+        _, phash, ok = hash_images([path])
+        return (phash[0] if ok else None), None
+
+    def query(self, path_or_hash, max_distance: int = 8, limit: int = 10) -> list[tuple[str, int]]:
+        """
+        Thumbnail paling mirip: list (path, jarak Hamming), terdekat dulu.
+        File query sendiri (isi yang sama) tidak ikut dikembalikan.
+        """
+        own_row = None
+        if isinstance(path_or_hash, str):
+            h, own_row = self.hash_of(path_or_hash)
+            if h is None:
+                return []
+        else:
+            h = np.uint64(path_or_hash)
+
+        if max_distance <= MIH_RADIUS:
+            rows = self._candidates(h)
+        else:
+            rows = np.arange(len(self.phash))
+
+        dist = hamming(self.phash[rows], h)
+        keep = (dist <= max_distance) & (rows != (-1 if own_row is None else own_row))
+        rows, dist = rows[keep], dist[keep]
+        top = np.argsort(dist, kind="stable")[:limit]
+
+        results = []
+        for r, d in zip(rows[top], dist[top]):
+            path = self.path_for(int(r))
+            if path:
+                results.append((path, int(d)))
+        return results
+
+    def _bucket_pairs(self, rows: np.ndarray, max_distance: int, block: int = 1024):
+        """
+        Semua pasangan (a, b), a < b, di dalam satu bucket dengan jarak <= max_distance.
+        Bucket besar diproses per blok baris supaya memori tetap O(block * n).
+        """
+        h = self.phash[rows]
+        for start in range(0, len(rows), block):
+            d = hamming(h[start:start + block, None], h[None, :])
+            i, j = np.nonzero(d <= max_distance)
+            i += start
+            upper = j > i
+            yield rows[i[upper]], rows[j[upper]]
+
+    def clusters(self, max_distance: int = MIH_RADIUS, min_size: int = 2) -> list[list[str]]:
+        """
+        Kelompok near-duplicate (union-find di atas pasangan dengan jarak <= max_distance).
+        Semua pasangan di dalam setiap bucket MIH dibandingkan, jadi hasilnya sama
+        dengan brute force untuk max_distance <= MIH_RADIUS.
+        """
+        if max_distance > MIH_RADIUS:
+            raise ValueError(
+                f"clusters() hanya mendukung max_distance <= {MIH_RADIUS} "
+                f"({_CHUNKS} potong x {_CHUNK_BITS} bit); pakai query() untuk radius lebih besar"
+            )
+
+        n = len(self.phash)
+        parent = np.arange(n)
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for keys, order in self._tables:
+            if n < 2:
+                break
+            # Batas bucket (potongan 16-bit sama) di tabel terurut
+            starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+            ends = np.r_[starts[1:], n]
+            for lo, hi in zip(starts[ends - starts > 1], ends[ends - starts > 1]):
+                for a, b in self._bucket_pairs(order[lo:hi], max_distance):
+                    for x, y in zip(a.tolist(), b.tolist()):
+                        rx, ry = find(x), find(y)
+                        if rx != ry:
+                            parent[ry] = rx
+
+        groups: dict[int, list[str]] = {}
+        for row in range(n):
+            path = self.path_for(row)
+            if path:
+                groups.setdefault(find(row), []).append(path)
+
+        return [g for g in groups.values() if len(g) >= min_size]
+
+
+def build_index(root: str = SCREENSHOT_DIR, index_dir: str = INDEX_DIR, batch_size: int = BATCH_SIZE) -> ThumbIndex:
+    """
+    Batch job: hitung dHash + pHash untuk semua thumbnail di `root`.
+    Hasil di-cache per sha256 isi file, jadi run berikutnya hanya memproses
+    gambar baru / berubah.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    npz = os.path.join(index_dir, "hashes.npz")
+    files_json = os.path.join(index_dir, "files.json")
+
+    cached: dict[str, tuple[int, int]] = {}
+    if os.path.exists(npz):
+        data = np.load(npz)
+        for sha, d, p in zip(data["shas"].tolist(), data["dhash"], data["phash"]):
+            cached[sha] = (d, p)
+
+    files = {}
+    if os.path.exists(files_json):
+        with open(files_json, encoding="utf-8") as f:
+            files = json.load(f)
+    sha_cache = FileHashCache(files)
+
+    paths = list_images(root)
+    path_sha = {}
+    todo: dict[str, str] = {}  # sha -> salah satu path
+    for path in paths:
+        sha = sha_cache.sha(path)
+        if not sha:
+            continue
+        path_sha[path] = sha
+        if sha not in cached and sha not in todo:
+            todo[sha] = path
+
+    todo_items = list(todo.items())
+    for start in range(0, len(todo_items), batch_size):
+        batch = todo_items[start:start + batch_size]
+        dh, ph, ok = hash_images([p for _, p in batch])
+        for j, i in enumerate(ok):
+            cached[batch[i][0]] = (dh[j], ph[j])
+
+    # Simpan hanya file yang masih ada
+    live = sorted({sha for sha in path_sha.values() if sha in cached})
+    dhash = np.array([cached[s][0] for s in live], dtype=np.uint64)
+    phash = np.array([cached[s][1] for s in live], dtype=np.uint64)
+    np.savez(npz + ".tmp.npz", shas=np.array(live), dhash=dhash, phash=phash)
+    os.replace(npz + ".tmp.npz", npz)
+
+    live_files = {p: sha_cache.entries[p] for p in path_sha}
+    with open(files_json + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(live_files, f)
+    os.replace(files_json + ".tmp", files_json)
+
+    print(f"[OK] Thumbnail hash index: {len(live)} unik, {len(todo)} baru di-hash ({len(paths)} file)")
+
+    paths_by_sha: dict[str, list[str]] = {}
+    for path, sha in path_sha.items():
+        paths_by_sha.setdefault(sha, []).append(path)
+    return ThumbIndex(live, dhash, phash, paths_by_sha)
+
+
+if __name__ == "__main__":
+    # python -m analysis.thumb_hash [folder_screenshot]
+    build_index(sys.argv[1] if len(sys.argv) > 1 else SCREENSHOT_DIR)
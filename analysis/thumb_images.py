@@ -0,0 +1,66 @@
+# analysis/thumb_images.py
+
+import os
+
+import numpy as np
+from PIL import Image
+
+from storage.blobstore import file_sha256
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def list_images(root: str) -> list[str]:
+    paths = []
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            if name.lower().endswith(IMAGE_EXTS):
+                paths.append(os.path.join(dirpath, name))
+    return sorted(paths)
+
+
+def load_batch(paths: list[str], size: tuple[int, int], mode: str = "L") -> tuple[np.ndarray, list[int]]:
+    """
+    Decode + resize sekumpulan gambar jadi satu array (N, H, W[, 3]) uint8.
+    `size` = (width, height). Return (array, index path yang berhasil dibaca).
+    """
+    frames = []
+    ok = []
+    for i, path in enumerate(paths):
+        try:
+            with Image.open(path) as img:
+                img.draft(mode, (size[0] * 4, size[1] * 4))  # decode JPEG lebih cepat
+                frames.append(np.asarray(img.convert(mode).resize(size, Image.BILINEAR), dtype=np.uint8))
+            ok.append(i)
+        except Exception as e:
+            print(f"[WARN] Gagal baca gambar {path}: {e}")
+
+    if not frames:
+        shape = (0, size[1], size[0]) if mode == "L" else (0, size[1], size[0], 3)
+        return np.zeros(shape, dtype=np.uint8), ok
+
+    return np.stack(frames), ok
+
+
+class FileHashCache:
+    """
+    path -> sha256 isi file, di-memo dengan (size, mtime) supaya file yang tidak
+    berubah tidak perlu dibaca ulang. Blob di storage/blobs sudah bernama sha256.
+    """
+
+    def __init__(self, entries: dict | None = None):
+        self.entries = entries or {}
+
+    def sha(self, path: str) -> str | None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+
+        cached = self.entries.get(path)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+
+        sha = file_sha256(path)
+        self.entries[path] = [st.st_size, st.st_mtime_ns, sha]
+        return sha
@@ -4,8 +4,17 @@ import csv
 import os
 from typing import Dict, List
 from datetime import datetime
+
+import numpy as np
+
 from analysis.trend_score import score_records
 from analysis.early_breakout import mark_early_breakouts
+from analysis.trend_state import EWMA_HALFLIFE_DAYS, acceleration, ensure_trend_state, update_trend_state
+from storage.db import load_trend_states, video_key
+from storage.history import snapshot_dates, load_snapshot, load_observations
+
+WINDOW_DAYS = 30
+WINDOW_FIELDS = ("window_obs", "acceleration", "velocity_ewma", "growth_ewma_pct", "days_in_trend")
 
 
 def _read_csv(path: str) -> List[Dict]:
@@ -23,9 +32,97 @@ def compare_daily_csv(today_csv: str, yesterday_csv: str) -> List[Dict]:
     """
     Compare two CSV files (today vs yesterday) and compute delta & velocity.
     """
-    today_rows = _read_csv(today_csv)
-    yesterday_rows = _read_csv(yesterday_csv)
+    return compare_rows(_read_csv(today_csv), _read_csv(yesterday_csv))
+
+
+def compare_daily_db(platform: str, safe_keyword: str) -> tuple[List[Dict], str] | None:
+    """
+    Sama seperti compare_daily_csv, tapi dua snapshot terakhir diambil dari
+    riwayat (storage.history: database, CSV harian, lalu arsip kolom).
+    Return (records, tanggal hari ini) atau None kalau riwayat belum cukup.
+    """
+    dates = snapshot_dates(platform, safe_keyword)
+    if len(dates) < 2:
+        return None
+
+    today = load_snapshot(platform, safe_keyword, dates[-1])
+    yesterday = load_snapshot(platform, safe_keyword, dates[-2])
+    return compare_rows(today, yesterday), dates[-1]
+
+
+def compare_incremental(platform: str, safe_keyword: str) -> tuple[List[Dict], str] | None:
+    """
+    Snapshot terbaru diproses terhadap state per video (analysis.trend_state):
+    hanya snapshot ini yang dibaca, tidak ada CSV kemarin / index ulang.
+    Snapshot pertama keyword juga diproses (jadi baseline hari berikutnya).
+    Return (records, tanggal) atau None kalau riwayat belum cukup.
+    """
+    dates = snapshot_dates(platform, safe_keyword)
+    if not dates:
+        return None
+
+    ensure_trend_state(platform)
+    records = load_snapshot(platform, safe_keyword, dates[-1])
+    _backfill_trend_state(platform, safe_keyword, dates[:-1], records)
+    results = update_trend_state(platform, records, dates[-1])
+    return (results, dates[-1]) if len(dates) >= 2 else None
+
+
+def _backfill_trend_state(platform: str, safe_keyword: str, dates: List[str], records: List[Dict]):
+    """
+    Video di snapshot terbaru yang belum punya state sama sekali (mis. keyword
+    baru ditambahkan setelah keyword lain punya state, atau riwayat hasil
+    import) diputar dulu dari snapshot lama keyword ini, urut tanggal.
+    Video yang sudah punya state tidak disentuh.
+    """
+    if not dates:
+        return
+    keys = {video_key(r) for r in records} - {None}
+    missing = keys - set(load_trend_states(platform, sorted(keys)))
+    if not missing:
+        return
+
+    for date in dates:
+        rows = [r for r in load_snapshot(platform, safe_keyword, date) if video_key(r) in missing]
+        if rows:
+            update_trend_state(platform, rows, date)
+
+
+def compare_window(platform: str, safe_keyword: str, days: int = WINDOW_DAYS) -> tuple[List[Dict], str] | None:
+    """
+    compare_daily_db + metrik multi-hari (window_metrics) dari `days` snapshot
+    terakhir, ditempel ke tiap record lewat video_key.
+    """
+    result = compare_daily_db(platform, safe_keyword)
+    if not result:
+        return None
 
+    records, date = result
+    obs = load_observations(platform, safe_keyword, days)
+    metrics = window_metrics(obs["key"], obs["ts"], obs["views"])
+
+    empty = dict.fromkeys(WINDOW_FIELDS)
+    for r in records:
+        r.update(metrics.get(video_key(r)) or empty)
+    return records, date
+
+
+def _elapsed_days(today: Dict, yest: Dict) -> float:
+    """
+    Jarak waktu (hari) antara dua observasi: dari collected_at, lalu tanggal
+    snapshot, default 1 hari.
+    """
+    for key, fmt in (("collected_at", "%Y-%m-%dT%H:%M:%SZ"), ("date", "%Y-%m-%d")):
+        try:
+            days = (datetime.strptime(today[key], fmt) - datetime.strptime(yest[key], fmt)).total_seconds() / 86400
+        except (KeyError, TypeError, ValueError):
+            continue
+        if days > 0:
+            return days
+    return 1.0
+
+
+def compare_rows(today_rows: List[Dict], yesterday_rows: List[Dict]) -> List[Dict]:
     today_by_url = _index_by_url(today_rows)
     yest_by_url = _index_by_url(yesterday_rows)
 
@@ -51,15 +148,16 @@ def compare_daily_csv(today_csv: str, yesterday_csv: str) -> List[Dict]:
             vy = int(yest.get("views_api") or yest["views"])
 
             delta = vt - vy
+            velocity = round(delta / _elapsed_days(today, yest), 2)
         except (TypeError, ValueError):
-            vt, vy, delta = None, None, None
+            vt, vy, delta, velocity = None, None, None, None
 
         results.append({
             **today,
             "views_yesterday": vy,
             "views_today": vt,
             "delta_views": delta,
-            "velocity_per_day": delta,  # 1-day diff
+            "velocity_per_day": velocity,  # views/hari, dinormalisasi dengan jarak waktu asli
             "status": "existing",
         })
 
@@ -67,6 +165,92 @@ def compare_daily_csv(today_csv: str, yesterday_csv: str) -> List[Dict]:
     return mark_early_breakouts(scored)
 
 
+def window_metrics(keys: np.ndarray, ts: np.ndarray, views: np.ndarray, halflife_days: float = EWMA_HALFLIFE_DAYS) -> Dict[str, Dict]:
+    """
+    Metrik multi-hari per video, dihitung sekaligus untuk semua video:
+
+    - window_obs: jumlah observasi di window
+    - acceleration: perubahan velocity antara dua interval terakhir dibagi panjang
+      interval terakhir (trend_state.acceleration, sama dengan state incremental)
+    - velocity_ewma: velocity (views/hari) yang dihaluskan EWMA; bobot per interval
+      tergantung jarak waktu asli (half-life `halflife_days`)
+    - growth_ewma_pct: velocity_ewma relatif terhadap views terakhir (%/hari)
+    - days_in_trend: lama (hari) velocity positif berturut-turut sampai observasi terakhir
+
+    Input kolom dari storage.history.load_observations. Return video_key -> metrik.
+    """
+    ok = (views >= 0) & ~np.isnat(ts)
+    keys, ts, views = keys[ok], ts[ok], views[ok]
+    if not len(keys):
+        return {}
+
+    # Matriks (video x observasi) terurut waktu, sisa kanan = NaN
+    uniq, inv = np.unique(keys.astype(str), return_inverse=True)
+    order = np.lexsort((ts, inv))
+    inv = inv[order]
+    counts = np.bincount(inv, minlength=len(uniq))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    pos = np.arange(len(inv)) - starts[inv]
+
+    n, m = len(uniq), int(counts.max())
+    t_days = (ts[order] - ts.min()).astype("timedelta64[s]").astype(np.float64) / 86400
+    T = np.full((n, m), np.nan)
+    V = np.full((n, m), np.nan)
+    T[inv, pos] = t_days
+    V[inv, pos] = views[order]
+
+    dT = np.diff(T, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vel = np.where(dT > 0, np.diff(V, axis=1) / dT, np.nan)
+
+    rows = np.arange(n)
+    last = counts - 1
+    last_pair = np.maximum(counts - 2, 0)
+    prev_pair = np.maximum(counts - 3, 0)
+
+    # Acceleration dari dua interval terakhir (butuh >= 3 observasi)
+    accel = np.full(n, np.nan)
+    if m >= 3:
+        has = counts >= 3
+        days = dT[rows, last_pair]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            accel = np.where(has & (days > 0), acceleration(vel[rows, prev_pair], vel[rows, last_pair], days), np.nan)
+
+    # EWMA time-aware: loop per kolom (<= jumlah hari), vectorized di semua video
+    ewma = np.full(n, np.nan)
+    decay = np.log(2) / halflife_days
+    for j in range(m - 1):
+        x = vel[:, j]
+        valid = ~np.isnan(x)
+        alpha = 1 - np.exp(-np.nan_to_num(dT[:, j]) * decay)
+        ewma = np.where(valid, np.where(np.isnan(ewma), x, ewma + alpha * (x - ewma)), ewma)
+
+    views_last = V[rows, last]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = np.where(views_last > 0, ewma / views_last * 100, np.nan)
+
+    # Days in trend: interval negatif/kosong terakhir sebelum observasi terakhir
+    days_in_trend = np.zeros(n)
+    if m >= 2:
+        j = np.arange(m - 1)
+        breaks = ~(vel > 0) & (j[None, :] <= last_pair[:, None])
+        last_break = np.where(breaks, j[None, :], -1).max(axis=1)
+        streak_start = np.minimum(last_break + 1, last)
+        days_in_trend = np.where(counts >= 2, T[rows, last] - T[rows, streak_start], 0.0)
+
+    def num(x):
+        return None if np.isnan(x) else round(float(x), 2)
+
+    return {
+        key: {
+            "window_obs": int(counts[i]),
+            "acceleration": num(accel[i]),
+            "velocity_ewma": num(ewma[i]),
+            "growth_ewma_pct": num(growth[i]),
+            "days_in_trend": round(float(days_in_trend[i]), 2),
+        }
+        for i, key in enumerate(uniq.tolist())
+    }
 
 
 def export_trend_delta(records: List[Dict], output_path: str):
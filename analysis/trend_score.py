@@ -1,9 +1,19 @@
 # analysis/trend_score.py
 
+from functools import lru_cache
 from typing import Dict, List
 import re
+import sys
+import time
 
+import numpy as np
 
+# Batas label (dipakai compute_trend_score dan score_batch)
+LABELS = [(70, "爆发"), (40, "rising"), (20, "stable")]  # 爆发 = breakout
+DEFAULT_LABEL = "stale"
+
+
+@lru_cache(maxsize=4096)
 def _estimate_age_days(upload_time: str | None) -> int | None:
     """
     Convert '2 days ago', '3 months ago', etc. to rough days.
@@ -62,14 +72,11 @@ def compute_trend_score(record: Dict) -> Dict:
             score += 10
 
     # Labeling
-    if score >= 70:
-        label = "爆发"      # breakout
-    elif score >= 40:
-        label = "rising"
-    elif score >= 20:
-        label = "stable"
-    else:
-        label = "stale"
+    label = DEFAULT_LABEL
+    for threshold, name in LABELS:
+        if score >= threshold:
+            label = name
+            break
 
     record["trend_score"] = round(score, 2)
     record["trend_label"] = label
@@ -78,6 +85,136 @@ def compute_trend_score(record: Dict) -> Dict:
     return record
 
 
-def score_records(records: List[Dict]) -> List[Dict]:
-    scored = [compute_trend_score(r) for r in records]
-    return sorted(scored, key=lambda x: x.get("trend_score", 0), reverse=True)
+def _to_float(value) -> float:
+    if value in (None, ""):
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def round2(scores: np.ndarray) -> np.ndarray:
+    """
+    Sama persis dengan round(x, 2) Python per elemen. np.round bisa beda di
+    nilai yang tepat di tengah (x.xx5), jadi hanya nilai itu yang dihitung ulang
+    dengan round() Python.
+    """
+    out = np.round(scores, 2)
+    frac = scores * 100 - np.floor(scores * 100)
+    tie = np.flatnonzero(np.abs(frac - 0.5) < 1e-6)
+    for i in tie:
+        out[i] = round(float(scores[i]), 2)
+    return out
+
+
+def score_batch(views, delta, upload_times) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Versi kolom dari compute_trend_score:
+    views, delta = array angka (NaN = kosong), upload_times = list string / None.
+    Return (score dibulatkan 2 desimal, label, umur hari [NaN = tidak diketahui]).
+    """
+    views = np.asarray(views, dtype=np.float64)
+    delta = np.asarray(delta, dtype=np.float64)
+    ages = np.array([_estimate_age_days(u) if u else np.nan for u in upload_times], dtype=np.float64)
+
+    # Urutan penjumlahan sama dengan versi per record (hasil float identik)
+    score = np.zeros(len(views))
+    score += np.where(delta > 0, np.minimum(delta / 1000, 50), 0.0)
+    score += np.where((views != 0) & ~np.isnan(views), np.minimum(views / 100000, 30), 0.0)
+    score += np.select([ages <= 2, ages <= 7, ages <= 30], [30.0, 20.0, 10.0], 0.0)
+
+    labels = np.select(
+        [score >= threshold for threshold, _ in LABELS],
+        [name for _, name in LABELS],
+        DEFAULT_LABEL,
+    ).astype(object)
+
+    return round2(score), labels, ages
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Index k skor tertinggi, urut turun; skor sama tetap urutan asli
+    (sama dengan sorted(..., reverse=True)[:k]). Partial sort lewat argpartition.
+    """
+    n = len(scores)
+    if k <= 0:
+        return np.array([], dtype=np.int64)
+    if k >= n:
+        return np.argsort(-scores, kind="stable")
+
+    kth = -np.partition(-scores, k - 1)[k - 1]
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[:k - len(above)]
+    idx = np.concatenate([above, ties])
+    idx.sort()
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+def score_records(records: List[Dict], limit: int | None = None) -> List[Dict]:
+    """
+    Skor semua record sekaligus (score_batch), urut skor tertinggi.
+    `limit` = hanya ambil top-k.
+    """
+    if not records:
+        return []
+
+    views = [_to_float(r.get("views_api") or r.get("views")) for r in records]
+    delta = [_to_float(r.get("delta_views")) for r in records]
+    scores, labels, ages = score_batch(views, delta, [r.get("upload_time") for r in records])
+
+    for r, s, label, age in zip(records, scores.tolist(), labels.tolist(), ages.tolist()):
+        r["trend_score"] = s
+        r["trend_label"] = label
+        r["age_days_est"] = None if age != age else int(age)
+
+    order = top_k(scores, limit if limit is not None else len(records))
+    return [records[i] for i in order]
+
+
+def _benchmark(sizes=(10_000, 100_000, 1_000_000)):
+    rng = np.random.default_rng(0)
+    units = ["hour", "day", "week", "month", "year"]
+    texts = [f"{n} {u}s ago" for u in units for n in range(1, 60)] + [None, "Streamed live"]
+
+    for n in sizes:
+        views = rng.integers(0, 5_000_000, n).astype(np.float64)
+        delta = rng.integers(-5000, 80_000, n).astype(np.float64)
+        delta[rng.random(n) < 0.2] = np.nan
+        uploads = [texts[i] for i in rng.integers(0, len(texts), n)]
+
+        records = [
+            {"views": int(v), "delta_views": None if d != d else int(d), "upload_time": u}
+            for v, d, u in zip(views.tolist(), delta.tolist(), uploads)
+        ]
+
+        t0 = time.perf_counter()
+        expected = sorted((compute_trend_score(dict(r)) for r in records), key=lambda x: x.get("trend_score", 0), reverse=True)
+        t_loop = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        scores, labels, ages = score_batch(views, delta, uploads)
+        top = top_k(scores, 100)
+        t_batch = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        got = score_records(records)
+        t_records = time.perf_counter() - t0
+
+        keys = ("trend_score", "trend_label", "age_days_est")
+        same = all(all(a[k] == b[k] for k in keys) for a, b in zip(expected, got))
+        same = same and scores[top].tolist() == [r["trend_score"] for r in expected[:100]]
+        print(
+            f"n={n:>9,}: per-record {t_loop:.3f}s, score_batch+top_k {t_batch:.3f}s, "
+            f"score_records {t_records:.3f}s, identik={same}"
+        )
+
+
+if __name__ == "__main__":
+    # python -m analysis.trend_score bench [n ...]
+    if len(sys.argv) >= 2 and sys.argv[1] == "bench":
+        _benchmark(tuple(int(n) for n in sys.argv[2:]) or (10_000, 100_000, 1_000_000))
+    else:
+        print("Usage: python -m analysis.trend_score bench [n ...]")
+        sys.exit(1)
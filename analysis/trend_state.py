@@ -0,0 +1,210 @@
+# analysis/trend_state.py
+
+import math
+import sys
+from datetime import datetime
+from typing import Dict, List
+
+from analysis.early_breakout import mark_early_breakouts
+from analysis.trend_score import score_records
+from storage.db import (
+    DB_PATH, all_snapshots, count_trend_states, load_snapshot, load_trend_states,
+    save_trend_states, video_key,
+)
+from storage.registry import get_registry
+
+EWMA_HALFLIFE_DAYS = 3.0
+_TS_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def _parse_ts(record: Dict, date: str) -> datetime:
+    try:
+        return datetime.strptime(record.get("collected_at") or "", _TS_FORMAT)
+    except ValueError:
+        return datetime.strptime(date, "%Y-%m-%d")
+
+
+def _views(record: Dict) -> int | None:
+    value = record.get("views_api") or record.get("views")
+    try:
+        return int(float(value)) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def acceleration(velocity_prev, velocity, days):
+    """
+    Perubahan velocity (views/hari^2) dibagi panjang interval terakhir.
+    Dipakai juga oleh trend_delta.window_metrics (bisa array NumPy), supaya
+    state incremental dan window multi-hari memberi angka yang sama.
+    """
+    return (velocity - velocity_prev) / days
+
+
+def _step(base: Dict | None, views: int | None, ts: datetime, date: str) -> tuple[Dict, Dict]:
+    """
+    Satu observasi baru untuk satu video -> (state baru, field untuk record).
+    `base` = state setelah tanggal sebelumnya (None = video belum pernah dilihat).
+    """
+    ts_text = ts.strftime(_TS_FORMAT)
+    empty = {
+        "views_yesterday": base["last_views"] if base else None,
+        "views_today": views,
+        "delta_views": None,
+        "velocity_per_day": None,
+        "status": "new" if base is None else "existing",
+        "acceleration": None,
+    }
+
+    if base is not None and views is None:
+        # Views tidak terbaca: state lama dipertahankan
+        state = {k: v for k, v in base.items() if k != "prev"}
+        state.update(date=date, observations=base["observations"] + 1, breakout=False)
+        return state, empty
+
+    if base is None or base["last_views"] is None:
+        state = {
+            "date": date,
+            "last_views": views,
+            "last_ts": ts_text,
+            "velocity": None,
+            "velocity_ewma": None,
+            "peak_views": views,
+            "first_seen": base["first_seen"] if base else ts_text,
+            "trend_since": None,
+            "observations": (base["observations"] if base else 0) + 1,
+            "breakout": False,
+        }
+        return state, empty
+
+    last_ts = datetime.strptime(base["last_ts"], _TS_FORMAT)
+    days = (ts - last_ts).total_seconds() / 86400
+    if days <= 0:
+        days = 1.0  # jam tidak diketahui / tidak urut: anggap satu hari
+
+    delta = views - base["last_views"]
+    velocity = delta / days
+
+    ewma = base["velocity_ewma"]
+    if ewma is None:
+        ewma = velocity
+    else:
+        alpha = 1 - math.exp(-days * math.log(2) / EWMA_HALFLIFE_DAYS)
+        ewma = ewma + alpha * (velocity - ewma)
+
+    accel = None
+    if base["velocity"] is not None:
+        accel = round(acceleration(base["velocity"], velocity, days), 2)
+
+    state = {
+        "date": date,
+        "last_views": views,
+        "last_ts": ts_text,
+        "velocity": velocity,
+        "velocity_ewma": ewma,
+        "peak_views": max(views, base["peak_views"] or 0),
+        "first_seen": base["first_seen"],
+        "trend_since": (base["trend_since"] or base["last_ts"]) if velocity > 0 else None,
+        "observations": base["observations"] + 1,
+        "breakout": False,
+    }
+    fields = {
+        **empty,
+        "delta_views": delta,
+        "velocity_per_day": round(velocity, 2),
+        "acceleration": accel,
+    }
+    return state, fields
+
+
+def update_trend_state(platform: str, records: List[Dict], date: str, path: str = DB_PATH) -> List[Dict]:
+    """
+    Proses satu snapshot baru terhadap state per video yang tersimpan:
+    delta / velocity dihitung dari observasi terakhir video itu (bukan dari CSV
+    kemarin), lalu skor + early breakout. Hanya video di snapshot ini yang dibaca
+    dan ditulis, jadi biayanya sebanding dengan data baru, bukan riwayat.
+
+    Snapshot tanggal yang sama boleh diproses ulang (run ulang di hari yang sama):
+    state dihitung ulang dari `prev`, bukan ditumpuk. Dalam satu proses, video
+    yang sudah dihitung untuk keyword lain di siklus ini memakai hasil yang sama
+    (storage.registry), selama views-nya sama.
+    """
+    registry = get_registry()
+    keyed = [(video_key(r), r) for r in records]
+    reused = {k: registry.get_trend(platform, k, date, _views(r)) for k, r in keyed if k}
+    states = load_trend_states(platform, [k for k, t in reused.items() if t is None], path=path)
+
+    results = []
+    updated: dict[str, dict] = {}
+    for key, record in keyed:
+        if not key:
+            continue
+
+        if reused.get(key) is not None:
+            results.append({**record, **reused[key]})
+            continue
+
+        current = updated.get(key) or states.get(key)
+        if current and current["date"] == date:
+            base, prev = current["prev"], current["prev"]
+        else:
+            base, prev = current, current
+
+        state, fields = _step(base, _views(record), _parse_ts(record, date), date)
+        if prev:
+            prev = {k: v for k, v in prev.items() if k != "prev"}
+        state["prev"] = prev
+        updated[key] = state
+
+        days_in_trend = 0.0
+        if state["trend_since"]:
+            since = datetime.strptime(state["trend_since"], _TS_FORMAT)
+            days_in_trend = (datetime.strptime(state["last_ts"], _TS_FORMAT) - since).total_seconds() / 86400
+
+        trend = {
+            **fields,
+            "window_obs": state["observations"],
+            "velocity_ewma": None if state["velocity_ewma"] is None else round(state["velocity_ewma"], 2),
+            "days_in_trend": round(days_in_trend, 2),
+            "peak_views": state["peak_views"],
+            "first_seen": state["first_seen"],
+        }
+        registry.set_trend(platform, key, date, trend)
+        results.append({**record, **trend})
+
+    scored = mark_early_breakouts(score_records(results))
+
+    for r in scored:
+        state = updated.get(video_key(r))
+        if state:
+            state["breakout"] = bool(r["early_breakout"])
+
+    save_trend_states(platform, updated, path=path)
+    return scored
+
+
+def rebuild_trend_state(platform: str, path: str = DB_PATH) -> int:
+    """
+    Bangun state dari semua snapshot di database (urut tanggal). Sekali jalan,
+    mis. setelah import-csv atau kalau tabel trend_state dihapus.
+    """
+    snapshots = all_snapshots(platform, path=path)
+    for date, keyword in snapshots:
+        update_trend_state(platform, load_snapshot(platform, keyword, date, path=path), date, path=path)
+    print(f"[OK] Trend state {platform}: {len(snapshots)} snapshot diproses")
+    return len(snapshots)
+
+
+def ensure_trend_state(platform: str, path: str = DB_PATH):
+    # State kosong tapi riwayat ada (database lama): bangun sekali dulu
+    if not count_trend_states(platform, path=path) and all_snapshots(platform, path=path):
+        rebuild_trend_state(platform, path=path)
+
+
+if __name__ == "__main__":
+    # python -m analysis.trend_state rebuild <youtube|tiktok>
+    if len(sys.argv) >= 3 and sys.argv[1] == "rebuild":
+        rebuild_trend_state(sys.argv[2])
+    else:
+        print("Usage: python -m analysis.trend_state rebuild <youtube|tiktok>")
+        sys.exit(1)
@@ -1,19 +1,29 @@
 # bot_listener.py
 
+import os
+import secrets
+import sys
 import time
+
 import requests
 import yaml
 
-from browser.launcher import launch_browser
-from collectors.youtube import collect_youtube_trends
-from analysis.trend_delta import compare_daily_csv
-from analysis.export_early_breakout import export_early_breakout_only
 from notifications.formatters import format_early_breakout
-from utils.time import utc_today
-from storage.export_csv import export_to_csv
+from notifications.sender import get_sender
+from notifications.webhook import WebhookServer, delete_webhook, set_webhook
+from utils.job_queue import JobQueue, QueueFull
+from utils.time import iso_to_epoch, utc_today
+from storage.db import last_run, save_run
+
+# Browser, collector dan analisis (numpy) di-import saat keyword pertama masuk,
+# supaya listener langsung polling begitu dijalankan.
 
 DATA_DIR = "data/youtube"
 
+# Default kalau tidak diisi di config.yaml (telegram.workers / telegram.cache_ttl_minutes)
+WORKERS = 2
+CACHE_TTL_MINUTES = 30
+
 
 def load_config():
     with open("config.yaml", "r", encoding="utf-8") as f:
@@ -21,45 +31,73 @@ def load_config():
 
 
 def get_updates(bot_token, offset=None):
-    url = f"https://api.telegram.org/bot{bot_token}/getUpdates"
+    sender = get_sender(bot_token)
+    url = f"{sender.api_base}/bot{bot_token}/getUpdates"
     params = {"timeout": 30}
     if offset:
         params["offset"] = offset
-    return requests.get(url, params=params, timeout=40).json()
-
-
-def send_message(bot_token, chat_id, text):
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-    requests.post(
-        url,
-        json={
-            "chat_id": chat_id,
-            "text": text,
-            "parse_mode": "HTML",
-            "disable_web_page_preview": True,
-        },
-        timeout=10,
-    )
+    return sender.session.get(url, params=params, timeout=40).json()
 
 
-def handle_keyword(keyword: str):
-    p, browser, page = launch_browser()
+def send_message(bot_token, chat_id, text, batch=False):
+    # Lewat antrian sender (rate limit + retry), tidak memblok loop polling.
+    # batch=True: ringkasan breakout ke chat yang sama boleh digabung.
+    get_sender(bot_token).enqueue(chat_id, text, batch=batch)
 
-    data = collect_youtube_trends(page, keyword, max_videos=20)
 
-    date = utc_today()
-    safe_keyword = keyword.replace(" ", "-")
+def _fresh_run(safe_keyword: str, date: str, max_age: float) -> float | None:
+    """
+    Waktu (epoch) run collect hari ini yang umurnya < max_age detik, atau None.
+    """
+    run = last_run("youtube", safe_keyword)
+    if not max_age or not run or run["date"] != date or not run["record_count"]:
+        return None
+    started = iso_to_epoch(run["started_at"])
+    return started if time.time() - started < max_age else None
 
-    today_csv = export_to_csv(
-        records=data,
-        output_dir=DATA_DIR,
-        filename=f"{date}_{safe_keyword}.csv",
-    )
 
-    browser.close()
-    p.stop()
+def handle_keyword(keyword: str, max_age: float = 0, extract: str = "dom"):
+    """
+    Scrape + bandingkan satu keyword. Kalau keyword sudah di-collect kurang dari
+    `max_age` detik lalu (runner, bot sebelumnya), data tersimpan dipakai tanpa scrape.
+    `extract` = cara ekstraksi browser ("dom" / "json", youtube.browser_extract).
+    Return (records, safe_keyword, date, waktu data dikumpulkan).
+    """
+    from analysis.trend_delta import compare_daily_csv, compare_incremental
+
+    date = utc_today()
+    safe_keyword = keyword.replace(" ", "-")
 
-    # cari file sebelumnya
+    as_of = _fresh_run(safe_keyword, date, max_age)
+    if as_of is None:
+        from browser.pool import get_pool
+        from collectors.youtube import collect_youtube_browser
+        from storage.export_csv import export_to_csv
+
+        with get_pool().page(routing="youtube") as page:
+            data = collect_youtube_browser(page, keyword, max_videos=20, extract=extract)
+
+        if data:
+            save_run("youtube", safe_keyword, date, data)
+            export_to_csv(
+                records=data,
+                output_dir=DATA_DIR,
+                filename=f"{date}_{safe_keyword}.csv",
+            )
+            as_of = time.time()
+        else:
+            # Scrape kosong: yang dibandingkan tetap data run terakhir, umurnya ikut dilaporkan
+            run = last_run("youtube", safe_keyword)
+            if not run or not run["record_count"]:
+                raise RuntimeError(f"Scrape '{keyword}' tidak menghasilkan data")
+            print(f"[WARN] Scrape '{keyword}' kosong, pakai data run terakhir ({run['started_at']})")
+            as_of = iso_to_epoch(run["started_at"])
+
+    result = compare_incremental("youtube", safe_keyword)
+    if result:
+        return result[0], safe_keyword, date, as_of
+
+    # cari file sebelumnya (riwayat CSV yang belum di-import)
     files = sorted(
         f for f in os.listdir(DATA_DIR)
         if f.endswith(f"_{safe_keyword}.csv")
@@ -68,29 +106,100 @@ def handle_keyword(keyword: str):
     )
 
     if len(files) < 2:
-        return [], safe_keyword, date
+        return [], safe_keyword, date, as_of
 
     yesterday = f"{DATA_DIR}/{files[-2]}"
     today = f"{DATA_DIR}/{files[-1]}"
 
     delta_records = compare_daily_csv(today, yesterday)
 
-    return delta_records, safe_keyword, date
+    return delta_records, safe_keyword, date, as_of
 
 
-def main():
-    cfg = load_config()
-    tg = cfg["telegram"]
+def _close_browser():
+    # Dipanggil di thread worker sebelum berhenti: browser pool milik thread itu
+    if "browser.pool" in sys.modules:
+        from browser.pool import close_pool
+
+        close_pool()
+
+
+def _staleness(as_of: float) -> str:
+    minutes = int((time.time() - as_of) // 60)
+    if minutes < 1:
+        return "data baru"
+    if minutes < 60:
+        return f"data {minutes} menit lalu"
+    return f"data {minutes // 60} jam {minutes % 60} menit lalu"
+
+
+def _reply_when_done(bot_token, chat_id, keyword):
+    def on_done(job):
+        if job.error is not None:
+            send_message(bot_token, chat_id, f"❌ Research gagal: <b>{keyword}</b>")
+            return
+
+        records, safe_keyword, date, as_of = job.result
+        breakout_only = [r for r in records if r.get("early_breakout")]
+
+        reply = format_early_breakout(
+            breakout_only,
+            keyword=keyword,
+            date=date,
+        )
+        send_message(bot_token, chat_id, f"{reply}\n\n🕒 {_staleness(as_of)}", batch=True)
+
+    return on_done
 
-    bot_token = tg["bot_token"]
-    chat_id = tg["chat_id"]
 
+def make_update_handler(bot_token, chat_id, jobs: JobQueue):
+    """
+    Handler satu update Telegram (dipakai polling maupun webhook):
+    keyword dimasukkan ke antrian job lalu dibalas posisi antriannya.
+    """
+
+    def handle_update(update: dict):
+        message = update.get("message")
+        if not message:
+            return
+
+        text = message.get("text", "").strip()
+        if not text:
+            return
+
+        keyword = text.lower()
+        reply_to = message.get("chat", {}).get("id", chat_id)
+
+        try:
+            job, status, position = jobs.submit(
+                keyword, keyword, on_done=_reply_when_done(bot_token, reply_to, keyword)
+            )
+        except QueueFull:
+            send_message(bot_token, reply_to, f"⏳ Antrian penuh, coba lagi nanti: <b>{keyword}</b>")
+            return
+
+        if status == "cached":
+            return  # hasil sudah dikirim dari cache
+        queue_info = f"antrian #{position}" if position else "sedang diproses"
+        if status == "joined":
+            queue_info += ", digabung dengan request yang sama"
+        send_message(bot_token, reply_to, f"🔍 Researching: <b>{keyword}</b> ({queue_info})")
+
+    return handle_update
+
+
+def run_polling(bot_token, handle_update):
     offset = None
 
-    print("🤖 Bot listener running...")
+    print("🤖 Bot listener running (polling)...")
 
     while True:
-        updates = get_updates(bot_token, offset)
+        try:
+            updates = get_updates(bot_token, offset)
+        except (requests.RequestException, ValueError) as e:
+            print(f"[WARN] getUpdates gagal: {e}")
+            time.sleep(5)
+            continue
 
         if not updates.get("ok"):
             time.sleep(5)
@@ -98,32 +207,94 @@ def main():
 
         for update in updates["result"]:
             offset = update["update_id"] + 1
+            handle_update(update)
 
-            message = update.get("message")
-            if not message:
-                continue
-
-            text = message.get("text", "").strip()
-            if not text:
-                continue
-
-            keyword = text.lower()
-
-            send_message(bot_token, chat_id, f"🔍 Researching: <b>{keyword}</b>")
+        time.sleep(1)
 
-            records, safe_keyword, date = handle_keyword(keyword)
 
-            breakout_only = [r for r in records if r.get("early_breakout")]
+def run_webhook(bot_token, handle_update, webhook: dict) -> bool:
+    """
+    Terima update lewat webhook. Return False kalau webhook tidak bisa dipakai
+    (server gagal bind / setWebhook ditolak), supaya pemanggil kembali ke polling.
+
+    config.yaml:
+        telegram:
+          webhook:
+            enabled: true
+            url: https://bot.example.com/telegram   # URL publik (reverse proxy -> host:port)
+            secret_token: ...                      # kosong = dibuat acak tiap start
+            host: 127.0.0.1
+            port: 8081
+            path: /telegram
+    """
+    url = webhook.get("url")
+    secret = webhook.get("secret_token") or (secrets.token_urlsafe(32) if url else None)
+    if not secret:
+        print("[WARN] Webhook butuh url atau secret_token, pakai polling.")
+        return False
+
+    try:
+        server = WebhookServer(
+            handle_update,
+            secret,
+            host=webhook.get("host", "127.0.0.1"),
+            port=int(webhook.get("port", 8081)),
+            path=webhook.get("path", "/telegram"),
+        )
+    except OSError as e:
+        print(f"[WARN] Webhook server gagal start ({e}), pakai polling.")
+        return False
+
+    # Tanpa url: webhook dianggap sudah didaftarkan di luar (secret_token sama)
+    if url and not set_webhook(bot_token, url, secret):
+        server.stop()
+        return False
+
+    host, port = server.address
+    print(f"🤖 Bot listener running (webhook {host}:{port}{server.path})...")
+    try:
+        server.serve_forever()
+    finally:
+        server.stop()
+        print(f"[INFO] Webhook stats: {server.stats}")
+    return True
 
-            reply = format_early_breakout(
-                breakout_only,
-                keyword=keyword,
-                date=date,
-            )
 
-            send_message(bot_token, chat_id, reply)
+def main():
+    # python bot_listener.py [--webhook | --polling]
+    cfg = load_config()
+    tg = cfg["telegram"]
 
-        time.sleep(1)
+    bot_token = tg["bot_token"]
+    chat_id = tg["chat_id"]
+    ttl = float(tg.get("cache_ttl_minutes", CACHE_TTL_MINUTES)) * 60
+    extract = (cfg.get("youtube") or {}).get("browser_extract", "dom")
+
+    webhook = tg.get("webhook") or {}
+    use_webhook = "--webhook" in sys.argv or (webhook.get("enabled") and "--polling" not in sys.argv)
+
+    # Scrape jalan di worker (browser pool per thread); polling / webhook hanya enqueue
+    jobs = JobQueue(
+        lambda kw: handle_keyword(kw, max_age=ttl, extract=extract),
+        workers=int(tg.get("workers", WORKERS)),
+        ttl=ttl,
+        on_thread_exit=_close_browser,
+        name="bot-job",
+    )
+    handle_update = make_update_handler(bot_token, chat_id, jobs)
+
+    try:
+        if not (use_webhook and run_webhook(bot_token, handle_update, webhook)):
+            if webhook:
+                delete_webhook(bot_token)
+            run_polling(bot_token, handle_update)
+    except KeyboardInterrupt:
+        print("[INFO] Menunggu job yang tersisa...")
+    finally:
+        jobs.close()
+        get_sender(bot_token).flush(timeout=30)
+        print(f"[INFO] Job stats: {jobs.stats}")
+        print(f"[INFO] Telegram stats: {get_sender(bot_token).stats}")
 
 
 if __name__ == "__main__":
@@ -2,45 +2,65 @@
 
 from playwright.sync_api import sync_playwright
 
+# UA sama dengan HTTP client supaya fingerprint browser & HTTP mode konsisten
+from utils.http import USER_AGENT
+from browser.routing import install_routing
 
-def launch_browser(headless: bool = True):
-    p = sync_playwright().start()
 
-    browser = p.chromium.launch(
-        headless=headless,
-        args=[
-            "--disable-blink-features=AutomationControlled",
-            "--disable-infobars",
-            "--no-sandbox",
-            "--disable-dev-shm-usage",
-            "--disable-gpu",
-            "--disable-features=IsolateOrigins,site-per-process",
-        ],
-    )
+CHROMIUM_ARGS = [
+    "--disable-blink-features=AutomationControlled",
+    "--disable-infobars",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-features=IsolateOrigins,site-per-process",
+]
+
+STEALTH_SCRIPT = """
+    Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
+    Object.defineProperty(navigator, 'plugins', { get: () => [1,2,3,4,5] });
+    Object.defineProperty(navigator, 'languages', { get: () => ['en-US','en'] });
+    window.chrome = { runtime: {} };
+    """
+
+
+def start_chromium(p, headless: bool = True):
+    return p.chromium.launch(headless=headless, args=CHROMIUM_ARGS)
 
+
+def new_context(browser, routing=None, routing_stats=None):
+    """
+    Context dengan fingerprint yang sama untuk semua page (viewport, UA, locale).
+    `routing` = nama profile di browser.routing.ROUTING_PROFILES (atau dict) untuk
+    memblok gambar / font / iklan / tracking.
+    """
     context = browser.new_context(
         viewport={"width": 1280, "height": 900},
-        user_agent=(
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/120.0.0.0 Safari/537.36"
-        ),
+        user_agent=USER_AGENT,
         locale="en-US",
         timezone_id="America/New_York",
     )
 
-    page = context.new_page()
+    # --- STEALTH PATCH ---
+    context.add_init_script(STEALTH_SCRIPT)
+
+    if routing:
+        install_routing(context, routing, routing_stats)
 
+    return context
+
+
+def new_page(context):
+    page = context.new_page()
     page.set_default_timeout(20000)
+    return page
 
-    # --- STEALTH PATCH ---
-    page.add_init_script(
-        """
-        Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
-        Object.defineProperty(navigator, 'plugins', { get: () => [1,2,3,4,5] });
-        Object.defineProperty(navigator, 'languages', { get: () => ['en-US','en'] });
-        window.chrome = { runtime: {} };
-        """
-    )
+
+def launch_browser(headless: bool = True, routing=None):
+    p = sync_playwright().start()
+
+    browser = start_chromium(p, headless=headless)
+    context = new_context(browser, routing=routing)
+    page = new_page(context)
 
     return p, browser, page
@@ -0,0 +1,250 @@
+# browser/pool.py
+
+import atexit
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from playwright.sync_api import sync_playwright
+
+from browser.launcher import start_chromium, new_context, new_page
+from browser.routing import RoutingStats
+
+
+class _Slot:
+    def __init__(self, context, page, routing):
+        self.context = context
+        self.page = page
+        self.routing = routing
+        self.uses = 0
+        self.crashed = False
+        page.on("crash", self._on_crash)
+
+    def _on_crash(self, *_):
+        self.crashed = True
+
+
+class BrowserPool:
+    """
+    Satu Chromium yang hidup lama; page (+ context-nya) dipinjamkan per keyword
+    lalu dikembalikan dalam keadaan hangat.
+
+    - Health check (page belum close, tidak crash, bisa evaluate) setiap dipinjam
+    - Page di-recycle setelah `max_uses` pemakaian atau kalau crash / error
+    - Browser di-launch ulang otomatis kalau koneksinya putus
+    - Tiap page punya routing profile sendiri (lihat browser.routing); page
+      hanya dipakai ulang untuk profile yang sama
+
+    Playwright sync API terikat ke thread pembuatnya, jadi satu pool hanya
+    boleh dipakai dari satu thread. Pakai get_pool() untuk pool per thread.
+    """
+
+    def __init__(self, headless: bool = True, max_uses: int = 20, max_idle: int = 2):
+        self.headless = headless
+        self.max_uses = max_uses
+        self.max_idle = max_idle
+
+        self._p = None
+        self._browser = None
+        self._idle: list[_Slot] = []
+        self.routing_stats = RoutingStats()
+
+        self.stats = {
+            "launches": 0,
+            "pages_created": 0,
+            "pages_recycled": 0,
+            "leases": 0,
+            "launch_seconds": 0.0,
+        }
+
+    # --- lifecycle ---
+    def _ensure_browser(self):
+        if self._browser is not None and self._browser.is_connected():
+            return
+
+        if self._browser is not None:
+            print("[WARN] Browser pool: koneksi browser putus, launch ulang.")
+            self._idle.clear()
+
+        t0 = time.perf_counter()
+        if self._p is None:
+            self._p = sync_playwright().start()
+        self._browser = start_chromium(self._p, headless=self.headless)
+        self.stats["launches"] += 1
+        self.stats["launch_seconds"] += time.perf_counter() - t0
+
+    def close(self):
+        for slot in self._idle:
+            self._close_slot(slot)
+        self._idle.clear()
+
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+
+        if self._p is not None:
+            try:
+                self._p.stop()
+            except Exception:
+                pass
+            self._p = None
+
+    # --- slots ---
+    def _new_slot(self, routing) -> _Slot:
+        self._ensure_browser()
+        context = new_context(self._browser, routing=routing, routing_stats=self.routing_stats)
+        slot = _Slot(context, new_page(context), routing)
+        self.stats["pages_created"] += 1
+        return slot
+
+    def _close_slot(self, slot: _Slot):
+        try:
+            slot.context.close()
+        except Exception:
+            pass
+
+    def _healthy(self, slot: _Slot) -> bool:
+        if slot.crashed or slot.page.is_closed():
+            return False
+        try:
+            return slot.page.evaluate("1 + 1") == 2
+        except Exception:
+            return False
+
+    def _acquire(self, routing) -> _Slot:
+        self._ensure_browser()
+
+        for slot in reversed(self._idle):
+            if slot.routing != routing:
+                continue
+            self._idle.remove(slot)
+            if self._healthy(slot):
+                return slot
+            self._close_slot(slot)
+            self.stats["pages_recycled"] += 1
+            break
+
+        return self._new_slot(routing)
+
+    def _release(self, slot: _Slot, failed: bool):
+        slot.uses += 1
+
+        recycle = (
+            failed
+            or slot.crashed
+            or slot.uses >= self.max_uses
+            or len(self._idle) >= self.max_idle
+        )
+
+        if not recycle:
+            try:
+                # Kosongkan page supaya tidak ada script YouTube yang jalan di background
+                slot.page.goto("about:blank")
+            except Exception:
+                recycle = True
+
+        if recycle:
+            self._close_slot(slot)
+            self.stats["pages_recycled"] += 1
+        else:
+            self._idle.append(slot)
+
+    @contextmanager
+    def page(self, routing=None):
+        """
+        Pinjam page hangat:
+
+            with pool.page(routing="youtube") as page:
+                collect_youtube_trends(page, keyword)
+        """
+        slot = self._acquire(routing)
+        self.stats["leases"] += 1
+        failed = True
+        try:
+            yield slot.page
+            failed = False
+        finally:
+            self._release(slot, failed)
+
+
+# --- Pool per thread ---
+_local = threading.local()
+
+
+def get_pool(headless: bool = True) -> BrowserPool:
+    """
+    Pool milik thread saat ini (dibuat saat pertama dipanggil).
+    Pool di main thread ditutup otomatis saat proses selesai.
+    """
+    pools = getattr(_local, "pools", None)
+    if pools is None:
+        pools = _local.pools = {}
+
+    pool = pools.get(headless)
+    if pool is None:
+        pool = pools[headless] = BrowserPool(headless=headless)
+        if threading.current_thread() is threading.main_thread():
+            atexit.register(pool.close)
+
+    return pool
+
+
+def close_pool():
+    """
+    Tutup semua pool milik thread saat ini. Panggil dari thread yang sama
+    sebelum thread worker selesai.
+    """
+    pools = getattr(_local, "pools", None) or {}
+    for pool in pools.values():
+        pool.close()
+    pools.clear()
+
+
+def _benchmark(n: int = 5, url: str = "data:text/html,<title>bench</title><p>ok</p>"):
+    """
+    Sebelum vs sesudah pool untuk `n` keyword: launch_browser() per keyword
+    (pola runner / bot lama) dibanding satu BrowserPool. Default halaman lokal
+    (data: URL) supaya yang terukur biaya browser, bukan jaringan.
+    """
+    from browser.launcher import launch_browser
+
+    cold = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        p, browser, page = launch_browser(headless=True)
+        page.goto(url)
+        browser.close()
+        p.stop()
+        cold.append(time.perf_counter() - t0)
+
+    pool = BrowserPool(headless=True)
+    warm = []
+    try:
+        for _ in range(n):
+            t0 = time.perf_counter()
+            with pool.page() as page:
+                page.goto(url)
+            warm.append(time.perf_counter() - t0)
+    finally:
+        pool.close()
+
+    print(f"[INFO] {n} keyword, halaman {url[:40]}")
+    print(f"       launch per keyword : total {sum(cold):6.2f}s, rata-rata {sum(cold) / n:.2f}s")
+    print(
+        f"       browser pool       : total {sum(warm):6.2f}s, pertama {warm[0]:.2f}s, "
+        f"berikutnya rata-rata {sum(warm[1:]) / max(n - 1, 1):.2f}s"
+    )
+    print(f"[INFO] Pool stats: {pool.stats}")
+
+
+if __name__ == "__main__":
+    # python -m browser.pool bench [n] [url]
+    if len(sys.argv) >= 2 and sys.argv[1] == "bench":
+        _benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 5, *sys.argv[3:4])
+    else:
+        print("Usage: python -m browser.pool bench [n] [url]")
+        sys.exit(1)
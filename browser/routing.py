@@ -0,0 +1,129 @@
+# browser/routing.py
+
+import re
+import threading
+
+# Kita tidak pernah membaca pixel halaman (thumbnail diambil lewat download_file),
+# jadi gambar / video / font / iklan / tracking cukup di-abort.
+ROUTING_PROFILES = {
+    "youtube": {
+        "block_resource_types": ["image", "media", "font"],
+        "block_url_patterns": [
+            r"doubleclick\.net",
+            r"googlesyndication\.com",
+            r"googleadservices\.com",
+            r"google-analytics\.com",
+            r"googletagmanager\.com",
+            r"youtube\.com/pagead/",
+            r"youtube\.com/api/stats/",
+            r"youtube\.com/ptracking",
+            r"youtube\.com/generate_204",
+            r"youtube\.com/youtubei/v1/log_event",
+        ],
+        # Selalu lolos walaupun cocok dengan aturan blok di atas
+        "allow_url_patterns": [
+            r"youtube\.com/youtubei/v1/search",
+        ],
+    },
+    "tiktok": {
+        "block_resource_types": ["media", "font"],
+        "block_url_patterns": [
+            r"doubleclick\.net",
+            r"google-analytics\.com",
+            r"googletagmanager\.com",
+            r"analytics\.tiktok\.com",
+            r"mon\.tiktokv\.com",
+            r"mcs\.tiktokw?\.(com|us)",
+            r"/webcast/",
+        ],
+        # Cover image tetap dimuat: src <img> baru terisi setelah gambar di-load
+        "allow_url_patterns": [
+            r"/api/search/",
+            r"tiktokcdn",
+        ],
+    },
+}
+
+# Perkiraan kasar ukuran rata-rata per tipe resource, untuk hitung bytes yang dihemat
+_EST_BYTES = {
+    "image": 40_000,
+    "media": 500_000,
+    "font": 40_000,
+    "script": 60_000,
+    "xhr": 2_000,
+    "fetch": 2_000,
+}
+_EST_BYTES_DEFAULT = 5_000
+
+
+class RoutingStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = 0
+        self.blocked = 0
+        self.bytes_saved_est = 0
+        self.blocked_by_type: dict[str, int] = {}
+
+    def record(self, resource_type: str, blocked: bool):
+        with self._lock:
+            self.total += 1
+            if not blocked:
+                return
+            self.blocked += 1
+            self.bytes_saved_est += _EST_BYTES.get(resource_type, _EST_BYTES_DEFAULT)
+            self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.total,
+                "blocked": self.blocked,
+                "bytes_saved_est": self.bytes_saved_est,
+                "blocked_by_type": dict(self.blocked_by_type),
+            }
+
+
+def _compile(patterns: list[str]):
+    return re.compile("|".join(f"(?:{p})" for p in patterns)) if patterns else None
+
+
+def resolve_profile(profile: str | dict | None) -> dict | None:
+    if profile is None or isinstance(profile, dict):
+        return profile
+    if profile not in ROUTING_PROFILES:
+        raise ValueError(f"Routing profile tidak dikenal: {profile}")
+    return ROUTING_PROFILES[profile]
+
+
+def install_routing(context, profile: str | dict | None, stats: RoutingStats | None = None):
+    """
+    Pasang aturan blok di level context. `profile` bisa nama di ROUTING_PROFILES
+    atau dict dengan key yang sama (block_resource_types / block_url_patterns /
+    allow_url_patterns). Return RoutingStats untuk counter request yang diblok.
+    """
+    profile = resolve_profile(profile)
+    stats = stats or RoutingStats()
+    if not profile:
+        return stats
+
+    block_types = set(profile.get("block_resource_types") or [])
+    block_re = _compile(profile.get("block_url_patterns") or [])
+    allow_re = _compile(profile.get("allow_url_patterns") or [])
+
+    def handler(route):
+        request = route.request
+        url = request.url
+        resource_type = request.resource_type
+
+        blocked = not (allow_re and allow_re.search(url)) and (
+            resource_type in block_types or bool(block_re and block_re.search(url))
+        )
+        stats.record(resource_type, blocked)
+
+        if blocked:
+            route.abort()
+        else:
+            route.continue_()
+
+    context.route("**/*", handler)
+    return stats
@@ -3,7 +3,8 @@
 from urllib.parse import quote_plus
 from utils.time import utc_today, utc_now_iso
 from storage.visuals import prepare_screenshot_path
-from utils.downloader import download_file # <--- IMPORT BARU
+from storage.registry import get_registry
+from utils.download_queue import DownloadQueue
 import random
 import re
 
@@ -30,7 +31,12 @@ def _scroll(page, times=4):
         _human_wait(page, 900, 1600)
 # ------------------------------
 
-def collect_tiktok_trends(page, keyword: str, max_videos: int = 20):
+def collect_tiktok_trends(page, keyword: str, max_videos: int = 20, downloads=None, writer=None):
+    """
+    Cover di-download di background lewat `downloads` (DownloadQueue). Kalau None,
+    queue lokal dipakai dan ditunggu sebelum return. Kalau `writer`
+    (RecordWriter) diberikan, tiap record ditulis begitu cover-nya selesai.
+    """
     results = []
     search_url = f"https://www.tiktok.com/search?q={quote_plus(keyword)}"
     try:
@@ -58,6 +64,28 @@ def collect_tiktok_trends(page, keyword: str, max_videos: int = 20):
     current_date = utc_today()
     print(f"[INFO] Collecting {limit} TikToks (Real Covers)...")
 
+    own_queue = downloads is None
+    if own_queue:
+        downloads = DownloadQueue()
+
+    try:
+        _collect_cards(page, cards, limit, keyword, current_date, downloads, results, writer)
+    finally:
+        if own_queue:
+            downloads.close()
+
+    return results
+
+
+def _screenshot_setter(record: dict, writer=None):
+    def on_done(path):
+        record["screenshot"] = path
+        if writer:
+            writer.write(record)
+    return on_done
+
+
+def _collect_cards(page, cards, limit, keyword, current_date, downloads, results, writer=None):
     for i in range(limit):
         card = cards.nth(i)
         try: card.scroll_into_view_if_needed(timeout=1000)
@@ -83,7 +111,8 @@ def collect_tiktok_trends(page, keyword: str, max_videos: int = 20):
             views = _parse_views(views_text)
 
             # 2. LOGIKA DOWNLOAD COVER ASLI
-            saved_path = None
+            img_src = None
+            target_file = None
             try:
                 # Cari tag IMG di dalam link video
                 # Biasanya TikTok menaruh cover image di dalam link tersebut
@@ -94,14 +123,10 @@ def collect_tiktok_trends(page, keyword: str, max_videos: int = 20):
                     # Bersihkan nama file
                     safe_title = title if title else f"tiktok_{i}_{random.randint(100,999)}"
                     target_file = prepare_screenshot_path("tiktok", keyword, current_date, safe_title)
-                    
-                    success = download_file(img_src, target_file)
-                    if success:
-                        saved_path = target_file
             except Exception as e:
                 print(f"[WARN] Gagal ambil cover tiktok {i}: {e}")
 
-            results.append({
+            record = {
                 "platform": "tiktok",
                 "keyword": keyword,
                 "date": current_date,
@@ -112,11 +137,23 @@ def collect_tiktok_trends(page, keyword: str, max_videos: int = 20):
                 "views_text": views_text,
                 "upload_time": None,
                 "url": video_url,
-                "screenshot": saved_path, # Key tetap 'screenshot' agar kompatibel
-            })
+                "screenshot": None, # Key tetap 'screenshot' agar kompatibel, diisi saat download selesai
+            }
+            results.append(record)
+
+            # Video kanonik (ID dari URL); keyword lain di siklus ini cukup menambah link
+            registry = get_registry()
+            key, _ = registry.resolve("tiktok", record, keyword, i + 1)
+            on_done = _screenshot_setter(record, writer)
+
+            if img_src and target_file and key:
+                # Key blob pakai ID video (URL cover TikTok bertanda tangan & berubah-ubah)
+                registry.fetch_thumbnail("tiktok", key, [img_src], target_file, downloads, on_done)
+            elif img_src and target_file:
+                downloads.enqueue(img_src, target_file, on_done=on_done)
+            elif writer:
+                writer.write(record)
 
         except Exception as e:
             print(f"[WARN] TikTok skip index {i}: {e}")
-            continue
-
-    return results
\ No newline at end of file
+            continue
\ No newline at end of file
@@ -4,10 +4,25 @@ from time import sleep
 from urllib.parse import quote_plus
 from utils.time import utc_now_iso, utc_today
 from storage.visuals import prepare_screenshot_path
-from utils.downloader import download_file  # <--- IMPORT BARU
+from storage.registry import get_registry
+from utils.download_queue import DownloadQueue
+from collectors.youtube_data import (
+    extract_initial_data,
+    parse_search_cards,
+    find_continuation_token,
+    extract_innertube_config,
+    build_continuation_request,
+    follow_continuations,
+    merge_cards,
+)
+from utils.http import get_session
 import re
 import random
 
+YOUTUBE_BASE_URL = "https://www.youtube.com"
+# Cara ekstraksi saat memakai browser (config.yaml: youtube.browser_extract)
+BROWSER_EXTRACT_MODES = ("dom", "json")
+
 # --- Helper Functions (Sama) ---
 def parse_view_count(view_text: str | None) -> int | None:
     if not view_text: return None
@@ -33,25 +48,43 @@ def extract_video_id(url: str | None) -> str | None:
     return None
 # ------------------------------
 
-def collect_youtube_trends(page, keyword: str, max_videos: int = 30):
-    results = []
-    search_url = f"https://www.youtube.com/results?search_query={quote_plus(keyword)}"
+# Satu kali page.evaluate untuk semua kartu: tidak ada IPC per elemen / per kartu
+_EXTRACT_CARDS_JS = """
+(limit) => {
+    const text = (el) => (el && el.innerText ? el.innerText.trim() : null);
+    const cards = Array.from(document.querySelectorAll("ytd-video-renderer")).slice(0, limit);
+    return cards.map((card) => {
+        const titleEl = card.querySelector("#video-title");
+        const meta = card.querySelectorAll("#metadata-line span");
+        return {
+            title: text(titleEl) || "",
+            href: titleEl ? titleEl.getAttribute("href") : null,
+            channel: text(card.querySelector("#channel-name a")) || "",
+            views_text: meta.length > 0 ? text(meta[0]) : null,
+            upload_time: meta.length > 1 ? text(meta[1]) : null,
+        };
+    });
+}
+"""
+
+
+def _extract_cards_bulk(page, limit: int) -> list[dict]:
     try:
-        page.goto(search_url, timeout=60000)
-        page.wait_for_selector("ytd-video-renderer", timeout=60000)
+        cards = page.evaluate(_EXTRACT_CARDS_JS, limit)
     except Exception as e:
-        print(f"[ERROR] Gagal membuka YouTube: {e}")
+        print(f"[WARN] Bulk extract gagal: {e}")
         return []
+    # Kartu tanpa judul biasanya belum ter-render, anggap tidak valid
+    return [c for c in cards or [] if c.get("title")]
 
-    page.wait_for_timeout(random.randint(900, 1400))
-    _scroll_results(page, times=3)
 
+def _extract_cards_locator(page, limit: int) -> list[dict]:
+    """
+    Jalur lama (per kartu via locator). Dipakai kalau bulk extract kosong.
+    """
     video_cards = page.locator("ytd-video-renderer")
-    total = video_cards.count()
-    limit = min(total, max_videos)
-    current_date = utc_today()
-
-    print(f"[INFO] Collecting top {limit} videos (Real Thumbnails)...")
+    limit = min(video_cards.count(), limit)
+    cards = []
 
     for i in range(limit):
         card = video_cards.nth(i)
@@ -60,56 +93,303 @@ def collect_youtube_trends(page, keyword: str, max_videos: int = 30):
         page.wait_for_timeout(random.randint(200, 500))
 
         try:
-            # 1. Ambil Info Dasar
             title_el = card.locator("#video-title").first
-            title = title_el.inner_text().strip()
-            href = title_el.get_attribute("href")
-            video_url = f"https://www.youtube.com{href}" if href and href.startswith("/watch") else None
-            video_id = extract_video_id(video_url)
-            
-            channel = card.locator("#channel-name a").first.inner_text().strip()
             meta = card.locator("#metadata-line span")
-            raw_views = meta.nth(0).inner_text().strip() if meta.count() > 0 else None
-            upload_time = meta.nth(1).inner_text().strip() if meta.count() > 1 else None
-            views = parse_view_count(raw_views)
-
-            # 2. LOGIKA DOWNLOAD THUMBNAIL ASLI
-            saved_path = None
-            if video_id:
-                # Coba resolusi tertinggi dulu (maxres), kalau gagal fallback ke hq
-                thumb_url = f"https://i.ytimg.com/vi/{video_id}/maxresdefault.jpg"
-                
-                identifier = video_id
-                # Gunakan fungsi path yang sudah ada (ganti nama var jadi s_path biar konsisten)
-                target_file = prepare_screenshot_path("youtube", keyword, current_date, identifier)
-                
-                # Lakukan Download
-                success = download_file(thumb_url, target_file)
-                if not success:
-                    # Fallback ke HQ jika MaxRes tidak ada
-                    thumb_url_hq = f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"
-                    success = download_file(thumb_url_hq, target_file)
-                
-                if success:
-                    saved_path = target_file
-
-            results.append({
-                "platform": "youtube",
-                "keyword": keyword,
-                "date": current_date,
-                "collected_at": utc_now_iso(),
-                "title": title,
-                "channel": channel,
-                "views": views,
-                "views_text": raw_views,
-                "upload_time": upload_time,
-                "url": video_url,
-                "video_id": video_id,
-                "screenshot": saved_path, # GUI membaca key 'screenshot'
+            cards.append({
+                "title": title_el.inner_text().strip(),
+                "href": title_el.get_attribute("href"),
+                "channel": card.locator("#channel-name a").first.inner_text().strip(),
+                "views_text": meta.nth(0).inner_text().strip() if meta.count() > 0 else None,
+                "upload_time": meta.nth(1).inner_text().strip() if meta.count() > 1 else None,
             })
-
         except Exception as e:
             print(f"[WARN] Skip index {i}: {e}")
             continue
 
-    return results
\ No newline at end of file
+    return cards
+
+
+def _enqueue_thumbnail(record: dict, keyword: str, current_date: str, downloads, on_ready=None):
+    """
+    `on_ready(record)` dipanggil setelah 'screenshot' terisi (atau langsung kalau
+    tidak ada thumbnail), dipakai untuk streaming record ke RecordWriter.
+    """
+    video_id = record.get("video_id")
+    if not video_id:
+        if on_ready:
+            on_ready(record)
+        return
+
+    def on_done(path):
+        record["screenshot"] = path
+        if on_ready:
+            on_ready(record)
+
+    target_file = prepare_screenshot_path("youtube", keyword, current_date, video_id)
+    # Coba resolusi tertinggi dulu (maxres), kalau gagal fallback ke hq
+    urls = [
+        f"https://i.ytimg.com/vi/{video_id}/maxresdefault.jpg",
+        f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg",
+    ]
+    # Video yang sama dari keyword lain di siklus ini: blob-nya dipakai ulang
+    get_registry().fetch_thumbnail("youtube", video_id, urls, target_file, downloads, on_done)
+
+
+def _build_record(card: dict, keyword: str, current_date: str, downloads, on_ready=None, rank: int | None = None) -> dict:
+    href = card.get("href")
+    video_url = f"https://www.youtube.com{href}" if href and href.startswith("/watch") else None
+    video_id = extract_video_id(video_url)
+    raw_views = card.get("views_text")
+
+    record = {
+        "platform": "youtube",
+        "keyword": keyword,
+        "date": current_date,
+        "collected_at": utc_now_iso(),
+        "title": card.get("title") or "",
+        "channel": card.get("channel") or "",
+        "views": parse_view_count(raw_views),
+        "views_text": raw_views,
+        "upload_time": card.get("upload_time"),
+        "url": video_url,
+        "video_id": video_id,
+        "screenshot": None, # GUI membaca key 'screenshot', diisi saat download selesai
+    }
+
+    # Field tambahan yang hanya ada di jalur JSON
+    for key in ("duration", "duration_seconds", "badges"):
+        if key in card:
+            record[key] = card[key]
+
+    get_registry().resolve("youtube", record, keyword, rank)
+    _enqueue_thumbnail(record, keyword, current_date, downloads, on_ready)
+    return record
+
+
+def collect_youtube_trends(page, keyword: str, max_videos: int = 30, bulk: bool = True, downloads=None, writer=None):
+    search_url = f"https://www.youtube.com/results?search_query={quote_plus(keyword)}"
+    try:
+        page.goto(search_url, timeout=60000)
+        page.wait_for_selector("ytd-video-renderer", timeout=60000)
+    except Exception as e:
+        print(f"[ERROR] Gagal membuka YouTube: {e}")
+        return []
+
+    page.wait_for_timeout(random.randint(900, 1400))
+    _scroll_results(page, times=3)
+
+    cards = _extract_cards_bulk(page, max_videos) if bulk else []
+    if not cards:
+        if bulk:
+            print("[WARN] Bulk extract kosong, fallback ke locator per kartu.")
+        cards = _extract_cards_locator(page, max_videos)
+
+    return _build_records(cards, keyword, "from DOM", downloads, writer)
+
+
+def _build_records(cards: list[dict], keyword: str, source: str, downloads=None, writer=None) -> list[dict]:
+    """
+    Card -> record. Thumbnail di-download di background lewat `downloads`
+    (DownloadQueue); kalau None, queue lokal dipakai dan ditunggu sebelum return
+    sehingga 'screenshot' sudah terisi. Kalau `writer` (RecordWriter) diberikan,
+    tiap record ditulis begitu thumbnail-nya selesai.
+    """
+    own_queue = downloads is None
+    if own_queue:
+        downloads = DownloadQueue()
+
+    current_date = utc_today()
+    print(f"[INFO] Collecting top {len(cards)} videos {source} (Real Thumbnails)...")
+
+    results = []
+    try:
+        for i, card in enumerate(cards):
+            try:
+                on_ready = writer.write if writer else None
+                results.append(_build_record(card, keyword, current_date, downloads, on_ready, rank=i + 1))
+            except Exception as e:
+                print(f"[WARN] Skip index {i}: {e}")
+                continue
+    finally:
+        if own_queue:
+            downloads.close()
+
+    return results
+
+
+def _is_search_api_response(response) -> bool:
+    return "/youtubei/v1/search" in response.url and response.request.method == "POST"
+
+
+# Request continuation dari dalam halaman, memakai ytcfg (API key + client context) milik YouTube
+_FETCH_CONTINUATION_JS = """
+async (token) => {
+    const cfg = window.ytcfg;
+    if (!cfg || !cfg.get) return null;
+    const resp = await fetch(
+        "/youtubei/v1/search?prettyPrint=false&key=" + cfg.get("INNERTUBE_API_KEY"),
+        {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ context: cfg.get("INNERTUBE_CONTEXT"), continuation: token }),
+        },
+    );
+    return resp.ok ? await resp.json() : null;
+}
+"""
+
+
+def collect_youtube_trends_json(page, keyword: str, max_videos: int = 30, downloads=None, writer=None):
+    """
+    Ambil hasil search dari JSON (ytInitialData + respons youtubei/v1/search)
+    tanpa menunggu render / scroll. Halaman berikutnya diambil lewat token
+    continuation sampai max_videos terpenuhi. Fallback ke jalur DOM kalau JSON kosong.
+    """
+    search_url = f"https://www.youtube.com/results?search_query={quote_plus(keyword)}"
+    captured = []
+    on_response = captured.append
+    page.on("response", on_response)
+
+    try:
+        try:
+            page.goto(search_url, timeout=60000, wait_until="domcontentloaded")
+        except Exception as e:
+            print(f"[ERROR] Gagal membuka YouTube: {e}")
+            return []
+
+        data = None
+        try:
+            data = page.evaluate("() => window.ytInitialData || null")
+        except Exception:
+            pass
+        if not data:
+            data = extract_initial_data(page.content())
+
+        cards = parse_search_cards(data)
+        token = find_continuation_token(data)
+
+        # Continuation yang sempat dimuat halaman sendiri (kalau ada)
+        seen = {c["video_id"] for c in cards}
+        for response in captured:
+            if not _is_search_api_response(response):
+                continue
+            try:
+                extra = response.json()
+            except Exception:
+                continue
+            merge_cards(cards, parse_search_cards(extra), seen)
+            token = find_continuation_token(extra) or token
+    finally:
+        page.remove_listener("response", on_response)
+
+    if not cards:
+        print("[WARN] JSON search kosong, fallback ke DOM.")
+        return collect_youtube_trends(page, keyword, max_videos=max_videos, downloads=downloads, writer=writer)
+
+    def fetch_page(tok):
+        try:
+            return page.evaluate(_FETCH_CONTINUATION_JS, tok)
+        except Exception as e:
+            print(f"[WARN] Continuation gagal: {e}")
+            return None
+
+    cards = follow_continuations(cards, token, fetch_page, max_videos)
+    return _build_records(cards[:max_videos], keyword, "from JSON", downloads, writer)
+
+
+def collect_youtube_browser(page, keyword: str, max_videos: int = 30, extract: str = "dom", downloads=None, writer=None):
+    """
+    Jalur browser: "json" = ytInitialData + continuation (tanpa render / scroll),
+    "dom" = kartu yang ter-render. Jalur JSON fallback ke DOM kalau kosong.
+    """
+    if extract not in BROWSER_EXTRACT_MODES:
+        raise ValueError(f"browser_extract harus salah satu dari {BROWSER_EXTRACT_MODES}: {extract!r}")
+    if extract == "json":
+        return collect_youtube_trends_json(page, keyword, max_videos=max_videos, downloads=downloads, writer=writer)
+    return collect_youtube_trends(page, keyword, max_videos=max_videos, downloads=downloads, writer=writer)
+
+
+def fetch_search_page(keyword: str, session=None, base_url: str = YOUTUBE_BASE_URL) -> str | None:
+    session = session or get_session()
+    try:
+        resp = session.get(
+            f"{base_url}/results",
+            params={"search_query": keyword, "hl": "en", "gl": "US"},
+            # Lewati halaman consent (EU) supaya langsung dapat hasil search
+            cookies={"CONSENT": "YES+cb", "SOCS": "CAI"},
+            timeout=15,
+        )
+    except Exception as e:
+        print(f"[ERROR] HTTP search gagal: {e}")
+        return None
+
+    if resp.status_code != 200:
+        print(f"[WARN] HTTP search status {resp.status_code}")
+        return None
+
+    return resp.text
+
+
+def fetch_continuation_http(token: str, cfg: dict, session=None, base_url: str = YOUTUBE_BASE_URL) -> dict | None:
+    request = build_continuation_request(cfg, token)
+    if not request:
+        return None
+
+    params, body = request
+    session = session or get_session()
+    try:
+        resp = session.post(f"{base_url}/youtubei/v1/search", params=params, json=body, timeout=15)
+    except Exception as e:
+        print(f"[WARN] Continuation gagal: {e}")
+        return None
+
+    if resp.status_code != 200:
+        print(f"[WARN] Continuation status {resp.status_code}")
+        return None
+
+    try:
+        return resp.json()
+    except ValueError:
+        return None
+
+
+def collect_youtube_trends_http(
+    keyword: str,
+    max_videos: int = 30,
+    session=None,
+    base_url: str = YOUTUBE_BASE_URL,
+    fallback: bool = True,
+    downloads=None,
+    writer=None,
+    extract: str = "dom",
+):
+    """
+    Mode tanpa browser: 1x HTTP GET halaman search, parse ytInitialData, lalu
+    ikuti token continuation sampai max_videos terpenuhi.
+    Browser (pool) hanya dipakai kalau parsing gagal / hasil kosong, dengan
+    cara ekstraksi `extract` (lihat collect_youtube_browser).
+    """
+    html = fetch_search_page(keyword, session=session, base_url=base_url)
+    data = extract_initial_data(html)
+    cards = parse_search_cards(data)
+
+    if not cards:
+        if not fallback:
+            return []
+        print("[WARN] HTTP mode gagal parse, fallback ke browser.")
+        from browser.pool import get_pool
+
+        with get_pool(headless=True).page(routing="youtube") as page:
+            return collect_youtube_browser(
+                page, keyword, max_videos=max_videos, extract=extract, downloads=downloads, writer=writer
+            )
+
+    cfg = extract_innertube_config(html)
+    cards = follow_continuations(
+        cards,
+        find_continuation_token(data),
+        lambda tok: fetch_continuation_http(tok, cfg, session=session, base_url=base_url),
+        max_videos,
+    )
+
+    return _build_records(cards[:max_videos], keyword, "via HTTP", downloads, writer)
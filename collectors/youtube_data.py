@@ -0,0 +1,229 @@
+# collectors/youtube_data.py
+
+# Parser JSON hasil search YouTube (ytInitialData & respons youtubei/v1/search).
+# Murni fungsi data -> data, tanpa browser, jadi bisa dites dengan fixture JSON.
+
+import json
+import re
+
+_INITIAL_DATA_RE = re.compile(r"(?:var\s+ytInitialData|window\[\"ytInitialData\"\])\s*=\s*")
+
+
+def extract_initial_data(html: str) -> dict | None:
+    """
+    Ambil objek ytInitialData yang di-embed di HTML halaman /results.
+    """
+    if not html:
+        return None
+
+    match = _INITIAL_DATA_RE.search(html)
+    if not match:
+        return None
+
+    try:
+        data, _ = json.JSONDecoder().raw_decode(html, match.end())
+    except ValueError:
+        return None
+
+    return data if isinstance(data, dict) else None
+
+
+def _text(node: dict | None) -> str | None:
+    """
+    YouTube menyimpan teks sebagai {"simpleText": ...} atau {"runs": [{"text": ...}]}.
+    """
+    if not node:
+        return None
+    if "simpleText" in node:
+        return node["simpleText"].strip()
+    runs = node.get("runs")
+    if runs:
+        return "".join(r.get("text", "") for r in runs).strip()
+    return None
+
+
+def _iter_video_renderers(node):
+    # Walk rekursif: hasil search bisa ada di itemSection, shelf, atau continuation
+    if isinstance(node, dict):
+        video = node.get("videoRenderer")
+        if isinstance(video, dict) and video.get("videoId"):
+            yield video
+        for key, value in node.items():
+            if key != "videoRenderer":
+                yield from _iter_video_renderers(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _iter_video_renderers(item)
+
+
+def _badges(video: dict) -> list[str]:
+    labels = []
+    for badge in (video.get("badges") or []) + (video.get("ownerBadges") or []):
+        r = badge.get("metadataBadgeRenderer") or {}
+        label = r.get("label") or r.get("tooltip")
+        if label and label not in labels:
+            labels.append(label)
+    return labels
+
+
+def duration_to_seconds(text: str | None) -> int | None:
+    """
+    '12:34' -> 754, '1:02:03' -> 3723.
+    """
+    if not text or not re.fullmatch(r"\d+(:\d{1,2}){0,2}", text.strip()):
+        return None
+    seconds = 0
+    for part in text.strip().split(":"):
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+
+def parse_video_renderer(video: dict) -> dict:
+    """
+    videoRenderer -> card dict dengan key yang sama seperti hasil ekstraksi DOM
+    (+ video_id, duration, badges yang tidak terlihat di DOM).
+    """
+    video_id = video["videoId"]
+    duration = _text(video.get("lengthText"))
+
+    return {
+        "title": _text(video.get("title")) or "",
+        "href": f"/watch?v={video_id}",
+        "channel": _text(video.get("ownerText")) or _text(video.get("longBylineText")) or "",
+        "views_text": _text(video.get("viewCountText")) or _text(video.get("shortViewCountText")),
+        "upload_time": _text(video.get("publishedTimeText")),
+        "video_id": video_id,
+        "duration": duration,
+        "duration_seconds": duration_to_seconds(duration),
+        "badges": ", ".join(_badges(video)),
+    }
+
+
+def parse_search_cards(data: dict | None) -> list[dict]:
+    """
+    Semua video (urut sesuai tampilan) dari ytInitialData atau respons
+    youtubei/v1/search. Video duplikat (muncul di shelf lain) diabaikan.
+    """
+    if not data:
+        return []
+
+    cards = []
+    seen = set()
+    for video in _iter_video_renderers(data):
+        if video["videoId"] in seen:
+            continue
+        seen.add(video["videoId"])
+        cards.append(parse_video_renderer(video))
+
+    return cards
+
+
+def _iter_continuation_tokens(node):
+    if isinstance(node, dict):
+        item = node.get("continuationItemRenderer")
+        if isinstance(item, dict):
+            endpoint = item.get("continuationEndpoint") or {}
+            token = (endpoint.get("continuationCommand") or {}).get("token")
+            if token:
+                yield token
+        for value in node.values():
+            yield from _iter_continuation_tokens(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _iter_continuation_tokens(item)
+
+
+def find_continuation_token(data: dict | None) -> str | None:
+    """
+    Token halaman berikutnya (continuationItemRenderer terakhir) atau None
+    kalau hasil search sudah habis.
+    """
+    if not data:
+        return None
+    tokens = list(_iter_continuation_tokens(data))
+    return tokens[-1] if tokens else None
+
+
+_YTCFG_RE = re.compile(r"ytcfg\.set\(\s*(?=\{)")
+
+
+def extract_innertube_config(html: str) -> dict:
+    """
+    Gabungan semua ytcfg.set({...}) di HTML (API key, client context, dll).
+    """
+    cfg = {}
+    if not html:
+        return cfg
+
+    decoder = json.JSONDecoder()
+    for match in _YTCFG_RE.finditer(html):
+        try:
+            data, _ = decoder.raw_decode(html, match.end())
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            cfg.update(data)
+
+    return cfg
+
+
+def build_continuation_request(cfg: dict, token: str) -> tuple[dict, dict] | None:
+    """
+    (params, json body) untuk POST youtubei/v1/search dengan token continuation.
+    """
+    context = cfg.get("INNERTUBE_CONTEXT")
+    if not context:
+        version = cfg.get("INNERTUBE_CLIENT_VERSION")
+        if not version:
+            return None
+        context = {"client": {"clientName": "WEB", "clientVersion": version, "hl": "en", "gl": "US"}}
+
+    params = {"prettyPrint": "false"}
+    if cfg.get("INNERTUBE_API_KEY"):
+        params["key"] = cfg["INNERTUBE_API_KEY"]
+
+    return params, {"context": context, "continuation": token}
+
+
+def merge_cards(cards: list[dict], new_cards: list[dict], seen: set) -> int:
+    """
+    Tambahkan kartu yang belum ada (berdasarkan video_id). Return jumlah kartu baru.
+    """
+    added = 0
+    for card in new_cards:
+        if card["video_id"] in seen:
+            continue
+        seen.add(card["video_id"])
+        cards.append(card)
+        added += 1
+    return added
+
+
+def follow_continuations(
+    cards: list[dict],
+    token: str | None,
+    fetch_page,
+    max_videos: int,
+    max_pages: int = 20,
+) -> list[dict]:
+    """
+    Ikuti token continuation sampai jumlah kartu >= max_videos, token habis,
+    atau halaman tidak menambah video baru. `fetch_page(token)` -> JSON respons
+    youtubei/v1/search (atau None kalau gagal).
+    """
+    seen = {c["video_id"] for c in cards}
+    pages = 0
+
+    while token and len(cards) < max_videos and pages < max_pages:
+        data = fetch_page(token)
+        pages += 1
+        if not data:
+            break
+
+        added = merge_cards(cards, parse_search_cards(data), seen)
+        next_token = find_continuation_token(data)
+        if added == 0 and next_token == token:
+            break
+        token = next_token
+
+    return cards
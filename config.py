@@ -7,8 +7,15 @@ load_dotenv()  # load .env file
 
 API_KEY = os.getenv("YOUTUBE_API_KEY")
 
-if not API_KEY:
-    raise RuntimeError("YOUTUBE_API_KEY tidak ditemukan di file .env")
+
+def get_api_key() -> str:
+    """
+    API key YouTube. Error baru muncul saat key benar-benar dibutuhkan (enrichment),
+    bukan saat import, supaya run TikTok / compare saja tetap jalan tanpa .env.
+    """
+    if not API_KEY:
+        raise RuntimeError("YOUTUBE_API_KEY tidak ditemukan di file .env")
+    return API_KEY
 
 MAX_RESULTS = 20
 REGION_CODE = "ID"
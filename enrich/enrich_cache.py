@@ -0,0 +1,85 @@
+import threading
+import time
+
+from storage.db import ENRICH_PARTS, load_enrich_cache, save_enrich_cache
+
+# TTL per part (detik): statistik (viewCount dll) cepat berubah, snippet jarang
+FIELD_TTL = {
+    "statistics": 3 * 3600,
+    "snippet": 7 * 86400,
+}
+
+
+class EnrichCache:
+    """
+    Cache persisten (tabel enrich_cache di storage.db) untuk hasil videos.list:
+    video_id -> statistics / snippet + fetched_at per part. Hanya part yang basi
+    atau belum ada yang perlu diminta ke API.
+
+    Video yang tidak dikembalikan API (private / dihapus) ikut di-cache sebagai
+    None, supaya tidak diminta ulang sebelum TTL habis.
+    """
+
+    def __init__(self, ttl: dict[str, float] | None = None):
+        self.ttl = {**FIELD_TTL, **(ttl or {})}
+        self._lock = threading.Lock()
+        # Dihitung per (video, part)
+        self.stats = {"hits": 0, "misses": 0, "stale": 0}
+
+    def lookup(self, video_ids: list[str]) -> tuple[dict[str, dict], dict[str, set[str]]]:
+        """
+        Satu query untuk semua id. Return (part yang ada di cache per video, part
+        yang harus di-fetch per video). Part basi tetap dikembalikan sebagai
+        cadangan kalau request ke API gagal.
+        """
+        rows = load_enrich_cache(video_ids)
+        now = time.time()
+        known: dict[str, dict] = {}
+        need: dict[str, set[str]] = {}
+        counts = {"hits": 0, "misses": 0, "stale": 0}
+
+        for vid in video_ids:
+            row = rows.get(vid) or {}
+            for part in ENRICH_PARTS:
+                fetched_at = row.get(f"{part}_at")
+                if fetched_at is None:
+                    counts["misses"] += 1
+                    need.setdefault(vid, set()).add(part)
+                    continue
+                if now - fetched_at > self.ttl[part]:
+                    counts["stale"] += 1
+                    need.setdefault(vid, set()).add(part)
+                else:
+                    counts["hits"] += 1
+                known.setdefault(vid, {})[part] = row[part]
+
+        with self._lock:
+            for k, v in counts.items():
+                self.stats[k] += v
+        return known, need
+
+    def store(self, requested: dict[str, set[str]], items: dict[str, dict]):
+        """
+        Simpan hasil satu / beberapa request: `requested` = part yang diminta per video,
+        `items` = video_id -> item API (video yang tidak ada di items = tidak tersedia).
+        """
+        now = time.time()
+        rows = []
+        for vid, parts in requested.items():
+            item = items.get(vid)
+            for part in parts:
+                rows.append((vid, part, item.get(part) if item else None, now))
+        save_enrich_cache(rows)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_enrich_cache() -> EnrichCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EnrichCache()
+    return _cache
@@ -1,31 +1,234 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import httplib2
 from googleapiclient.discovery import build
-from config import API_KEY
+from googleapiclient.errors import HttpError
+
+from config import get_api_key
+from enrich.enrich_cache import EnrichCache, get_enrich_cache
+from storage.db import DB_PATH, exhaust_quota, quota_used, reserve_quota
+from storage.registry import get_registry
+
+BATCH_SIZE = 50            # batas id per request videos.list
+MAX_WORKERS = 4
+RETRIES = 4
+BACKOFF = 1.0              # detik, dikali 2 setiap percobaan (+ jitter)
+
+DAILY_QUOTA = 10_000       # unit per hari (default project YouTube Data API)
+QUOTA_RESERVE = 200        # berhenti sebelum quota benar-benar habis
+VIDEOS_LIST_COST = 1
+API_ENDPOINT = None        # mis. "http://127.0.0.1:8080/" untuk stub lokal
+HTTP_TIMEOUT = 30
+
+# Quota YouTube di-reset tengah malam waktu Pacific
+_QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+_RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+_QUOTA_REASONS = {"quotaExceeded", "dailyLimitExceeded"}
+
+_local = threading.local()
+_client_lock = threading.Lock()
+_yt = None
+
+
+class QuotaTracker:
+    """
+    Unit quota yang terpakai hari ini, disimpan di database (tabel api_quota)
+    supaya dihitung lintas proses (runner, bot, GUI) tanpa read-modify-write
+    file. reserve() menolak kalau sisa quota tinggal QUOTA_RESERVE unit.
+    """
+
+    API = "youtube_data"
+
+    def __init__(self, path: str = DB_PATH, limit: int = DAILY_QUOTA, reserve: int = QUOTA_RESERVE):
+        self.path = path
+        self.limit = limit
+        self.reserve_units = reserve
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(_QUOTA_TZ).strftime("%Y-%m-%d")
+
+    def reserve(self, cost: int) -> bool:
+        return reserve_quota(self.API, self._today(), cost, self.limit - self.reserve_units, path=self.path)
+
+    def exhaust(self):
+        # Server bilang quota habis: anggap habis sampai reset
+        exhaust_quota(self.API, self._today(), self.limit, path=self.path)
+
+    @property
+    def units(self) -> int:
+        return quota_used(self.API, self._today(), path=self.path)
+
+    def remaining(self) -> int:
+        return max(self.limit - self.units, 0)
+
 
-def enrich_youtube_records(records: list[dict]) -> list[dict]:
-    ids = [r["video_id"] for r in records if r.get("video_id")]
-    if not ids:
-        return records
+def _client():
+    """
+    Satu client untuk seluruh proses, dibangun dari discovery document statis
+    yang ikut terpasang bersama google-api-python-client (tanpa fetch discovery
+    ke jaringan, tanpa parse ulang per panggilan).
+    """
+    global _yt
+    if _yt is None:
+        with _client_lock:
+            if _yt is None:
+                options = {"api_endpoint": API_ENDPOINT} if API_ENDPOINT else None
+                _yt = build(
+                    "youtube", "v3",
+                    developerKey=get_api_key(),
+                    static_discovery=True,
+                    cache_discovery=False,
+                    client_options=options,
+                )
+    return _yt
 
-    yt = build("youtube", "v3", developerKey=API_KEY)
 
-    resp = yt.videos().list(
-        part="statistics,snippet",
-        id=",".join(ids[:50])
-    ).execute()
+def _http() -> httplib2.Http:
+    # httplib2.Http tidak thread-safe: client dipakai bersama, koneksi per thread worker
+    http = getattr(_local, "http", None)
+    if http is None:
+        http = _local.http = httplib2.Http(timeout=HTTP_TIMEOUT)
+    return http
 
-    api_map = {item["id"]: item for item in resp.get("items", [])}
 
+def _error_reason(e: HttpError) -> str | None:
+    try:
+        error = json.loads(e.content.decode("utf-8"))["error"]
+        return error["errors"][0]["reason"]
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+        return None
+
+
+def _sleep_backoff(attempt: int):
+    time.sleep(BACKOFF * (2 ** attempt) * (0.5 + random.random()))
+
+
+def _fetch_chunk(ids: list[str], parts: tuple[str, ...], quota: QuotaTracker, stop: threading.Event) -> dict[str, dict] | None:
+    """
+    Satu request videos.list (<= 50 id, hanya `parts` yang diminta) dengan retry.
+    `stop` di-set kalau quota habis, supaya chunk lain tidak mengirim request lagi.
+    Return None kalau gagal (hasilnya tidak boleh di-cache).
+    """
+    for attempt in range(RETRIES):
+        if stop.is_set() or not quota.reserve(VIDEOS_LIST_COST):
+            stop.set()
+            return None
+
+        try:
+            resp = _client().videos().list(
+                part=",".join(parts),
+                id=",".join(ids),
+                maxResults=BATCH_SIZE,
+            ).execute(http=_http())
+            return {item["id"]: item for item in resp.get("items", [])}
+        except HttpError as e:
+            status = e.resp.status
+            reason = _error_reason(e)
+            if status == 403 and reason in _QUOTA_REASONS:
+                print("[WARN] Quota YouTube API habis, enrichment dihentikan.")
+                quota.exhaust()
+                stop.set()
+                return None
+            if status in _RETRY_STATUS or (status == 403 and reason in _RATE_LIMIT_REASONS):
+                print(f"[WARN] YouTube API {status} {reason or ''}, coba lagi (percobaan {attempt + 1})")
+                _sleep_backoff(attempt)
+                continue
+            print(f"[ERROR] YouTube API {status} {reason or ''}: {e}")
+            return None
+        except (OSError, httplib2.HttpLib2Error) as e:
+            # mis. ServerNotFoundError (DNS) dari httplib2, bukan turunan OSError
+            print(f"[WARN] YouTube API koneksi gagal (percobaan {attempt + 1}): {e}")
+            _sleep_backoff(attempt)
+
+    return None
+
+
+def _api_fields(api: dict) -> dict:
+    stats = api.get("statistics") or {}
+    snippet = api.get("snippet") or {}
+    return {
+        "views_api": int(stats.get("viewCount", 0)),
+        "likes_api": int(stats.get("likeCount", 0)),
+        "comments_api": int(stats.get("commentCount", 0)),
+        "published_at": snippet.get("publishedAt"),
+    }
+
+
+def enrich_youtube_records(
+    records: list[dict],
+    quota: QuotaTracker | None = None,
+    cache: EnrichCache | None = None,
+) -> list[dict]:
+    """
+    Tambah views_api / likes_api / comments_api / published_at dari YouTube Data API.
+    Urutan sumber: registry siklus ini -> cache persisten (TTL per part) -> API,
+    jadi run ulang dalam TTL tidak memanggil API sama sekali.
+    """
+    # Video yang sudah di-enrich keyword lain di siklus ini tidak memakai quota lagi
+    registry = get_registry()
+    cached = {}
+    ids = []
     for r in records:
-        api = api_map.get(r.get("video_id"))
-        if not api:
+        vid = r.get("video_id")
+        if not vid or vid in cached or vid in ids:
             continue
+        fields = registry.get_enrichment("youtube", vid)
+        if fields is not None:
+            cached[vid] = fields
+        else:
+            ids.append(vid)
+
+    if ids:
+        cache = cache or get_enrich_cache()
+        known, need = cache.lookup(ids)
+
+        # Kelompokkan per kombinasi part yang basi, lalu pecah per 50 id
+        groups: dict[tuple[str, ...], list[str]] = {}
+        for vid, parts in need.items():
+            groups.setdefault(tuple(sorted(parts)), []).append(vid)
+        jobs = [
+            (parts, group[i:i + BATCH_SIZE])
+            for parts, group in groups.items()
+            for i in range(0, len(group), BATCH_SIZE)
+        ]
 
-        stats = api.get("statistics", {})
-        snippet = api.get("snippet", {})
+        fetched = 0
+        if jobs:
+            quota = quota or QuotaTracker()
+            stop = threading.Event()
+            with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(jobs)), thread_name_prefix="yt-api") as pool:
+                results = pool.map(lambda job: _fetch_chunk(job[1], job[0], quota, stop), jobs)
+                for (parts, chunk), items in zip(jobs, results):
+                    if items is None:
+                        continue  # gagal: pakai data cache lama kalau ada
+                    cache.store({vid: set(parts) for vid in chunk}, items)
+                    for vid in chunk:
+                        item = items.get(vid) or {}
+                        known.setdefault(vid, {}).update({p: item.get(p) for p in parts})
+                    fetched += len(chunk)
 
-        r["views_api"] = int(stats.get("viewCount", 0))
-        r["likes_api"] = int(stats.get("likeCount", 0))
-        r["comments_api"] = int(stats.get("commentCount", 0))
-        r["published_at"] = snippet.get("publishedAt")
+        for vid in ids:
+            item = known.get(vid)
+            if item and item.get("statistics") is not None:
+                cached[vid] = _api_fields(item)
+                registry.set_enrichment("youtube", vid, cached[vid])
+
+        print(
+            f"[INFO] Enrichment: {len(ids)} video, {fetched} di-refresh dari API ({len(jobs)} batch), "
+            f"cache {cache.stats}" + (f", sisa quota hari ini {quota.remaining()}" if jobs else "")
+        )
+
+    for r in records:
+        fields = cached.get(r.get("video_id"))
+        if fields:
+            r.update(fields)
 
     return records
@@ -1,6 +1,7 @@
 import sys
 import os
 import random
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                                QHBoxLayout, QLineEdit, QPushButton, QLabel, 
@@ -10,11 +11,10 @@ from PySide6.QtCore import Qt, QThread, Signal, QSize
 from PySide6.QtGui import QColor, QPalette, QPixmap, QFont, QClipboard, QIcon
 
 # --- Import Module Project ---
+# Browser + collector (playwright) di-import saat riset pertama dijalankan,
+# supaya jendela langsung tampil.
 try:
-    from browser.launcher import launch_browser
-    from collectors.youtube import collect_youtube_trends
-    from collectors.tiktok import collect_tiktok_trends
-    from storage.export_csv import export_to_csv
+    from storage.db import save_run
     from utils.time import utc_today
 except ImportError as e:
     print(f"Error Import: {e}")
@@ -64,6 +64,11 @@ STYLE_SHEET = """
 """
 
 # --- WORKER THREAD (BACKEND) ---
+# Playwright sync API terikat ke satu thread, jadi semua scraping GUI dijalankan
+# di satu thread khusus yang memegang browser pool (browser tetap hangat antar klik).
+BROWSER_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="browser")
+
+
 class ResearchWorker(QThread):
     finished = Signal(list)
     error = Signal(str)
@@ -72,14 +77,18 @@ class ResearchWorker(QThread):
         super().__init__()
         self.platform = platform
         self.keyword = keyword
-
-    def run(self):
-        try:
-            # Headless Mode AKTIF agar tidak mengganggu
-            p, browser, page = launch_browser(headless=True)
-            
-            data = []
-            if self.platform == "YouTube Shorts" or self.platform == "YouTube Long":
+        self.visual_summary = {}
+
+    def collect(self):
+        from browser.pool import get_pool
+        from collectors.youtube import collect_youtube_trends
+        from collectors.tiktok import collect_tiktok_trends
+        from storage.export_csv import export_to_csv
+
+        # Headless Mode AKTIF agar tidak mengganggu
+        is_youtube = self.platform == "YouTube Shorts" or self.platform == "YouTube Long"
+        with get_pool(headless=True).page(routing="youtube" if is_youtube else "tiktok") as page:
+            if is_youtube:
                 # Logic: Collector sama, nanti filter durasi di GUI simulation
                 data = collect_youtube_trends(page, self.keyword, max_videos=15)
                 out_dir = "data/youtube"
@@ -87,13 +96,24 @@ class ResearchWorker(QThread):
                 data = collect_tiktok_trends(page, self.keyword, max_videos=15)
                 out_dir = "data/tiktok"
 
-            if data:
-                safe_keyword = self.keyword.replace(" ", "-")
-                date = utc_today()
-                export_to_csv(data, out_dir, f"{date}_{safe_keyword}.csv")
+        if data:
+            safe_keyword = self.keyword.replace(" ", "-")
+            date = utc_today()
+            save_run("youtube" if is_youtube else "tiktok", safe_keyword, date, data)
+            export_to_csv(data, out_dir, f"{date}_{safe_keyword}.csv")
+
+            # Hitung fitur visual sekarang, supaya klik di detail tidak perlu olah gambar
+            try:
+                from analysis.thumb_features import save_keyword_features
+                self.visual_summary = save_keyword_features(data, out_dir, date, safe_keyword)
+            except Exception as e:
+                print(f"[WARN] Ekstraksi fitur thumbnail gagal: {e}")
+
+        return data
 
-            browser.close()
-            p.stop()
+    def run(self):
+        try:
+            data = BROWSER_EXECUTOR.submit(self.collect).result()
             self.finished.emit(data)
 
         except Exception as e:
@@ -168,6 +188,8 @@ class MamenDecisionApp(QMainWindow):
         
         # Simpan data
         self.current_data = []
+        self.visual_summary = {}
+        self.thumb_index = None  # index pHash, di-load saat pertama dibutuhkan
 
         # Central Widget
         central = QWidget()
@@ -275,6 +297,7 @@ class MamenDecisionApp(QMainWindow):
 
     def on_data_ready(self, data):
         self.current_data = data
+        self.visual_summary = self.worker.visual_summary
         self.btn_run.setEnabled(True)
         self.btn_run.setText("⚡ ANALISA TREND")
         self.lbl_status.setText(f"Selesai. {len(data)} tren ditemukan.")
@@ -305,6 +328,24 @@ class MamenDecisionApp(QMainWindow):
             if child.widget():
                 child.widget().deleteLater()
 
+    def find_similar_thumbnails(self, img_path, max_distance=10, limit=8):
+        if self.thumb_index is None:
+            try:
+                from analysis.thumb_hash import ThumbIndex
+                self.thumb_index = ThumbIndex.load() or False
+            except Exception as e:
+                print(f"[WARN] Index thumbnail tidak bisa di-load: {e}")
+                self.thumb_index = False
+
+        if not self.thumb_index:
+            return []
+
+        try:
+            return self.thumb_index.query(img_path, max_distance=max_distance, limit=limit)
+        except Exception as e:
+            print(f"[WARN] Query thumbnail mirip gagal: {e}")
+            return []
+
     def load_detail(self, item):
         # Ambil data dari index list
         idx = self.list_widget.row(item)
@@ -395,12 +436,39 @@ class MamenDecisionApp(QMainWindow):
             lbl_img.setPixmap(pix)
             lbl_img.setStyleSheet("border: 1px solid #444; margin-bottom: 10px;")
             lay_d.addWidget(lbl_img)
+
+            # Thumbnail lain yang mirip (dari index pHash: python -m analysis.thumb_hash)
+            similar = self.find_similar_thumbnails(img_path)
+            if similar:
+                lbl_sim = QLabel(f"Thumbnail mirip di riwayat: {len(similar)}")
+                lbl_sim.setObjectName("Meta")
+                lay_d.addWidget(lbl_sim)
+                row_sim = QHBoxLayout()
+                for sim_path, dist in similar[:4]:
+                    lbl_thumb = QLabel()
+                    lbl_thumb.setPixmap(QPixmap(sim_path).scaled(120, 68, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+                    lbl_thumb.setToolTip(f"{sim_path}\nJarak: {dist}")
+                    row_sim.addWidget(lbl_thumb)
+                row_sim.addStretch()
+                lay_d.addLayout(row_sim)
         
-        rule_text = (
-            "• <b>Ekspresi:</b> Wajah Zoom-in (Kaget/Serius)\n"
-            "• <b>Teks:</b> Maksimal 3 kata, Warna Kuning/Merah\n"
-            "• <b>Kontras:</b> High Contrast, Background Gelap"
-        )
+        # Agregat nyata dari thumbnail teratas keyword ini (dihitung saat scraping)
+        visual_lines = []
+        if self.visual_summary:
+            from analysis.thumb_features import describe_summary
+            visual_lines = describe_summary(self.visual_summary)
+
+        if visual_lines:
+            rule_text = (
+                f"Dari {self.visual_summary['count']} thumbnail teratas:<br>"
+                + "<br>".join(visual_lines)
+            )
+        else:
+            rule_text = (
+                "• <b>Ekspresi:</b> Wajah Zoom-in (Kaget/Serius)\n"
+                "• <b>Teks:</b> Maksimal 3 kata, Warna Kuning/Merah\n"
+                "• <b>Kontras:</b> High Contrast, Background Gelap"
+            )
         lbl_rule = QLabel(rule_text)
         lbl_rule.setObjectName("MainValue")
         lay_d.addWidget(lbl_rule)
@@ -427,4 +495,12 @@ if __name__ == "__main__":
     
     window = MamenDecisionApp()
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    code = app.exec()
+
+    # Tutup browser di thread pemiliknya (kalau sempat dibuka)
+    if "browser.pool" in sys.modules:
+        from browser.pool import close_pool
+
+        BROWSER_EXECUTOR.submit(close_pool).result()
+    BROWSER_EXECUTOR.shutdown()
+    sys.exit(code)
\ No newline at end of file
@@ -0,0 +1,279 @@
+# notifications/sender.py
+
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+TELEGRAM_API = "https://api.telegram.org"   # bisa diganti ke server lokal untuk tes
+
+# Batas Telegram Bot API: ~30 pesan/detik total, ~1 pesan/detik per chat,
+# 20 pesan/menit per grup. Dibuat sedikit di bawahnya.
+GLOBAL_RATE = 25.0
+GLOBAL_BURST = 25
+CHAT_RATE = 1.0
+CHAT_BURST = 3
+GROUP_RATE = 20 / 60
+
+RETRIES = 5
+BACKOFF = 1.0
+MAX_MESSAGE_LENGTH = 4096
+BATCH_SEPARATOR = "\n\n──────────\n\n"
+
+
+class TokenBucket:
+    """
+    Token bucket: `rate` token per detik, maksimal `capacity` token tersimpan.
+    pause() mengosongkan bucket sampai waktu tertentu (mis. retry_after dari 429).
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def delay(self) -> float:
+        """
+        Detik sampai satu token tersedia (0 = sekarang), tanpa mengambil token.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(self._paused_until - now, 0.0)
+            if self._tokens < 1:
+                wait = max(wait, (1 - self._tokens) / self.rate)
+            return wait
+
+    def available(self) -> int:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return 0 if now < self._paused_until else int(self._tokens)
+
+    def take(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= 1
+
+    def acquire(self):
+        # Blok sampai token tersedia
+        while True:
+            wait = self.delay()
+            if wait <= 0:
+                self.take()
+                return
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = min(self._tokens, 0.0)
+
+
+class TelegramSender:
+    """
+    Pengiriman pesan Telegram untuk seluruh proses:
+
+        sender = get_sender(bot_token)
+        sender.send(chat_id, text)              # sinkron, return True/False
+        sender.enqueue(chat_id, text)           # background, tidak blok
+        sender.flush()                          # tunggu antrian terkirim
+
+    - Satu requests.Session (keep-alive) per bot
+    - Rate limit token bucket global + per chat (grup lebih ketat)
+    - 429 -> tunggu `retry_after` dari Telegram lalu kirim ulang; 5xx / koneksi
+      putus -> backoff; error 4xx lain tidak diulang
+    - enqueue(batch=True): kalau beberapa pesan untuk chat yang sama menumpuk
+      (rate limit), digabung jadi satu pesan (maks. 4096 karakter)
+    """
+
+    def __init__(self, bot_token: str, api_base: str | None = None):
+        self.bot_token = bot_token
+        self.api_base = api_base or TELEGRAM_API
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._global = TokenBucket(GLOBAL_RATE, GLOBAL_BURST)
+        self._chats: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+        self._cond = threading.Condition()
+        self._queues: dict[str, deque] = {}
+        self._sending = 0
+        self._thread: threading.Thread | None = None
+
+        self.stats = {"sent": 0, "failed": 0, "retried": 0, "rate_limited": 0, "batched": 0}
+
+    # --- rate limit ---
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        key = str(chat_id)
+        with self._lock:
+            bucket = self._chats.get(key)
+            if bucket is None:
+                rate = GROUP_RATE if key.startswith("-") else CHAT_RATE
+                bucket = self._chats[key] = TokenBucket(rate, CHAT_BURST)
+            return bucket
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self.stats[key] += n
+
+    # --- HTTP ---
+    def _post(self, chat_id, text: str, parse_mode: str | None) -> bool:
+        url = f"{self.api_base}/bot{self.bot_token}/sendMessage"
+        payload = {"chat_id": chat_id, "text": text, "disable_web_page_preview": True}
+        if parse_mode:
+            payload["parse_mode"] = parse_mode
+
+        for attempt in range(RETRIES):
+            if attempt:
+                self._count("retried")
+            try:
+                resp = self.session.post(url, json=payload, timeout=10)
+            except requests.RequestException as e:
+                print(f"[WARN] Telegram koneksi gagal (percobaan {attempt + 1}): {e}")
+                time.sleep(BACKOFF * 2 ** attempt)
+                continue
+
+            if resp.status_code == 200:
+                self._count("sent")
+                return True
+
+            try:
+                body = resp.json()
+            except ValueError:
+                body = {}
+
+            if resp.status_code == 429:
+                retry_after = (body.get("parameters") or {}).get("retry_after") or resp.headers.get("Retry-After") or 1
+                retry_after = float(retry_after)
+                print(f"[WARN] Telegram 429, tunggu {retry_after:g}s")
+                self._count("rate_limited")
+                self._chat_bucket(chat_id).pause(retry_after)
+                time.sleep(retry_after)
+                continue
+            if resp.status_code >= 500:
+                print(f"[WARN] Telegram {resp.status_code}, coba lagi (percobaan {attempt + 1})")
+                time.sleep(BACKOFF * 2 ** attempt)
+                continue
+
+            print(f"[ERROR] Telegram {resp.status_code}: {body.get('description') or resp.text[:200]}")
+            break
+
+        self._count("failed")
+        return False
+
+    # --- API ---
+    def send(self, chat_id, text: str, parse_mode: str | None = "HTML") -> bool:
+        """
+        Kirim sekarang (menunggu rate limit). Return False kalau tetap gagal setelah retry.
+        """
+        self._chat_bucket(chat_id).acquire()
+        self._global.acquire()
+        return self._post(chat_id, text, parse_mode)
+
+    def enqueue(self, chat_id, text: str, parse_mode: str | None = "HTML", batch: bool = True):
+        """
+        Kirim di background. `batch=True`: boleh digabung dengan pesan lain
+        (batch=True juga) ke chat yang sama kalau sedang tertahan rate limit.
+        """
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._flusher, name="telegram-sender", daemon=True)
+                self._thread.start()
+            self._queues.setdefault(str(chat_id), deque()).append((chat_id, text, parse_mode, batch))
+            self._cond.notify()
+
+    def pending(self) -> int:
+        with self._cond:
+            return sum(len(q) for q in self._queues.values()) + self._sending
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Tunggu semua pesan di antrian terkirim. Return False kalau timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while any(self._queues.values()) or self._sending:
+                wait = None if deadline is None else deadline - time.monotonic()
+                if wait is not None and wait <= 0:
+                    return False
+                self._cond.wait(wait)
+        return True
+
+    # --- background ---
+    def _take_batch(self, queue: deque, pressure: bool) -> tuple:
+        chat_id, text, parse_mode, batch = queue.popleft()
+        merged = 1
+        while pressure and batch and queue:
+            _, next_text, next_mode, next_batch = queue[0]
+            combined = text + BATCH_SEPARATOR + next_text
+            if not next_batch or next_mode != parse_mode or len(combined) > MAX_MESSAGE_LENGTH:
+                break
+            queue.popleft()
+            text = combined
+            merged += 1
+        if merged > 1:
+            self._count("batched", merged)
+        return chat_id, text, parse_mode
+
+    def _flusher(self):
+        while True:
+            with self._cond:
+                while not any(self._queues.values()):
+                    self._cond.wait()
+
+                # Chat yang paling cepat boleh dikirimi
+                ready, wait = None, None
+                for key, queue in self._queues.items():
+                    if not queue:
+                        continue
+                    delay = self._chat_bucket(key).delay()
+                    if wait is None or delay < wait:
+                        ready, wait = key, delay
+                wait = max(wait, self._global.delay())
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+
+                # Digabung hanya kalau antrian chat ini melebihi token yang tersedia
+                bucket = self._chat_bucket(ready)
+                pressure = len(self._queues[ready]) > bucket.available()
+                bucket.take()
+                self._global.take()
+                chat_id, text, parse_mode = self._take_batch(self._queues[ready], pressure)
+                if not self._queues[ready]:
+                    del self._queues[ready]
+                self._sending += 1
+
+            try:
+                self._post(chat_id, text, parse_mode)
+            finally:
+                with self._cond:
+                    self._sending -= 1
+                    self._cond.notify_all()
+
+
+# --- Sender per bot token ---
+_senders: dict[str, TelegramSender] = {}
+_senders_lock = threading.Lock()
+
+
+def get_sender(bot_token: str) -> TelegramSender:
+    with _senders_lock:
+        sender = _senders.get(bot_token)
+        if sender is None:
+            sender = _senders[bot_token] = TelegramSender(bot_token)
+        return sender
@@ -1,20 +1,24 @@
 # notifications/telegram.py
 
-import requests
+from notifications.sender import get_sender
 
 
-def send_telegram_message(bot_token: str, chat_id: str, text: str):
+def send_telegram_message(bot_token: str, chat_id: str, text: str) -> bool:
     """
     Send a text message to Telegram using Bot API.
+    Rate limit + retry lewat notifications.sender; return False kalau tetap gagal.
     """
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+    return get_sender(bot_token).send(chat_id, text)
 
-    payload = {
-        "chat_id": chat_id,
-        "text": text,
-        "parse_mode": "HTML",
-        "disable_web_page_preview": True,
-    }
 
-    response = requests.post(url, json=payload, timeout=10)
-    response.raise_for_status()
+def queue_telegram_message(bot_token: str, chat_id: str, text: str):
+    """
+    Kirim di background (mis. ringkasan breakout banyak keyword sekaligus);
+    pesan yang menumpuk untuk chat yang sama digabung. Panggil
+    flush_telegram(bot_token) sebelum proses selesai.
+    """
+    get_sender(bot_token).enqueue(chat_id, text, batch=True)
+
+
+def flush_telegram(bot_token: str, timeout: float | None = None) -> bool:
+    return get_sender(bot_token).flush(timeout)
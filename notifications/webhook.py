@@ -0,0 +1,168 @@
+# notifications/webhook.py
+
+import hmac
+import json
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from notifications.sender import get_sender
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+MAX_BODY = 1024 * 1024
+RECENT_UPDATES = 1000  # update_id yang diingat untuk buang kiriman ulang
+
+
+class WebhookServer:
+    """
+    Server HTTP kecil (stdlib) untuk webhook Telegram:
+
+        server = WebhookServer(handle_update, secret, port=8081)
+        server.serve_forever()
+
+    - Hanya POST ke `path` dengan header X-Telegram-Bot-Api-Secret-Token yang
+      cocok yang diterima (lainnya 403 / 404)
+    - Update diteruskan ke `handle(update)` lalu langsung dibalas 200; handler
+      harus cepat (mis. hanya enqueue job)
+    - Telegram mengirim ulang update kalau tidak dapat 200; update_id yang sudah
+      diproses diabaikan
+
+    Telegram hanya mengirim ke HTTPS (port 443/80/88/8443), jadi server ini
+    dijalankan di belakang reverse proxy / tunnel yang meneruskan ke host:port lokal.
+    """
+
+    def __init__(self, handle, secret: str, host: str = "127.0.0.1", port: int = 8081, path: str = "/telegram"):
+        self.handle = handle
+        self.secret = secret
+        self.path = path
+        self._recent: deque[int] = deque(maxlen=RECENT_UPDATES)
+        self._seen: set[int] = set()
+        self._lock = threading.Lock()
+        self.stats = {"received": 0, "duplicate": 0, "rejected": 0, "failed": 0}
+        self._serving = False
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return self.httpd.server_address[:2]
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _first_time(self, update_id) -> bool:
+        if update_id is None:
+            return True
+        with self._lock:
+            if update_id in self._seen:
+                return False
+            if len(self._recent) == self._recent.maxlen:
+                self._seen.discard(self._recent[0])
+            self._recent.append(update_id)
+            self._seen.add(update_id)
+            return True
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, code: int, body: bytes = b""):
+                self.send_response(code)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self._reply(404)
+
+            def do_POST(self):
+                if self.path.split("?")[0] != server.path:
+                    self._reply(404)
+                    return
+                token = self.headers.get(SECRET_HEADER, "")
+                if not hmac.compare_digest(token.encode(), server.secret.encode()):
+                    server._count("rejected")
+                    self._reply(403)
+                    return
+
+                length = int(self.headers.get("Content-Length") or 0)
+                if length <= 0 or length > MAX_BODY:
+                    self._reply(400)
+                    return
+                try:
+                    update = json.loads(self.rfile.read(length))
+                except ValueError:
+                    self._reply(400)
+                    return
+                if not isinstance(update, dict):
+                    self._reply(400)
+                    return
+
+                if not server._first_time(update.get("update_id")):
+                    server._count("duplicate")
+                    self._reply(200)
+                    return
+
+                server._count("received")
+                try:
+                    server.handle(update)
+                except Exception as e:
+                    # Tetap 200: update yang bikin handler error tidak perlu dikirim ulang
+                    server._count("failed")
+                    print(f"[ERROR] Update {update.get('update_id')} gagal diproses: {e}")
+                self._reply(200)
+
+        return Handler
+
+    def serve_forever(self):
+        self._serving = True
+        self.httpd.serve_forever()
+
+    def start(self) -> threading.Thread:
+        # Jalan di background (mis. untuk tes); stop() untuk berhenti
+        self._serving = True
+        thread = threading.Thread(target=self.httpd.serve_forever, name="telegram-webhook", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        # shutdown() menunggu loop serve_forever selesai: kalau belum pernah jalan
+        # (mis. setWebhook ditolak) cukup tutup socket-nya
+        if self._serving:
+            self.httpd.shutdown()
+            self._serving = False
+        self.httpd.server_close()
+
+
+# --- Bot API: daftar / hapus webhook ---
+def _call(bot_token: str, method: str, payload: dict) -> bool:
+    sender = get_sender(bot_token)
+    try:
+        resp = sender.session.post(f"{sender.api_base}/bot{bot_token}/{method}", json=payload, timeout=15)
+        body = resp.json()
+    except (requests.RequestException, ValueError) as e:
+        print(f"[WARN] Telegram {method} gagal: {e}")
+        return False
+    if not body.get("ok"):
+        print(f"[WARN] Telegram {method} ditolak: {body.get('description')}")
+        return False
+    return True
+
+
+def set_webhook(bot_token: str, url: str, secret: str) -> bool:
+    return _call(bot_token, "setWebhook", {
+        "url": url,
+        "secret_token": secret,
+        "allowed_updates": ["message"],
+    })
+
+
+def delete_webhook(bot_token: str) -> bool:
+    # getUpdates ditolak Telegram (409) selama webhook masih terdaftar
+    return _call(bot_token, "deleteWebhook", {"drop_pending_updates": False})
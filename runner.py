@@ -2,106 +2,235 @@
 
 import os
 import sys
+import time
 
-from browser.launcher import launch_browser
-from collectors.youtube import collect_youtube_trends
-from collectors.tiktok import collect_tiktok_trends
-from storage.export_csv import export_to_csv
+from storage.db import save_run
+from storage.record_writer import RecordWriter
+from storage.registry import get_registry
 from utils.time import utc_today
 
-from analysis.trend_delta import compare_daily_csv, export_trend_delta
+from analysis.trend_delta import WINDOW_DAYS, compare_daily_csv, compare_incremental, compare_window, export_trend_delta
 from analysis.export_early_breakout import export_early_breakout_only
 
-from enrich.youtube_api_enricher import enrich_youtube_records
+# Collector (Playwright), enricher (googleapiclient) dan fitur thumbnail (Pillow)
+# di-import di dalam run_collect: run compare saja / TikTok saja tidak ikut
+# membayar import-nya. Cek: python -m utils.importtime
 
 
 DATA_DIR_YT = "data/youtube"
 DATA_DIR_TT = "data/tiktok"
+CONFIG_PATH = "config.yaml"
 
 
-def run_collect(platform: str, keyword: str) -> str:
-    p, browser, page = launch_browser(headless=True)
+class CollectError(RuntimeError):
+    """
+    Collect satu keyword gagal / kosong (record yang sempat terkumpul tetap di .partial).
+    """
+
+
+def load_config(path: str = CONFIG_PATH) -> dict:
+    if not os.path.exists(path):
+        return {}
+    import yaml
+
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def run_collect(platform: str, keyword: str, max_videos: int = 20, extract: str = "dom") -> str:
+    """
+    Collect satu keyword. `extract` = cara ekstraksi kalau YouTube jatuh ke
+    browser ("dom" / "json", config.yaml: youtube.browser_extract).
+    Return safe keyword; CollectError kalau collect gagal atau tidak ada data.
+    """
+    from storage.export_csv import export_to_csv
+    from analysis.thumb_features import save_keyword_features
+
     safe_keyword = keyword.replace(" ", "-")
     date = utc_today()
+    out_dir = DATA_DIR_YT if platform == "youtube" else DATA_DIR_TT
+    filename = f"{date}_{safe_keyword}.csv"
+
+    # Record ditulis begitu terkumpul; crash di tengah tetap menyisakan file .partial
+    writer = RecordWriter(os.path.join(out_dir, filename))
 
     try:
         if platform == "youtube":
-            data = collect_youtube_trends(page, keyword, max_videos=20)
-            data = enrich_youtube_records(data)
+            from collectors.youtube import collect_youtube_trends_http
 
-            out_dir = DATA_DIR_YT
+            # HTTP dulu; browser pool hanya dipakai sebagai fallback
+            data = collect_youtube_trends_http(keyword, max_videos=max_videos, writer=writer, extract=extract)
         elif platform == "tiktok":
-            data = collect_tiktok_trends(page, keyword, max_videos=20)
-            out_dir = DATA_DIR_TT
+            from browser.pool import get_pool
+            from collectors.tiktok import collect_tiktok_trends
+
+            with get_pool(headless=True).page(routing="tiktok") as page:
+                data = collect_tiktok_trends(page, keyword, max_videos=max_videos, writer=writer)
         else:
             raise ValueError("platform must be youtube or tiktok")
     except Exception as e:
         print(f"[ERROR] Collect failed: {e}")
-        browser.close()
-        p.stop()
-        return safe_keyword
+        # Record yang sudah terkumpul tetap ada di file .partial
+        if writer.count:
+            writer.abort()
+        else:
+            writer.discard()
+        raise CollectError(f"{platform} '{keyword}': {e}") from e
 
     if not data:
         print("[WARN] No data collected, skip export.")
-        browser.close()
-        p.stop()
-        return safe_keyword
+        writer.discard()
+        raise CollectError(f"{platform} '{keyword}': tidak ada data")
+
+    writer.close()
 
-    export_to_csv(
-        records=data,
-        output_dir=out_dir,
-        filename=f"{date}_{safe_keyword}.csv",
-    )
+    if platform == "youtube":
+        try:
+            from enrich.youtube_api_enricher import enrich_youtube_records
 
-    browser.close()
-    p.stop()
+            data = enrich_youtube_records(data)
+            # Tulis ulang dengan kolom views_api dkk (atomic replace)
+            export_to_csv(records=data, output_dir=out_dir, filename=filename)
+        except RuntimeError as e:
+            print(f"[WARN] Enrichment dilewati: {e}")
+
+    save_run(platform, safe_keyword, date, data)
+
+    # Fitur visual thumbnail (warna, kontras, dll) disimpan di samping CSV
+    try:
+        save_keyword_features(data, out_dir, date, safe_keyword)
+    except Exception as e:
+        print(f"[WARN] Ekstraksi fitur thumbnail gagal: {e}")
 
     return safe_keyword
 
 
-def run_compare(platform: str, safe_keyword: str):
-    data_dir = DATA_DIR_YT if platform == "youtube" else DATA_DIR_TT
+def alert_config(cfg: dict) -> dict | None:
+    """
+    Bagian `telegram` config.yaml kalau alert breakout aktif
+    (telegram.breakout_alerts: true + bot_token + chat_id), selain itu None.
+    """
+    tg = cfg.get("telegram") or {}
+    if tg.get("breakout_alerts") and tg.get("bot_token") and tg.get("chat_id"):
+        return tg
+    return None
+
 
-    if not os.path.exists(data_dir):
-        return
+def notify_breakouts(alerts: dict, platform: str, safe_keyword: str, date: str, records: list[dict]) -> bool:
+    """
+    Antrikan ringkasan early breakout ke Telegram (background, digabung per chat).
+    Pemanggil menunggu terkirim lewat flush_alerts().
+    """
+    breakout = [r for r in records if r.get("early_breakout")]
+    if not breakout:
+        return False
 
-    files = sorted(
-        f for f in os.listdir(data_dir)
-        if f.endswith(f"_{safe_keyword}.csv")
-        and not f.startswith("trend_")
-        and not f.startswith("early_breakout_")
-    )
+    from notifications.formatters import format_early_breakout
+    from notifications.telegram import queue_telegram_message
 
-    if len(files) < 2:
-        print("[INFO] Not enough history to compare.")
-        return
+    text = format_early_breakout(breakout, keyword=f"{safe_keyword} ({platform})", date=date)
+    queue_telegram_message(alerts["bot_token"], alerts["chat_id"], text)
+    return True
 
-    yesterday = os.path.join(data_dir, files[-2])
-    today = os.path.join(data_dir, files[-1])
 
-    delta_records = compare_daily_csv(today, yesterday)
+def flush_alerts(alerts: dict | None, timeout: float = 60) -> bool:
+    if not alerts or "notifications.telegram" not in sys.modules:
+        return True  # tidak ada alert yang diantrikan
+    from notifications.telegram import flush_telegram
 
-    trend_path = os.path.join(data_dir, f"trend_{files[-1]}")
+    if not flush_telegram(alerts["bot_token"], timeout):
+        print("[WARN] Alert Telegram belum terkirim semua (timeout)")
+        return False
+    return True
+
+
+def run_compare(platform: str, safe_keyword: str, window_days: int = 0, alerts: dict | None = None):
+    """
+    `window_days` > 0: metrik dihitung ulang dari N snapshot terakhir
+    (compare_window) alih-alih dari state per video. `alerts` (alert_config):
+    early breakout dikirim ke Telegram.
+    """
+    data_dir = DATA_DIR_YT if platform == "youtube" else DATA_DIR_TT
+
+    # State per video (hanya snapshot terbaru yang diproses); listing CSV hanya cadangan
+    if window_days > 0:
+        result = compare_window(platform, safe_keyword, window_days)
+    else:
+        result = compare_incremental(platform, safe_keyword)
+    if result:
+        delta_records, date = result
+        latest_name = f"{date}_{safe_keyword}.csv"
+    else:
+        if not os.path.exists(data_dir):
+            return
+
+        files = sorted(
+            f for f in os.listdir(data_dir)
+            if f.endswith(f"_{safe_keyword}.csv")
+            and not f.startswith("trend_")
+            and not f.startswith("early_breakout_")
+        )
+
+        if len(files) < 2:
+            print("[INFO] Not enough history to compare.")
+            return
+
+        yesterday = os.path.join(data_dir, files[-2])
+        today = os.path.join(data_dir, files[-1])
+
+        delta_records = compare_daily_csv(today, yesterday)
+        latest_name = files[-1]
+
+    trend_path = os.path.join(data_dir, f"trend_{latest_name}")
     export_trend_delta(delta_records, trend_path)
 
-    early_path = os.path.join(data_dir, f"early_breakout_{files[-1]}")
+    early_path = os.path.join(data_dir, f"early_breakout_{latest_name}")
     export_early_breakout_only(delta_records, early_path)
 
+    if alerts:
+        notify_breakouts(alerts, platform, safe_keyword, latest_name[:10], delta_records)
+
 
 def main():
     if len(sys.argv) < 3:
-        print('Usage: python runner.py <youtube|tiktok> "keyword"')
+        print('Usage: python runner.py <youtube|tiktok> [--compare-only] [--window] "keyword" ["keyword" ...]')
         sys.exit(1)
 
     platform = sys.argv[1].lower()
-    keyword = sys.argv[2]
+    compare_only = "--compare-only" in sys.argv[2:]
+    window_days = WINDOW_DAYS if "--window" in sys.argv[2:] else 0
+    keywords = [k for k in sys.argv[2:] if k not in ("--compare-only", "--window")]
 
     if platform not in ("youtube", "tiktok"):
         print("Platform must be: youtube or tiktok")
         sys.exit(1)
 
-    safe_keyword = run_collect(platform, keyword)
-    run_compare(platform, safe_keyword)
+    cfg = load_config()
+    extract = (cfg.get("youtube") or {}).get("browser_extract", "dom")
+    alerts = alert_config(cfg)
+
+    # Satu browser hangat untuk semua keyword di proses ini
+    for keyword in keywords:
+        t0 = time.perf_counter()
+        safe_keyword = keyword.replace(" ", "-")
+        if not compare_only:
+            try:
+                run_collect(platform, keyword, extract=extract)
+            except CollectError:
+                pass  # sudah dilaporkan; compare tetap jalan dengan riwayat yang ada
+        run_compare(platform, safe_keyword, window_days=window_days, alerts=alerts)
+        print(f"[INFO] '{keyword}' selesai dalam {time.perf_counter() - t0:.1f}s")
+
+    flush_alerts(alerts)
+
+    print(f"[INFO] Video registry stats: {get_registry().stats}")
+    if "browser.pool" in sys.modules:
+        # Hanya kalau browser benar-benar dipakai (TikTok / fallback YouTube)
+        from browser.pool import get_pool
+
+        pool = get_pool(headless=True)
+        print(f"[INFO] Browser pool stats: {pool.stats}")
+        print(f"[INFO] Routing stats: {pool.routing_stats.as_dict()}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,175 @@
+# scheduler.py
+
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+from runner import CONFIG_PATH, alert_config, flush_alerts, load_config, run_collect, run_compare
+from storage.db import last_run
+from storage.registry import get_registry
+from utils.job_queue import JobQueue
+from utils.time import iso_to_epoch
+
+# Default kalau bagian `schedule` tidak ada di config.yaml
+INTERVAL_MINUTES = 24 * 60
+JITTER_SECONDS = 300
+START_JITTER_SECONDS = 5
+CONCURRENCY = {"youtube": 3, "tiktok": 1}
+MAX_VIDEOS = 20
+PLATFORMS = ("youtube", "tiktok")
+
+
+def window_start(now: float, interval: float) -> float:
+    """
+    Awal window jadwal yang berisi `now`. Window sejajar epoch (UTC), jadi
+    interval 24 jam = per hari UTC, 6 jam = 00-06, 06-12, dst.
+    """
+    return now - (now % interval)
+
+
+def collected_in_window(platform: str, safe_keyword: str, since: float) -> bool:
+    # Sudah ada run collect (runner, bot, GUI, siklus sebelumnya) sejak awal window
+    run = last_run(platform, safe_keyword)
+    return bool(run and run["record_count"] and iso_to_epoch(run["started_at"]) >= since)
+
+
+def _close_browser():
+    # Dipanggil di thread worker sebelum berhenti: browser pool milik thread itu
+    if "browser.pool" in sys.modules:
+        from browser.pool import close_pool
+
+        close_pool()
+
+
+def _run_keyword(platform: str, keyword: str, max_videos: int, extract: str, start_jitter: float, alerts: dict | None) -> float:
+    # Jeda acak kecil supaya worker tidak menembak YouTube / TikTok di detik yang sama
+    time.sleep(random.uniform(0, start_jitter))
+    t0 = time.perf_counter()
+    # CollectError -> job gagal (dihitung "failed", keyword dicoba lagi siklus berikutnya)
+    safe_keyword = run_collect(platform, keyword, max_videos=max_videos, extract=extract)
+    run_compare(platform, safe_keyword, alerts=alerts)
+    elapsed = time.perf_counter() - t0
+    print(f"[INFO] {platform} '{keyword}' selesai dalam {elapsed:.1f}s")
+    return elapsed
+
+
+def run_cycle(cfg: dict, platforms=PLATFORMS, force: bool = False) -> dict:
+    """
+    Satu siklus: semua keyword config.yaml per platform, paralel dengan batas
+    `schedule.concurrency.<platform>` worker. Tiap worker memakai browser pool
+    sendiri untuk semua keyword yang dikerjakannya (Playwright terikat thread).
+    Keyword yang sudah di-collect di window ini dilewati (kecuali force=True).
+    Early breakout dikirim ke Telegram kalau telegram.breakout_alerts aktif.
+    """
+    schedule = cfg.get("schedule") or {}
+    interval = float(schedule.get("interval_minutes", INTERVAL_MINUTES)) * 60
+    start_jitter = float(schedule.get("start_jitter_seconds", START_JITTER_SECONDS))
+    concurrency = {**CONCURRENCY, **(schedule.get("concurrency") or {})}
+    since = window_start(time.time(), interval)
+    alerts = alert_config(cfg)
+    # Enrichment / tren dari siklus sebelumnya (hari yang sama) jangan dipakai ulang
+    get_registry().new_cycle()
+
+    t0 = time.perf_counter()
+    summary = {"run": 0, "skipped": 0, "failed": 0}
+    queues, jobs = [], []
+
+    for platform in platforms:
+        section = cfg.get(platform) or {}
+        keywords = list(dict.fromkeys(section.get("keywords") or []))
+        max_videos = int(section.get("max_videos", MAX_VIDEOS))
+        extract = section.get("browser_extract", "dom")
+
+        todo = []
+        for keyword in keywords:
+            if not force and collected_in_window(platform, keyword.replace(" ", "-"), since):
+                print(f"[INFO] Skip {platform} '{keyword}': sudah di-collect di window ini")
+                summary["skipped"] += 1
+            else:
+                todo.append(keyword)
+        if not todo:
+            continue
+
+        queue = JobQueue(
+            _run_keyword,
+            workers=max(1, min(int(concurrency.get(platform, 1)), len(todo))),
+            max_pending=len(todo),
+            ttl=0,
+            on_thread_exit=_close_browser,
+            name=f"sched-{platform}",
+        )
+        queues.append(queue)
+        for keyword in todo:
+            job, _, _ = queue.submit(f"{platform}:{keyword}", platform, keyword, max_videos, extract, start_jitter, alerts)
+            jobs.append(job)
+
+    # Worker selesai mengerjakan antrian lalu menutup browser-nya
+    for queue in queues:
+        queue.close()
+    flush_alerts(alerts)
+
+    busy = 0.0
+    for job in jobs:
+        if job.error is None:
+            summary["run"] += 1
+            busy += job.result
+        else:
+            summary["failed"] += 1
+
+    wall = time.perf_counter() - t0
+    print(
+        f"[OK] Siklus selesai: {summary['run']} keyword, {summary['skipped']} dilewati, "
+        f"{summary['failed']} gagal, {wall:.1f}s (total kerja keyword {busy:.1f}s)"
+    )
+    print(f"[INFO] Video registry stats: {get_registry().stats}")
+    return summary
+
+
+def run_daemon(cfg: dict, platforms=PLATFORMS):
+    """
+    Jalankan siklus di awal setiap window (+ jitter acak 0..jitter_seconds).
+    """
+    schedule = cfg.get("schedule") or {}
+    interval = float(schedule.get("interval_minutes", INTERVAL_MINUTES)) * 60
+    jitter = min(float(schedule.get("jitter_seconds", JITTER_SECONDS)), interval / 2)
+
+    print(f"[INFO] Scheduler jalan: interval {interval / 60:g} menit, jitter {jitter:g}s")
+    while True:
+        run_cycle(cfg, platforms)
+
+        next_run = window_start(time.time(), interval) + interval + random.uniform(0, jitter)
+        at = datetime.fromtimestamp(next_run, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[INFO] Siklus berikutnya {at} UTC")
+        time.sleep(max(next_run - time.time(), 0))
+
+
+def main():
+    # python scheduler.py [--once] [--force] [--config config.yaml] [youtube|tiktok ...]
+    args = sys.argv[1:]
+    once = "--once" in args
+    force = "--force" in args
+    path = CONFIG_PATH
+    if "--config" in args:
+        i = args.index("--config")
+        path = args[i + 1]
+        del args[i:i + 2]
+    platforms = tuple(a for a in args if not a.startswith("--")) or PLATFORMS
+
+    for platform in platforms:
+        if platform not in PLATFORMS:
+            print("Usage: python scheduler.py [--once] [--force] [--config config.yaml] [youtube|tiktok ...]")
+            sys.exit(1)
+
+    cfg = load_config(path)
+    try:
+        if once:
+            run_cycle(cfg, platforms, force=force)
+        else:
+            run_daemon(cfg, platforms)
+    except KeyboardInterrupt:
+        print("[INFO] Scheduler dihentikan.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+# storage/archive.py
+
+import csv
+import json
+import os
+import re
+import shutil
+import sys
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+ARCHIVE_DIR = "data/archive"
+
+# Kolom index per baris: keyword (kode string, nama file CSV), tanggal snapshot, rank
+INDEX_COLUMNS = {
+    "_keyword": np.int32,
+    "_date": "datetime64[D]",
+    "_rank": np.int32,
+}
+# Field record bertipe (array numpy); field lain disimpan sebagai kode int32 ke kamus string
+TYPED_COLUMNS = {
+    "collected_at": "datetime64[s]",
+    "views": np.int64,
+    "views_api": np.int64,
+}
+MISSING = -1  # nilai int / kode string yang kosong
+
+_CSV_NAME_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})_(.+)\.csv$")
+
+
+def archive_dir(platform: str, root: str = ARCHIVE_DIR) -> str:
+    return os.path.join(root, platform)
+
+
+def _to_int(value) -> int:
+    if value in (None, ""):
+        return MISSING
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return MISSING
+
+
+def _to_datetime(value) -> np.datetime64:
+    if not value:
+        return np.datetime64("NaT", "s")
+    try:
+        return np.datetime64(str(value).rstrip("Z"), "s")
+    except ValueError:
+        return np.datetime64("NaT", "s")
+
+
+def _dtype(name: str):
+    return INDEX_COLUMNS.get(name) or TYPED_COLUMNS.get(name) or np.int32
+
+
+def _missing(name: str):
+    return np.datetime64("NaT") if np.dtype(_dtype(name)).kind == "M" else MISSING
+
+
+def _present(arr: np.ndarray) -> np.ndarray:
+    return ~np.isnat(arr) if arr.dtype.kind == "M" else arr != MISSING
+
+
+def _format_value(name: str, value) -> str:
+    # Kebalikan dari encode: nilai sebagai string, sama seperti csv.DictReader
+    if name == "collected_at":
+        return "" if np.isnat(value) else f"{np.datetime_as_string(value, unit='s')}Z"
+    return "" if value == MISSING else str(int(value))
+
+
+class HistoryArchive:
+    """
+    Arsip kolom untuk snapshot lama satu platform:
+
+        data/archive/{platform}/
+            meta.json       kolom (urutan header CSV), jumlah baris
+            strings.json    kamus string bersama (kode int32 -> string)
+            _keyword.npy, _date.npy, _rank.npy           index snapshot
+            collected_at.npy, views.npy, views_api.npy   kolom bertipe
+            url.npy, title.npy, ...                      kode ke strings.json
+
+    Kolom dibuka dengan mmap, jadi scan seluruh riwayat hanya membaca kolom
+    yang dipakai (mis. views + collected_at), bukan ribuan file CSV.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.columns: list[str] = meta["columns"]
+        self.rows: int = meta["rows"]
+        self._arrays: dict[str, np.ndarray] = {}
+        self._strings: list[str] | None = None
+        self._codes: dict[str, int] | None = None
+
+    @classmethod
+    def open(cls, platform: str, root: str = ARCHIVE_DIR) -> "HistoryArchive | None":
+        path = archive_dir(platform, root)
+        if not os.path.exists(os.path.join(path, "meta.json")):
+            return None
+        return cls(path)
+
+    def __len__(self):
+        return self.rows
+
+    # --- akses kolom ---
+    def column(self, name: str) -> np.ndarray:
+        arr = self._arrays.get(name)
+        if arr is None:
+            arr = self._arrays[name] = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+        return arr
+
+    @property
+    def strings(self) -> list[str]:
+        if self._strings is None:
+            with open(os.path.join(self.path, "strings.json"), encoding="utf-8") as f:
+                self._strings = json.load(f)
+        return self._strings
+
+    def code(self, value: str) -> int:
+        if self._codes is None:
+            self._codes = {s: i for i, s in enumerate(self.strings)}
+        return self._codes.get(value, MISSING)
+
+    def decode(self, codes) -> list[str]:
+        strings = self.strings
+        return [strings[c] if c != MISSING else "" for c in np.asarray(codes).tolist()]
+
+    # --- query ---
+    def keyword_rows(self, keyword: str) -> np.ndarray:
+        code = self.code(keyword)
+        if code == MISSING:
+            return np.array([], dtype=np.int64)
+        return np.flatnonzero(self.column("_keyword") == code)
+
+    def dates(self, keyword: str) -> list[str]:
+        rows = self.keyword_rows(keyword)
+        return [str(d) for d in np.unique(self.column("_date")[rows])]
+
+    def scan(self, columns: list[str], keyword: str | None = None) -> dict[str, np.ndarray]:
+        """
+        Kolom (array) untuk seluruh riwayat, atau satu keyword saja.
+        Kolom string dikembalikan sebagai kode; pakai decode() kalau perlu teksnya.
+        """
+        rows = None if keyword is None else self.keyword_rows(keyword)
+        out = {}
+        for name in columns:
+            if name not in self.columns and name not in INDEX_COLUMNS:
+                continue
+            arr = self.column(name)
+            out[name] = np.asarray(arr if rows is None else arr[rows])
+        return out
+
+    def snapshot(self, keyword: str, date: str) -> list[dict]:
+        """
+        Record satu keyword + tanggal (urut rank), format sama dengan baris CSV.
+        """
+        rows = self.keyword_rows(keyword)
+        rows = rows[self.column("_date")[rows] == np.datetime64(date, "D")]
+        if not len(rows):
+            return []
+        rows = rows[np.argsort(self.column("_rank")[rows], kind="stable")]
+
+        values = {}
+        for name in self.columns:
+            arr = self.column(name)[rows]
+            if not _present(arr).any():
+                continue  # kolom dari snapshot lain
+            if name in TYPED_COLUMNS:
+                values[name] = [_format_value(name, v) for v in arr]
+            else:
+                values[name] = self.decode(arr)
+
+        names = list(values)
+        return [{name: values[name][i] for name in names} for i in range(len(rows))]
+
+
+# --- Compaction ---
+class _ColumnBuilder:
+    """
+    Kumpulkan kolom baru (list Python) di atas arsip lama, lalu tulis sekaligus.
+    """
+
+    def __init__(self, old: HistoryArchive | None):
+        self.old = old
+        self.columns: list[str] = list(old.columns) if old else []
+        self.strings: list[str] = list(old.strings) if old else []
+        self.codes = {s: i for i, s in enumerate(self.strings)}
+        self.new: dict[str, list] = {}
+        self.count = 0
+
+    def _code(self, value) -> int:
+        if value in (None, ""):
+            return MISSING
+        value = str(value)
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+    def add_snapshot(self, keyword: str, date: str, rows: list[dict]):
+        for rank, row in enumerate(rows, start=1):
+            values = {"_keyword": self._code(keyword), "_date": np.datetime64(date, "D"), "_rank": rank}
+            for name, value in row.items():
+                if name is None:
+                    continue  # sisa kolom dari baris CSV yang rusak
+                if name == "collected_at":
+                    values[name] = _to_datetime(value)
+                elif name in TYPED_COLUMNS:
+                    values[name] = _to_int(value)
+                else:
+                    values[name] = self._code(value)
+
+            for name, value in values.items():
+                if name not in self.columns and name not in INDEX_COLUMNS:
+                    self.columns.append(name)
+                col = self.new.get(name)
+                if col is None:
+                    col = self.new[name] = [_missing(name)] * self.count
+                col.append(value)
+
+            self.count += 1
+            for name, col in self.new.items():
+                if len(col) < self.count:
+                    col.append(_missing(name))
+
+    def _array(self, name: str) -> np.ndarray:
+        dtype = _dtype(name)
+        if name in self.new:
+            new = np.array(self.new[name], dtype=dtype)
+        else:
+            new = np.full(self.count, _missing(name), dtype=dtype)  # kolom lama, tidak ada di CSV baru
+
+        if not self.old:
+            return new
+        if name in self.old.columns or name in INDEX_COLUMNS:
+            old = np.asarray(self.old.column(name))
+        else:
+            old = np.full(len(self.old), _missing(name), dtype=dtype)
+        return np.concatenate([old, new])
+
+    def write(self, path: str):
+        tmp = path + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        rows = (len(self.old) if self.old else 0) + self.count
+        for name in [*INDEX_COLUMNS, *self.columns]:
+            np.save(os.path.join(tmp, f"{name}.npy"), self._array(name))
+        with open(os.path.join(tmp, "strings.json"), "w", encoding="utf-8") as f:
+            json.dump(self.strings, f, ensure_ascii=False)
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"columns": self.columns, "rows": rows}, f)
+
+        # Ganti arsip lama (file mmap lama tetap valid sampai ditutup)
+        old = path + ".old"
+        shutil.rmtree(old, ignore_errors=True)
+        if os.path.exists(path):
+            os.replace(path, old)
+        os.replace(tmp, path)
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def compact_platform(
+    platform: str,
+    data_root: str = "data",
+    root: str = ARCHIVE_DIR,
+    keep_days: int = 30,
+    remove: bool = False,
+) -> int:
+    """
+    Gabungkan snapshot CSV data/{platform}/{date}_{keyword}.csv yang lebih tua
+    dari `keep_days` ke arsip kolom. Snapshot yang sudah ada di arsip dilewati.
+    `remove=True` menghapus CSV yang sudah masuk arsip.
+    Return jumlah snapshot baru yang diarsipkan.
+    """
+    platform_dir = os.path.join(data_root, platform)
+    if not os.path.isdir(platform_dir):
+        return 0
+
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=keep_days)).strftime("%Y-%m-%d")
+    old = HistoryArchive.open(platform, root)
+
+    archived = set()
+    if old and len(old):
+        cols = old.scan(["_keyword", "_date"])
+        for kw, d in set(zip(cols["_keyword"].tolist(), cols["_date"].astype(str).tolist())):
+            archived.add((old.strings[kw], d))
+
+    builder = _ColumnBuilder(old)
+    done = []
+    added = 0
+    for name in sorted(os.listdir(platform_dir)):
+        m = _CSV_NAME_RE.match(name)
+        if not m:
+            continue  # trend_*, early_breakout_*, features_*, dll
+        date, keyword = m.groups()
+        if date >= cutoff:
+            continue
+
+        path = os.path.join(platform_dir, name)
+        if (keyword, date) not in archived:
+            with open(path, newline="", encoding="utf-8") as f:
+                builder.add_snapshot(keyword, date, list(csv.DictReader(f, delimiter=";")))
+            archived.add((keyword, date))
+            added += 1
+        done.append(path)
+
+    if builder.count:
+        builder.write(archive_dir(platform, root))
+
+    if remove:
+        for path in done:
+            os.remove(path)
+
+    print(f"[OK] Archive {platform}: {added} snapshot baru ({builder.count} baris), {len(done)} CSV diproses")
+    return added
+
+
+def compact_all(data_root: str = "data", root: str = ARCHIVE_DIR, keep_days: int = 30, remove: bool = False) -> int:
+    total = 0
+    for platform in ("youtube", "tiktok"):
+        total += compact_platform(platform, data_root, root, keep_days=keep_days, remove=remove)
+    return total
+
+
+if __name__ == "__main__":
+    # python -m storage.archive compact [--days N] [--remove] [data_root]
+    args = sys.argv[1:]
+    if not args or args[0] != "compact":
+        print("Usage: python -m storage.archive compact [--days N] [--remove] [data_root]")
+        sys.exit(1)
+
+    days = 30
+    remove = "--remove" in args
+    rest = [a for a in args[1:] if a != "--remove"]
+    if "--days" in rest:
+        i = rest.index("--days")
+        days = int(rest[i + 1])
+        del rest[i:i + 2]
+
+    compact_all(rest[0] if rest else "data", keep_days=days, remove=remove)
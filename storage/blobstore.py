@@ -0,0 +1,181 @@
+# storage/blobstore.py
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+from utils.downloader import download_file
+
+BLOB_DIR = "storage/blobs"
+# Thumbnail jarang berubah; setelah umur ini di-download ulang dan dicek hash-nya
+MAX_AGE_DAYS = 7
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class BlobStore:
+    """
+    Penyimpanan thumbnail berbasis isi (content-addressed):
+
+        storage/blobs/ab/abcdef....jpg     <- satu file per isi unik (sha256)
+        storage/blobs/index.jsonl          <- key (video_id / URL) -> sha256
+
+    Setiap thumbnail unik hanya di-download sekali (atau ulang kalau sudah lebih
+    tua dari max_age_days, dan blob baru hanya disimpan kalau hash-nya berubah).
+    Struktur folder lama storage/screenshots/{date}/{platform}/{keyword}/ tetap
+    ada, isinya hard link ke blob (fallback copy kalau hard link tidak bisa).
+    """
+
+    def __init__(self, root: str = BLOB_DIR, max_age_days: float | None = MAX_AGE_DAYS):
+        self.root = root
+        self.max_age = max_age_days * 86400 if max_age_days is not None else None
+        self._index_path = os.path.join(root, "index.jsonl")
+        self._index: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._key_locks: dict[str, threading.Lock] = {}
+        self.stats = {"hits": 0, "downloads": 0, "unchanged": 0, "new_blobs": 0, "failed": 0}
+
+        os.makedirs(root, exist_ok=True)
+        self._load_index()
+
+    # --- index (append-only, entry terakhir untuk key yang sama yang berlaku) ---
+    def _load_index(self):
+        if not os.path.exists(self._index_path):
+            return
+        with open(self._index_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # baris terakhir bisa terpotong kalau proses mati
+                self._index[entry["key"]] = entry
+
+    def _put_index(self, entry: dict):
+        with self._lock:
+            self._index[entry["key"]] = entry
+            with open(self._index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def _bump(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            return self._index.get(key)
+
+    def blob_path(self, sha256: str, ext: str = ".jpg") -> str:
+        return os.path.join(self.root, sha256[:2], f"{sha256}{ext}")
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    # --- link ke layout folder lama ---
+    @staticmethod
+    def _link(blob: str, link_path: str):
+        try:
+            if os.path.samefile(blob, link_path):
+                return
+        except OSError:
+            pass
+
+        tmp = f"{link_path}.{threading.get_ident()}.lnk"
+        try:
+            os.link(blob, tmp)
+        except OSError:
+            shutil.copyfile(blob, tmp)
+        os.replace(tmp, link_path)
+
+    @staticmethod
+    def _discard(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _is_fresh(self, entry: dict) -> bool:
+        return self.max_age is None or time.time() - entry.get("fetched_at", 0) < self.max_age
+
+    # --- API utama ---
+    def fetch(self, key: str, urls: list[str], link_path: str, download=download_file) -> str | None:
+        """
+        Pastikan blob untuk `key` ada, lalu tautkan ke `link_path`.
+        `urls` dicoba berurutan. Return link_path, atau None kalau gagal.
+        """
+        ext = os.path.splitext(link_path)[1] or ".jpg"
+
+        with self._key_lock(key):
+            entry = self.get(key)
+            if entry:
+                blob = self.blob_path(entry["sha256"], entry.get("ext", ext))
+                if os.path.exists(blob) and self._is_fresh(entry):
+                    self._bump("hits")
+                    self._link(blob, link_path)
+                    return link_path
+
+            tmp = os.path.join(self.root, f"incoming-{threading.get_ident()}{ext}")
+            self._discard(tmp)
+
+            source = None
+            for url in urls:
+                if url and download(url, tmp):
+                    source = url
+                    break
+            self._discard(tmp + ".meta")
+
+            if not source:
+                self._bump("failed")
+                # Blob lama (walau sudah tua) masih lebih baik daripada tidak ada
+                if entry and os.path.exists(self.blob_path(entry["sha256"], entry.get("ext", ext))):
+                    self._link(self.blob_path(entry["sha256"], entry.get("ext", ext)), link_path)
+                    return link_path
+                return None
+
+            self._bump("downloads")
+            sha = file_sha256(tmp)
+            blob = self.blob_path(sha, ext)
+
+            if os.path.exists(blob):
+                os.remove(tmp)
+                if entry and entry["sha256"] == sha:
+                    self._bump("unchanged")
+            else:
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                os.replace(tmp, blob)
+                self._bump("new_blobs")
+
+            self._put_index({
+                "key": key,
+                "sha256": sha,
+                "ext": ext,
+                "url": source,
+                "fetched_at": int(time.time()),
+            })
+            self._link(blob, link_path)
+            return link_path
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> BlobStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = BlobStore()
+    return _store
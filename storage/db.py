@@ -0,0 +1,523 @@
+# storage/db.py
+
+import csv
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
+
+from utils.time import utc_now_iso
+
+DB_PATH = "data/trends.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    platform TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    date TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    record_count INTEGER NOT NULL DEFAULT 0,
+    source TEXT NOT NULL DEFAULT 'collect'
+);
+
+CREATE TABLE IF NOT EXISTS videos (
+    platform TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    url TEXT,
+    title TEXT,
+    channel TEXT,
+    first_seen TEXT,
+    last_seen TEXT,
+    PRIMARY KEY (platform, video_id)
+);
+
+CREATE TABLE IF NOT EXISTS observations (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    platform TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    date TEXT NOT NULL,
+    collected_at TEXT,
+    rank INTEGER,
+    views INTEGER,
+    views_api INTEGER,
+    record TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS trend_state (
+    platform TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    last_views INTEGER,
+    last_ts TEXT,
+    velocity REAL,
+    velocity_ewma REAL,
+    peak_views INTEGER,
+    first_seen TEXT,
+    trend_since TEXT,
+    observations INTEGER NOT NULL DEFAULT 0,
+    breakout INTEGER NOT NULL DEFAULT 0,
+    prev TEXT,
+    PRIMARY KEY (platform, video_id)
+);
+
+CREATE TABLE IF NOT EXISTS enrich_cache (
+    video_id TEXT PRIMARY KEY,
+    statistics TEXT,
+    statistics_at REAL,
+    snippet TEXT,
+    snippet_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS api_quota (
+    api TEXT NOT NULL,
+    day TEXT NOT NULL,
+    units INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (api, day)
+);
+
+CREATE INDEX IF NOT EXISTS idx_obs_video ON observations(platform, video_id, collected_at);
+CREATE INDEX IF NOT EXISTS idx_obs_keyword ON observations(keyword, date);
+CREATE INDEX IF NOT EXISTS idx_runs_keyword ON runs(platform, keyword, date);
+"""
+
+_local = threading.local()
+
+_TIKTOK_ID_RE = re.compile(r"/video/(\d+)")
+_YOUTUBE_HOSTS = ("youtube.com", "www.youtube.com", "m.youtube.com", "music.youtube.com")
+
+
+def connect(path: str = DB_PATH) -> sqlite3.Connection:
+    """
+    Koneksi per thread (sqlite3 tidak boleh dipakai lintas thread), WAL mode
+    supaya pembaca (GUI / bot) tidak terblok saat collector menulis.
+    """
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+
+    conn = conns.get(path)
+    if conn is None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = sqlite3.connect(path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        conns[path] = conn
+
+    return conn
+
+
+def normalize_url(url: str) -> str:
+    """
+    URL tanpa query / fragment / slash akhir, host huruf kecil
+    (link TikTok yang sama sering beda di ?is_from_webapp=... dll).
+    Parameter v di youtube.com/watch dipertahankan: itu ID videonya.
+    """
+    parts = urlsplit(url.strip())
+    host, path = parts.netloc.lower(), parts.path.rstrip("/")
+    query = ""
+    if host in _YOUTUBE_HOSTS and path == "/watch":
+        v = parse_qs(parts.query).get("v")
+        query = urlencode({"v": v[0]}) if v else ""
+    return urlunsplit((parts.scheme.lower() or "https", host, path, query, ""))
+
+
+def _youtube_id(url: str) -> str | None:
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host == "youtu.be":
+        return parts.path.strip("/").split("/")[0] or None
+    if host in _YOUTUBE_HOSTS:
+        if parts.path.rstrip("/") == "/watch":
+            return (parse_qs(parts.query).get("v") or [None])[0]
+        if parts.path.startswith("/shorts/"):
+            return parts.path.split("/")[2] or None
+    return None
+
+
+def video_key(record: dict) -> str | None:
+    """
+    ID stabil per video: video_id YouTube, ID dari URL YouTube
+    (watch?v=, youtu.be, shorts), ID numerik dari URL TikTok,
+    atau URL yang dinormalisasi kalau tidak ada ID.
+    """
+    if record.get("video_id"):
+        return str(record["video_id"])
+
+    url = record.get("url")
+    if not url:
+        return None
+
+    m = _TIKTOK_ID_RE.search(url)
+    if m:
+        return m.group(1)
+    return _youtube_id(url) or normalize_url(url)
+
+
+def _to_int(value) -> int | None:
+    if value in (None, ""):
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def save_run(
+    platform: str,
+    keyword: str,
+    date: str,
+    records: list[dict],
+    source: str = "collect",
+    path: str = DB_PATH,
+) -> int | None:
+    """
+    Simpan satu snapshot (hasil satu keyword di satu tanggal) dalam satu transaksi.
+    `keyword` = safe keyword (spasi -> '-'), sama dengan nama file CSV.
+    """
+    if not records:
+        return None
+
+    conn = connect(path)
+    now = utc_now_iso()
+
+    obs_rows = []
+    video_rows = []
+    for rank, r in enumerate(records, start=1):
+        key = video_key(r)
+        if not key:
+            continue
+        seen_at = r.get("collected_at") or now
+        obs_rows.append((
+            platform, key, keyword, date, r.get("collected_at"), rank,
+            _to_int(r.get("views")), _to_int(r.get("views_api")),
+            json.dumps(r, ensure_ascii=False, default=str),
+        ))
+        video_rows.append((platform, key, r.get("url"), r.get("title"), r.get("channel"), seen_at, seen_at))
+
+    with conn:
+        cur = conn.execute(
+            "INSERT INTO runs (platform, keyword, date, started_at, record_count, source) VALUES (?, ?, ?, ?, ?, ?)",
+            (platform, keyword, date, now, len(obs_rows), source),
+        )
+        run_id = cur.lastrowid
+
+        conn.executemany(
+            """
+            INSERT INTO videos (platform, video_id, url, title, channel, first_seen, last_seen)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (platform, video_id) DO UPDATE SET
+                url = COALESCE(excluded.url, url),
+                title = COALESCE(excluded.title, title),
+                channel = COALESCE(excluded.channel, channel),
+                first_seen = MIN(first_seen, excluded.first_seen),
+                last_seen = MAX(last_seen, excluded.last_seen)
+            """,
+            video_rows,
+        )
+        conn.executemany(
+            """
+            INSERT INTO observations
+                (run_id, platform, video_id, keyword, date, collected_at, rank, views, views_api, record)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [(run_id, *row) for row in obs_rows],
+        )
+
+    return run_id
+
+
+def snapshot_dates(platform: str, keyword: str, path: str = DB_PATH) -> list[str]:
+    rows = connect(path).execute(
+        "SELECT DISTINCT date FROM runs WHERE platform = ? AND keyword = ? ORDER BY date",
+        (platform, keyword),
+    ).fetchall()
+    return [r["date"] for r in rows]
+
+
+def load_snapshot(platform: str, keyword: str, date: str, path: str = DB_PATH) -> list[dict]:
+    """
+    Record dari run terakhir untuk keyword + tanggal tsb, urut sesuai rank.
+    """
+    conn = connect(path)
+    run = conn.execute(
+        "SELECT id FROM runs WHERE platform = ? AND keyword = ? AND date = ? ORDER BY id DESC LIMIT 1",
+        (platform, keyword, date),
+    ).fetchone()
+    if not run:
+        return []
+
+    rows = conn.execute(
+        "SELECT record FROM observations WHERE run_id = ? ORDER BY rank",
+        (run["id"],),
+    ).fetchall()
+    return [json.loads(r["record"]) for r in rows]
+
+
+def load_observations(platform: str, keyword: str, dates: list[str], path: str = DB_PATH) -> list[sqlite3.Row]:
+    """
+    Kolom ringkas (video_id, date, collected_at, views, views_api) dari run
+    terakhir per tanggal, tanpa decode JSON record. Untuk analisis multi-hari.
+    """
+    if not dates:
+        return []
+
+    marks = ", ".join("?" * len(dates))
+    return connect(path).execute(
+        f"""
+        SELECT o.video_id, o.date, o.collected_at, o.views, o.views_api
+        FROM observations o
+        JOIN (
+            SELECT MAX(id) AS id FROM runs
+            WHERE platform = ? AND keyword = ? AND date IN ({marks})
+            GROUP BY date
+        ) r ON o.run_id = r.id
+        WHERE o.platform = ? AND o.keyword = ? AND o.date IN ({marks})
+        """,
+        (platform, keyword, *dates, platform, keyword, *dates),
+    ).fetchall()
+
+
+STATE_FIELDS = (
+    "date", "last_views", "last_ts", "velocity", "velocity_ewma", "peak_views",
+    "first_seen", "trend_since", "observations", "breakout",
+)
+
+
+def load_trend_states(platform: str, video_ids: list[str], path: str = DB_PATH) -> dict[str, dict]:
+    """
+    State per video (hanya video yang diminta). `prev` = state sebelum tanggal
+    terakhir (JSON), dipakai kalau snapshot tanggal yang sama diproses ulang.
+    """
+    conn = connect(path)
+    states = {}
+    ids = list(dict.fromkeys(video_ids))
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        rows = conn.execute(
+            f"SELECT * FROM trend_state WHERE platform = ? AND video_id IN ({', '.join('?' * len(chunk))})",
+            (platform, *chunk),
+        ).fetchall()
+        for row in rows:
+            state = {k: row[k] for k in STATE_FIELDS}
+            state["breakout"] = bool(state["breakout"])
+            state["prev"] = json.loads(row["prev"]) if row["prev"] else None
+            states[row["video_id"]] = state
+    return states
+
+
+def save_trend_states(platform: str, states: dict[str, dict], path: str = DB_PATH):
+    """
+    Checkpoint state video yang berubah (satu transaksi).
+    """
+    if not states:
+        return
+
+    rows = [
+        (
+            platform, video_id,
+            *(int(s[k]) if k == "breakout" else s[k] for k in STATE_FIELDS),
+            json.dumps(s["prev"]) if s.get("prev") else None,
+        )
+        for video_id, s in states.items()
+    ]
+    conn = connect(path)
+    with conn:
+        conn.executemany(
+            f"""
+            INSERT OR REPLACE INTO trend_state (platform, video_id, {", ".join(STATE_FIELDS)}, prev)
+            VALUES ({", ".join("?" * (len(STATE_FIELDS) + 3))})
+            """,
+            rows,
+        )
+
+
+def count_trend_states(platform: str, path: str = DB_PATH) -> int:
+    return connect(path).execute(
+        "SELECT COUNT(*) FROM trend_state WHERE platform = ?", (platform,)
+    ).fetchone()[0]
+
+
+def all_snapshots(platform: str, path: str = DB_PATH) -> list[tuple[str, str]]:
+    """
+    (tanggal, keyword) semua snapshot platform, urut kronologis.
+    """
+    rows = connect(path).execute(
+        "SELECT DISTINCT date, keyword FROM runs WHERE platform = ? ORDER BY date, keyword",
+        (platform,),
+    ).fetchall()
+    return [(r["date"], r["keyword"]) for r in rows]
+
+
+def last_run(platform: str, keyword: str, path: str = DB_PATH) -> sqlite3.Row | None:
+    """
+    Run collect terakhir untuk keyword (date, started_at, record_count), atau None.
+    """
+    return connect(path).execute(
+        """
+        SELECT date, started_at, record_count FROM runs
+        WHERE platform = ? AND keyword = ? AND source = 'collect'
+        ORDER BY id DESC LIMIT 1
+        """,
+        (platform, keyword),
+    ).fetchone()
+
+
+ENRICH_PARTS = ("statistics", "snippet")
+
+
+def load_enrich_cache(video_ids: list[str], path: str = DB_PATH) -> dict[str, dict]:
+    """
+    video_id -> {part: payload (dict / None = video tidak tersedia), f"{part}_at": epoch}.
+    """
+    conn = connect(path)
+    out = {}
+    ids = list(dict.fromkeys(video_ids))
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        rows = conn.execute(
+            f"SELECT * FROM enrich_cache WHERE video_id IN ({', '.join('?' * len(chunk))})",
+            chunk,
+        ).fetchall()
+        for row in rows:
+            entry = {}
+            for part in ENRICH_PARTS:
+                entry[part] = json.loads(row[part]) if row[part] else None
+                entry[f"{part}_at"] = row[f"{part}_at"]
+            out[row["video_id"]] = entry
+    return out
+
+
+def save_enrich_cache(rows: list[tuple[str, str, dict | None, float]], path: str = DB_PATH):
+    """
+    rows = (video_id, part, payload, fetched_at); part lain milik video yang sama tidak disentuh.
+    """
+    conn = connect(path)
+    with conn:
+        for part in ENRICH_PARTS:
+            part_rows = [
+                (vid, json.dumps(payload, ensure_ascii=False) if payload is not None else None, at)
+                for vid, p, payload, at in rows if p == part
+            ]
+            if not part_rows:
+                continue
+            conn.executemany(
+                f"""
+                INSERT INTO enrich_cache (video_id, {part}, {part}_at) VALUES (?, ?, ?)
+                ON CONFLICT (video_id) DO UPDATE SET
+                    {part} = excluded.{part},
+                    {part}_at = excluded.{part}_at
+                """,
+                part_rows,
+            )
+
+
+def reserve_quota(api: str, day: str, cost: int, limit: int, path: str = DB_PATH) -> bool:
+    """
+    Tambah pemakaian quota `api` di hari `day` sebesar `cost`, hanya kalau
+    totalnya tidak melewati `limit`. Cek + tambah dalam satu UPDATE, jadi
+    aman dipakai bersamaan oleh beberapa proses (runner, bot, GUI).
+    """
+    conn = connect(path)
+    with conn:
+        conn.execute("INSERT OR IGNORE INTO api_quota (api, day, units) VALUES (?, ?, 0)", (api, day))
+        cur = conn.execute(
+            "UPDATE api_quota SET units = units + ? WHERE api = ? AND day = ? AND units + ? <= ?",
+            (cost, api, day, cost, limit),
+        )
+    return cur.rowcount == 1
+
+
+def exhaust_quota(api: str, day: str, limit: int, path: str = DB_PATH):
+    conn = connect(path)
+    with conn:
+        conn.execute(
+            """
+            INSERT INTO api_quota (api, day, units) VALUES (?, ?, ?)
+            ON CONFLICT (api, day) DO UPDATE SET units = MAX(units, excluded.units)
+            """,
+            (api, day, limit),
+        )
+
+
+def quota_used(api: str, day: str, path: str = DB_PATH) -> int:
+    row = connect(path).execute(
+        "SELECT units FROM api_quota WHERE api = ? AND day = ?", (api, day)
+    ).fetchone()
+    return row["units"] if row else 0
+
+
+def export_snapshot_csv(platform: str, keyword: str, date: str, output_path: str, path: str = DB_PATH) -> str | None:
+    """
+    'View' CSV dari database, format sama dengan file data/{platform}/{date}_{keyword}.csv.
+    """
+    records = load_snapshot(platform, keyword, date, path=path)
+    if not records:
+        return None
+
+    fieldnames = []
+    for r in records:
+        for k in r:
+            if k not in fieldnames:
+                fieldnames.append(k)
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter=";")
+        writer.writeheader()
+        writer.writerows(records)
+
+    return output_path
+
+
+# --- Import riwayat CSV lama ---
+_CSV_NAME_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})_(.+)\.csv$")
+
+
+def import_csv_history(data_root: str = "data", path: str = DB_PATH) -> int:
+    """
+    Muat semua data/{platform}/{date}_{keyword}.csv lama ke database (sekali jalan).
+    Snapshot yang sudah ada di database (platform + keyword + tanggal) dilewati.
+    """
+    imported = 0
+    if not os.path.isdir(data_root):
+        return imported
+
+    for platform in sorted(os.listdir(data_root)):
+        platform_dir = os.path.join(data_root, platform)
+        if not os.path.isdir(platform_dir):
+            continue
+
+        for name in sorted(os.listdir(platform_dir)):
+            m = _CSV_NAME_RE.match(name)
+            if not m:
+                continue  # trend_*, early_breakout_*, features_*, dll
+            date, keyword = m.groups()
+
+            if date in snapshot_dates(platform, keyword, path=path):
+                continue
+
+            with open(os.path.join(platform_dir, name), newline="", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f, delimiter=";"))
+
+            if save_run(platform, keyword, date, rows, source="csv-import", path=path):
+                imported += 1
+
+    print(f"[OK] CSV import: {imported} snapshot dimuat ke {path}")
+    return imported
+
+
+if __name__ == "__main__":
+    # python -m storage.db import-csv [data_root]
+    if len(sys.argv) >= 2 and sys.argv[1] == "import-csv":
+        import_csv_history(sys.argv[2] if len(sys.argv) > 2 else "data")
+    else:
+        print("Usage: python -m storage.db import-csv [data_root]")
+        sys.exit(1)
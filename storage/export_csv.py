@@ -1,9 +1,10 @@
 # storage/export_csv.py
 
-import csv
 import os
 from typing import List, Dict
 
+from storage.record_writer import RecordWriter
+
 
 def export_to_csv(
     records: List[Dict],
@@ -13,7 +14,10 @@ def export_to_csv(
     """
     Export list of dict records to CSV.
     Will create directory if not exists.
-    Overwrite file if already exists.
+    Overwrite file if already exists (atomic: tulis ke .partial lalu rename).
+    Kolom = gabungan key semua record, jadi record yang punya field tambahan
+    (mis. views_api hanya untuk sebagian) tidak membuat export gagal.
+    Ekstensi .jsonl / .gz di filename ikut didukung (lihat RecordWriter).
     """
     if not records:
         print("[WARN] No records to export.")
@@ -22,17 +26,14 @@ def export_to_csv(
     os.makedirs(output_dir, exist_ok=True)
     output_path = os.path.join(output_dir, filename)
 
-    fieldnames = list(records[0].keys())
-
-    with open(output_path, mode="w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=fieldnames,
-            delimiter=";"
-        )
-        writer.writeheader()
-        writer.writerows(records)
+    fieldnames = []
+    for r in records:
+        for k in r:
+            if k not in fieldnames:
+                fieldnames.append(k)
 
+    with RecordWriter(output_path, fieldnames=fieldnames, fsync_every=len(records)) as writer:
+        writer.write_many(records)
 
     print(f"[OK] CSV exported: {output_path}")
     return output_path
@@ -42,8 +43,15 @@ import csv
 import os
 from glob import glob
 
+from storage.history import snapshot_dates, load_snapshot
+
 
 def load_csv_latest(platform: str, safe_keyword: str):
+    # Snapshot terbaru dari riwayat (database, CSV, arsip); glob folder CSV hanya sebagai fallback
+    dates = snapshot_dates(platform, safe_keyword)
+    if dates:
+        return load_snapshot(platform, safe_keyword, dates[-1])
+
     data_dir = f"data/{platform}"
     files = sorted(
         glob(os.path.join(data_dir, f"*_{safe_keyword}.csv"))
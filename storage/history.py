@@ -0,0 +1,172 @@
+# storage/history.py
+
+import csv
+import os
+import re
+import threading
+
+import numpy as np
+
+from storage import db
+from storage.archive import ARCHIVE_DIR, MISSING, HistoryArchive, archive_dir
+
+DATA_ROOT = "data"
+
+_CSV_NAME_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})_(.+)\.csv$")
+
+_archives: dict[str, tuple[float, HistoryArchive]] = {}
+_lock = threading.Lock()
+
+
+def get_archive(platform: str, root: str = ARCHIVE_DIR) -> HistoryArchive | None:
+    """
+    Arsip kolom per platform, dibuka sekali dan dibuka ulang kalau compaction
+    menulis versi baru (mtime meta.json berubah).
+    """
+    meta = os.path.join(archive_dir(platform, root), "meta.json")
+    try:
+        mtime = os.stat(meta).st_mtime_ns
+    except OSError:
+        return None
+
+    with _lock:
+        cached = _archives.get(meta)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        archive = HistoryArchive.open(platform, root)
+        _archives[meta] = (mtime, archive)
+        return archive
+
+
+def _csv_path(platform: str, keyword: str, date: str, data_root: str) -> str:
+    return os.path.join(data_root, platform, f"{date}_{keyword}.csv")
+
+
+def _csv_dates(platform: str, keyword: str, data_root: str) -> list[str]:
+    platform_dir = os.path.join(data_root, platform)
+    if not os.path.isdir(platform_dir):
+        return []
+    dates = []
+    for name in os.listdir(platform_dir):
+        m = _CSV_NAME_RE.match(name)
+        if m and m.group(2) == keyword:
+            dates.append(m.group(1))
+    return dates
+
+
+def snapshot_dates(platform: str, keyword: str, data_root: str = DATA_ROOT) -> list[str]:
+    """
+    Semua tanggal snapshot untuk keyword: database + CSV harian + arsip kolom.
+    """
+    dates = set(db.snapshot_dates(platform, keyword))
+    dates.update(_csv_dates(platform, keyword, data_root))
+    archive = get_archive(platform)
+    if archive:
+        dates.update(archive.dates(keyword))
+    return sorted(dates)
+
+
+def load_snapshot(platform: str, keyword: str, date: str, data_root: str = DATA_ROOT) -> list[dict]:
+    """
+    Record satu snapshot, dari sumber tercepat yang punya: database, CSV, lalu arsip.
+    """
+    records = db.load_snapshot(platform, keyword, date)
+    if records:
+        return records
+
+    path = _csv_path(platform, keyword, date, data_root)
+    if os.path.exists(path):
+        with open(path, newline="", encoding="utf-8") as f:
+            return list(csv.DictReader(f, delimiter=";"))
+
+    archive = get_archive(platform)
+    return archive.snapshot(keyword, date) if archive else []
+
+
+def _views(row: dict) -> int:
+    value = row.get("views_api") or row.get("views")
+    if value in (None, ""):
+        return MISSING
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return MISSING
+
+
+def _timestamp(collected_at, date: str) -> np.datetime64:
+    # Waktu observasi dari collected_at; snapshot lama tanpa collected_at = tengah malam UTC
+    if collected_at:
+        try:
+            return np.datetime64(str(collected_at).rstrip("Z"), "s")
+        except ValueError:
+            pass
+    return np.datetime64(date, "s")
+
+
+def load_observations(platform: str, keyword: str, days: int = 30, data_root: str = DATA_ROOT) -> dict[str, np.ndarray]:
+    """
+    Observasi (video, waktu, views) dari `days` snapshot terakhir keyword,
+    sebagai kolom: {"key": object[str], "ts": datetime64[s], "views": int64}.
+    views = views_api kalau ada (sama dengan compare_rows); -1 kalau kosong.
+    """
+    dates = snapshot_dates(platform, keyword, data_root)[-days:]
+
+    keys: list[str] = []
+    ts: list[np.datetime64] = []
+    views: list[int] = []
+
+    # 1. Database: satu query, tanpa decode JSON
+    db_dates = set(db.snapshot_dates(platform, keyword)) & set(dates)
+    for row in db.load_observations(platform, keyword, sorted(db_dates)):
+        keys.append(row["video_id"])
+        ts.append(_timestamp(row["collected_at"], row["date"]))
+        value = row["views_api"] or row["views"]
+        views.append(MISSING if value is None else value)
+
+    # 2. CSV harian yang belum ada di database
+    rest = [d for d in dates if d not in db_dates]
+    archived = []
+    for date in rest:
+        path = _csv_path(platform, keyword, date, data_root)
+        if not os.path.exists(path):
+            archived.append(date)
+            continue
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f, delimiter=";"):
+                key = db.video_key(row)
+                if key:
+                    keys.append(key)
+                    ts.append(_timestamp(row.get("collected_at"), date))
+                    views.append(_views(row))
+
+    # 3. Arsip kolom: hanya baris + kolom yang dibutuhkan yang dibaca (mmap)
+    archive = get_archive(platform) if archived else None
+    if archive:
+        rows = archive.keyword_rows(keyword)
+        rows = rows[np.isin(archive.column("_date")[rows], np.array(archived, dtype="datetime64[D]"))]
+
+        def col(name, missing):
+            if name in archive.columns:
+                return archive.column(name)[rows]
+            return np.full(len(rows), missing)
+
+        v = col("views", MISSING).astype(np.int64)
+        api = col("views_api", MISSING).astype(np.int64)
+        v = np.where(api > 0, api, v)
+        t = col("collected_at", np.datetime64("NaT", "s")).astype("datetime64[s]")
+        t = np.where(np.isnat(t), archive.column("_date")[rows].astype("datetime64[s]"), t)
+
+        ids = archive.decode(col("video_id", MISSING))
+        urls = archive.decode(col("url", MISSING))
+        for i, (vid, url) in enumerate(zip(ids, urls)):
+            key = db.video_key({"video_id": vid, "url": url})
+            if key:
+                keys.append(key)
+                ts.append(t[i])
+                views.append(int(v[i]))
+
+    return {
+        "key": np.array(keys, dtype=object),
+        "ts": np.array(ts, dtype="datetime64[s]"),
+        "views": np.array(views, dtype=np.int64),
+    }
@@ -0,0 +1,173 @@
+# storage/record_writer.py
+
+import csv
+import gzip
+import io
+import json
+import os
+import threading
+
+
+class RecordWriter:
+    """
+    Writer record-per-record yang tahan crash:
+
+        with RecordWriter("data/youtube/2026-01-19_ai.csv") as w:
+            for record in ...:
+                w.write(record)
+
+    - Ditulis ke `{path}.partial`, di-fsync setiap `fsync_every` record, lalu
+      di-rename atomik ke `path` saat close(). Kalau proses mati di tengah,
+      record yang sudah di-fsync tetap ada di file .partial.
+    - Format dari ekstensi: .csv / .jsonl, opsional + .gz
+    - CSV: kalau muncul key baru (mis. views_api hanya di sebagian record),
+      header diperluas dan isi file ditulis ulang; key yang tidak ada = kosong.
+    - Thread-safe (collector bisa menulis dari callback download).
+    """
+
+    def __init__(self, path: str, fsync_every: int = 20, delimiter: str = ";", fieldnames: list[str] | None = None):
+        self.path = path
+        self.tmp_path = f"{path}.partial"
+        self.fsync_every = fsync_every
+        self.delimiter = delimiter
+        self.fieldnames: list[str] = list(fieldnames or [])
+        self.count = 0
+
+        name = path[:-3] if path.endswith(".gz") else path
+        self.compressed = path.endswith(".gz")
+        self.format = "jsonl" if name.endswith(".jsonl") else "csv"
+
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._closed = False
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._open("w")
+        if self.format == "csv" and self.fieldnames:
+            self._csv_writer().writeheader()
+
+    # --- file handling ---
+    def _open(self, mode: str, path: str | None = None):
+        self._raw = open(path or self.tmp_path, mode + "b")
+        self._gz = gzip.GzipFile(fileobj=self._raw, mode="wb") if self.compressed else None
+        self._text = io.TextIOWrapper(self._gz or self._raw, encoding="utf-8", newline="")
+
+    def _close_handles(self):
+        self._text.flush()
+        self._text.detach()
+        if self._gz:
+            self._gz.close()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._raw.close()
+
+    def _csv_writer(self):
+        return csv.DictWriter(self._text, fieldnames=self.fieldnames, delimiter=self.delimiter, restval="")
+
+    def _sync(self):
+        self._text.flush()
+        if self._gz:
+            self._gz.flush()  # Z_SYNC_FLUSH: data sejauh ini bisa di-decompress
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._pending = 0
+
+    def _grow_schema(self, new_keys: list[str]):
+        """
+        Header CSV hanya ada di baris pertama, jadi file ditulis ulang dengan header baru:
+        ke `{path}.partial.grow` dulu (fsync), lalu di-rename atomik menggantikan
+        .partial. Crash di tengah tidak menghilangkan record yang sudah ditulis.
+        """
+        self._close_handles()
+
+        opener = gzip.open if self.compressed else open
+        with opener(self.tmp_path, "rt", encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f, delimiter=self.delimiter)) if self.count else []
+
+        grow_path = f"{self.tmp_path}.grow"
+        fieldnames = self.fieldnames + new_keys
+        self._open("w", grow_path)
+        try:
+            writer = csv.DictWriter(self._text, fieldnames=fieldnames, delimiter=self.delimiter, restval="")
+            writer.writeheader()
+            writer.writerows(rows)
+        except BaseException:
+            # .partial lama tidak disentuh; lanjut menulis ke sana
+            self._close_handles()
+            os.remove(grow_path)
+            self._open("a")
+            raise
+        self._close_handles()  # flush + fsync
+        os.replace(grow_path, self.tmp_path)
+
+        self.fieldnames = fieldnames
+        # Gzip: member baru di akhir file, tetap satu stream yang valid
+        self._open("a")
+        self._pending = 0
+
+    # --- API ---
+    def write(self, record: dict):
+        with self._lock:
+            if self._closed:
+                raise ValueError(f"RecordWriter sudah ditutup: {self.path}")
+
+            if self.format == "jsonl":
+                self._text.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            else:
+                new_keys = [k for k in record if k not in self.fieldnames]
+                if new_keys:
+                    self._grow_schema(new_keys)
+                self._csv_writer().writerow(record)
+
+            self.count += 1
+            self._pending += 1
+            if self._pending >= self.fsync_every:
+                self._sync()
+
+    def write_many(self, records):
+        for r in records:
+            self.write(r)
+
+    def close(self) -> str:
+        """
+        Fsync terakhir lalu rename atomik ke path final. Return path final.
+        """
+        with self._lock:
+            if self._closed:
+                return self.path
+            if self.format == "csv" and not self.fieldnames:
+                self._text.write("\n")  # file kosong tetap valid (header kosong)
+            self._close_handles()
+            os.replace(self.tmp_path, self.path)
+            self._closed = True
+            return self.path
+
+    def abort(self):
+        """
+        Tutup tanpa rename: isi yang sudah ditulis tetap di file .partial.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._close_handles()
+            self._closed = True
+
+    def discard(self):
+        """
+        Tutup dan hapus file .partial (mis. tidak ada record yang terkumpul).
+        """
+        self.abort()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
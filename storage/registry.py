@@ -0,0 +1,205 @@
+# storage/registry.py
+
+import threading
+
+from storage.db import video_key
+from utils.time import utc_today
+
+
+class VideoRegistry:
+    """
+    Registry video kanonik untuk satu siklus (sampai new_cycle(), paling lama
+    satu tanggal UTC), key = (platform, video_key). Video yang muncul di
+    beberapa keyword ("ai" dan "ai tools") hanya punya satu entry; keyword lain
+    cukup menambah link (keyword, rank). Pekerjaan mahal per video dilakukan sekali per siklus:
+
+    - thumbnail: fetch_thumbnail() (claim_thumbnail() / thumbnail_done())
+    - enrichment API: get_enrichment() / set_enrichment()
+    - delta + state tren: get_trend() / set_trend()
+
+    Di database, tabel `videos` adalah registry permanennya dan `observations`
+    menyimpan link keyword/rank per snapshot.
+    """
+
+    def __init__(self):
+        self.cycle = utc_today()
+        self._entries: dict[tuple[str, str], dict] = {}
+        self._lock = threading.Lock()
+        self.stats = {"videos": 0, "links": 0, "thumbnails_reused": 0, "enrich_reused": 0, "trend_reused": 0}
+
+    def new_cycle(self):
+        """
+        Mulai siklus baru (awal tiap siklus scheduler / run runner): hasil
+        enrichment, tren dan thumbnail siklus sebelumnya tidak dipakai lagi,
+        walau tanggal UTC-nya sama (interval scheduler bisa < 1 hari).
+        Panggil saat tidak ada collect yang sedang jalan.
+        """
+        with self._lock:
+            self.cycle = utc_today()
+            self._entries.clear()
+            self.stats = dict.fromkeys(self.stats, 0)
+
+    def _entry(self, platform: str, key: str) -> dict:
+        # Dipanggil dengan lock; siklus baru (ganti tanggal) = registry kosong
+        today = utc_today()
+        if today != self.cycle:
+            self.cycle = today
+            self._entries.clear()
+
+        entry = self._entries.get((platform, key))
+        if entry is None:
+            entry = self._entries[(platform, key)] = {
+                "links": [],
+                "thumbnail": None,
+                "thumbnail_state": None,  # None / "pending" / "done"
+                "waiters": [],
+                "enrichment": None,
+                "trend": None,
+            }
+            self.stats["videos"] += 1
+        return entry
+
+    # --- link keyword ---
+    def resolve(self, platform: str, record: dict, keyword: str, rank: int | None = None) -> tuple[str | None, bool]:
+        """
+        Daftarkan record ke video kanoniknya. Return (key, True kalau video ini
+        pertama kali muncul di siklus ini).
+        """
+        key = video_key(record)
+        if not key:
+            return None, False
+
+        with self._lock:
+            entry = self._entry(platform, key)
+            first = not entry["links"]
+            entry["links"].append((keyword, rank))
+            self.stats["links"] += 1
+        return key, first
+
+    def links(self, platform: str, key: str) -> list[tuple[str, int | None]]:
+        with self._lock:
+            entry = self._entries.get((platform, key))
+            return list(entry["links"]) if entry else []
+
+    # --- thumbnail ---
+    def claim_thumbnail(self, platform: str, key: str, on_ready) -> bool:
+        """
+        `on_ready(path)` dipanggil begitu thumbnail video ini tersedia; `path`
+        milik keyword yang men-download (None kalau gagal), pemanggil sendiri
+        yang menautkannya ke foldernya. Return True kalau pemanggil harus
+        men-download (lalu memanggil thumbnail_done); False kalau sudah / sedang
+        di-download keyword lain.
+        """
+        with self._lock:
+            entry = self._entry(platform, key)
+            state = entry["thumbnail_state"]
+            if state == "done":
+                path = entry["thumbnail"]
+                self.stats["thumbnails_reused"] += 1
+            else:
+                entry["waiters"].append(on_ready)
+                if state == "pending":
+                    self.stats["thumbnails_reused"] += 1
+                    return False
+                entry["thumbnail_state"] = "pending"
+                return True
+
+        on_ready(path)
+        return False
+
+    def thumbnail_done(self, platform: str, key: str, path: str | None):
+        with self._lock:
+            entry = self._entry(platform, key)
+            if path:
+                entry["thumbnail"] = path
+                entry["thumbnail_state"] = "done"
+            else:
+                entry["thumbnail_state"] = None  # gagal: keyword berikutnya boleh coba lagi
+            waiters, entry["waiters"] = entry["waiters"], []
+
+        # Satu waiter yang error tidak boleh membuat keyword lain kehilangan thumbnail-nya
+        for on_ready in waiters:
+            try:
+                on_ready(path)
+            except Exception as e:
+                print(f"[WARN] Callback thumbnail {platform}:{key} gagal: {e}")
+
+    def fetch_thumbnail(self, platform: str, key: str, urls, target_path: str, downloads, on_done):
+        """
+        Thumbnail satu video ke `target_path` milik pemanggil lewat `downloads`
+        (DownloadQueue, blob key '<platform>:<key>'), lalu `on_done(path)`.
+
+        Kalau video ini sudah / sedang di-download keyword lain, tidak ada
+        download kedua: setelah blob-nya ada, job di `downloads` hanya menautkan
+        blob itu ke target_path (storage.blobstore). Penantiannya didaftarkan
+        lewat downloads.defer(), jadi join() / close() pemanggil ikut menunggu
+        dan writer-nya belum ditutup saat record ditulis.
+        """
+        blob_key = f"{platform}:{key}"
+        waiting = downloads.defer()
+
+        def on_ready(path):
+            try:
+                if path and path != target_path:
+                    # Di-download keyword lain: blob yang sama ditautkan ke folder sendiri
+                    downloads.enqueue(urls, target_path, on_done=on_done, key=blob_key)
+                else:
+                    on_done(path)
+            finally:
+                waiting.set_result(path)
+
+        if self.claim_thumbnail(platform, key, on_ready):
+            try:
+                downloads.enqueue(
+                    urls, target_path,
+                    on_done=lambda path: self.thumbnail_done(platform, key, path),
+                    key=blob_key,
+                )
+            except Exception:
+                self.thumbnail_done(platform, key, None)
+                raise
+
+    # --- enrichment / tren ---
+    def get_enrichment(self, platform: str, key: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get((platform, key))
+            fields = entry["enrichment"] if entry and self.cycle == utc_today() else None
+            if fields is not None:
+                self.stats["enrich_reused"] += 1
+            return fields
+
+    def set_enrichment(self, platform: str, key: str, fields: dict):
+        with self._lock:
+            self._entry(platform, key)["enrichment"] = fields
+
+    def get_trend(self, platform: str, key: str, date: str, views: int | None) -> dict | None:
+        """
+        Hasil tren video ini di siklus ini, hanya kalau dihitung dari views yang
+        sama. Scrape ulang di hari yang sama dengan views berbeda = hitung ulang.
+        """
+        with self._lock:
+            entry = self._entries.get((platform, key))
+            trend = entry["trend"] if entry and date == self.cycle else None
+            if trend is not None and trend.get("views_today") != views:
+                trend = None
+            if trend is not None:
+                self.stats["trend_reused"] += 1
+            return trend
+
+    def set_trend(self, platform: str, key: str, date: str, fields: dict):
+        with self._lock:
+            if date == self.cycle:
+                self._entry(platform, key)["trend"] = fields
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> VideoRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = VideoRegistry()
+    return _registry
@@ -0,0 +1,157 @@
+# tests/conftest.py
+
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "tests", "fixtures")
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def load_fixture(*parts):
+    with open(os.path.join(FIXTURES, *parts), encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """
+    Folder kerja sementara: semua path relatif (data/, storage/) dan singleton
+    per proses (database, registry, blob store, cache enrichment) mulai kosong.
+    """
+    from enrich import enrich_cache
+    from storage import blobstore, db, registry
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(db, "_local", threading.local())
+    monkeypatch.setattr(registry, "_registry", None)
+    monkeypatch.setattr(blobstore, "_store", None)
+    monkeypatch.setattr(enrich_cache, "_cache", None)
+    return tmp_path
+
+
+class FakeDownloads:
+    """
+    Pengganti DownloadQueue untuk tes: tidak ada jaringan, thumbnail langsung
+    "gagal" (on_done(None)) atau ditulis sebagai file kecil kalau `write=True`.
+    """
+
+    def __init__(self, write: bool = False):
+        self.write = write
+        self.enqueued = []
+
+    def enqueue(self, urls, target_path, on_done=None, key=None):
+        self.enqueued.append((list(urls), target_path, key))
+        path = None
+        if self.write:
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            with open(target_path, "wb") as f:
+                f.write(b"jpg")
+            path = target_path
+        if on_done:
+            on_done(path)
+
+    def defer(self):
+        return Future()
+
+
+@pytest.fixture
+def fake_downloads():
+    return FakeDownloads()
+
+
+class FakeTelegram:
+    """
+    Bot API lokal: mencatat setiap panggilan (method, payload). `responses` =
+    daftar (status, body) yang dibalas dulu sebelum {"ok": true}, mis. 429
+    dengan retry_after. getUpdates membalas dari `updates` lalu kosong.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.responses = []
+        self.updates = []
+        self._cond = threading.Condition()
+        telegram = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                # getUpdates (long polling dipersingkat)
+                with telegram._cond:
+                    updates, telegram.updates = telegram.updates, []
+                if not updates:
+                    time.sleep(0.05)
+                self._reply(200, {"ok": True, "result": updates})
+
+            def do_POST(self):
+                method = self.path.rsplit("/", 1)[-1]
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                with telegram._cond:
+                    telegram.calls.append((method, payload, time.monotonic()))
+                    response = telegram.responses.pop(0) if telegram.responses else None
+                    telegram._cond.notify_all()
+                status, body = response or (200, {"ok": True, "result": {}})
+                self._reply(status, body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def messages(self) -> list[tuple]:
+        with self._cond:
+            return [(p["chat_id"], p["text"]) for m, p, _ in self.calls if m == "sendMessage"]
+
+    def wait_messages(self, n: int, timeout: float = 5) -> list[tuple]:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while sum(1 for m, _, _ in self.calls if m == "sendMessage") < n:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                self._cond.wait(left)
+        return self.messages()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def telegram(monkeypatch):
+    """
+    FakeTelegram + notifications.sender diarahkan ke sana (sender per token baru).
+    """
+    from notifications import sender
+
+    server = FakeTelegram()
+    monkeypatch.setattr(sender, "TELEGRAM_API", server.url)
+    monkeypatch.setattr(sender, "_senders", {})
+    monkeypatch.setattr(sender, "BACKOFF", 0.01)
+    yield server
+    server.close()
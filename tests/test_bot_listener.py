@@ -0,0 +1,164 @@
+# tests/test_bot_listener.py
+
+import contextlib
+import threading
+import time
+
+import pytest
+
+import bot_listener
+from notifications import sender
+from storage import db
+from utils.job_queue import JobQueue
+from utils.time import iso_to_epoch
+
+TOKEN = "123:test"
+BREAKOUT = {"early_breakout": True, "title": "Video A", "channel": "c", "url": "https://youtu.be/a",
+            "views_today": 5000, "delta_views": 4000, "trend_score": 9.1, "trend_label": "hot"}
+
+
+def update(update_id, chat_id, text):
+    return {"update_id": update_id, "message": {"chat": {"id": chat_id}, "text": text}}
+
+
+@pytest.fixture
+def fast_sender(telegram, monkeypatch):
+    # Rate limit per chat dilonggarkan supaya tes tidak menunggu token bucket
+    monkeypatch.setattr(sender, "CHAT_RATE", 100.0)
+    monkeypatch.setattr(sender, "CHAT_BURST", 100)
+    return telegram
+
+
+class Research:
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+
+    def __call__(self, keyword):
+        self.calls.append(keyword)
+        self.release.wait(5)
+        if keyword == "bad":
+            raise RuntimeError("scrape gagal")
+        records = [BREAKOUT] if keyword == "ai" else []
+        return records, keyword, "2024-05-02", time.time() - 130
+
+
+@pytest.fixture
+def research():
+    r = Research()
+    yield r
+    r.release.set()
+
+
+def flush():
+    assert sender.get_sender(TOKEN).flush(timeout=5)
+
+
+def test_replies_with_position_then_result(fast_sender, research):
+    jobs = JobQueue(research, workers=1, ttl=60)
+    handle = bot_listener.make_update_handler(TOKEN, 1, jobs)
+
+    handle(update(1, 10, "AI"))
+    handle(update(2, 11, "ai"))
+    handle(update(3, 12, "cars"))
+    flush()
+    queued = dict(fast_sender.messages())
+
+    assert queued[10] == "🔍 Researching: <b>ai</b> (sedang diproses)"
+    assert queued[11] == "🔍 Researching: <b>ai</b> (sedang diproses, digabung dengan request yang sama)"
+    assert queued[12] == "🔍 Researching: <b>cars</b> (antrian #1)"
+
+    research.release.set()
+    jobs.close()
+    flush()
+    results = fast_sender.messages()[3:]
+
+    assert research.calls == ["ai", "cars"]
+    assert sorted(chat for chat, _ in results) == [10, 11, 12]
+    for chat, text in results:
+        assert text.endswith("🕒 data 2 menit lalu")
+        assert ("EARLY BREAKOUT" in text) == (chat != 12)
+
+
+def test_cached_result_is_sent_without_queue_message(fast_sender, research):
+    research.release.set()
+    jobs = JobQueue(research, workers=1, ttl=60)
+    handle = bot_listener.make_update_handler(TOKEN, 1, jobs)
+
+    handle(update(1, 10, "ai"))
+    fast_sender.wait_messages(2)
+    handle(update(2, 20, "ai"))
+    jobs.close()
+    flush()
+
+    to_20 = [text for chat, text in fast_sender.messages() if chat == 20]
+    assert len(to_20) == 1 and "EARLY BREAKOUT" in to_20[0]
+    assert research.calls == ["ai"]
+
+
+def test_queue_full_and_failure_replies(fast_sender, research):
+    jobs = JobQueue(research, workers=1, max_pending=1)
+    handle = bot_listener.make_update_handler(TOKEN, 1, jobs)
+
+    handle(update(1, 10, "bad"))
+    while not research.calls:
+        time.sleep(0.01)
+    handle(update(2, 11, "ai"))
+    handle(update(3, 12, "cars"))
+    research.release.set()
+    jobs.close()
+    flush()
+    by_chat = {}
+    for chat, text in fast_sender.messages():
+        by_chat.setdefault(chat, []).append(text)
+
+    assert by_chat[12] == ["⏳ Antrian penuh, coba lagi nanti: <b>cars</b>"]
+    assert by_chat[10][-1] == "❌ Research gagal: <b>bad</b>"
+    assert "EARLY BREAKOUT" in by_chat[11][-1]
+
+
+def test_non_text_updates_are_ignored(fast_sender, research):
+    jobs = JobQueue(research, workers=1)
+    handle = bot_listener.make_update_handler(TOKEN, 1, jobs)
+
+    handle({"update_id": 1, "edited_message": {"text": "ai"}})
+    handle({"update_id": 2, "message": {"chat": {"id": 10}, "sticker": {}}})
+    handle(update(3, 10, "   "))
+    jobs.close()
+    flush()
+
+    assert fast_sender.messages() == []
+    assert research.calls == []
+
+
+class FakePool:
+    @contextlib.contextmanager
+    def page(self, routing=None):
+        yield object()
+
+
+@pytest.fixture
+def empty_scrape(workdir, monkeypatch):
+    monkeypatch.setattr("browser.pool.get_pool", lambda headless=True: FakePool())
+    monkeypatch.setattr("collectors.youtube.collect_youtube_browser", lambda *args, **kwargs: [])
+
+
+def test_empty_scrape_without_history_fails(empty_scrape):
+    with pytest.raises(RuntimeError):
+        bot_listener.handle_keyword("ai")
+
+
+def test_empty_scrape_reports_last_run_age(empty_scrape):
+    for date, views in (("2024-05-01", 100), ("2024-05-02", 300)):
+        record = {"video_id": "vid", "url": "https://www.youtube.com/watch?v=vid", "views": views,
+                  "collected_at": f"{date}T08:00:00Z"}
+        db.save_run("youtube", "ai", date, [record])
+    db.connect().execute("UPDATE runs SET started_at = '2024-05-02T08:00:00Z'")
+    db.connect().commit()
+
+    records, safe_keyword, _, as_of = bot_listener.handle_keyword("ai")
+
+    assert as_of == iso_to_epoch("2024-05-02T08:00:00Z")
+    assert bot_listener._staleness(as_of) != "data baru"
+    assert records[0]["views_today"] == 300
+    assert len(db.snapshot_dates("youtube", safe_keyword)) == 2
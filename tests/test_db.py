@@ -0,0 +1,38 @@
+# tests/test_db.py
+
+import pytest
+
+from storage.db import normalize_url, video_key
+
+
+def test_youtube_watch_keeps_video_id():
+    a = normalize_url("https://WWW.YouTube.com/watch?v=abc123&t=42s&feature=share")
+    b = normalize_url("https://www.youtube.com/watch?v=xyz789")
+
+    assert a == "https://www.youtube.com/watch?v=abc123"
+    assert a != b
+
+
+def test_other_urls_drop_query():
+    url = "https://www.tiktok.com/@user/video/123/?is_from_webapp=1#top"
+    assert normalize_url(url) == "https://www.tiktok.com/@user/video/123"
+    assert normalize_url("https://www.youtube.com/results?search_query=ai") == "https://www.youtube.com/results"
+
+
+@pytest.mark.parametrize("url, key", [
+    ("https://www.youtube.com/watch?v=abc123&list=PL1", "abc123"),
+    ("https://youtu.be/abc123?si=x", "abc123"),
+    ("https://www.youtube.com/shorts/abc123", "abc123"),
+    ("https://www.tiktok.com/@user/video/7351234567890?lang=id", "7351234567890"),
+    ("https://example.com/clip/?ref=1", "https://example.com/clip"),
+])
+def test_video_key_from_url(url, key):
+    assert video_key({"url": url}) == key
+
+
+def test_video_key_without_id_is_distinct_per_video():
+    keys = {video_key({"url": f"https://www.youtube.com/watch?v={vid}"}) for vid in ("a1", "b2", "c3")}
+
+    assert len(keys) == 3
+    assert video_key({"video_id": "a1", "url": "https://www.youtube.com/watch?v=zz"}) == "a1"
+    assert video_key({"url": ""}) is None
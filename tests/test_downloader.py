@@ -0,0 +1,163 @@
+# tests/test_downloader.py
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from utils import downloader
+from utils.downloader import download_file
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 2048
+
+
+@pytest.fixture
+def image_server(monkeypatch):
+    """
+    Server gambar lokal. `files` = path -> (body, etag); `errors` = path ->
+    daftar status yang dibalas dulu ("cut" = koneksi putus di tengah body).
+    Setiap request dicatat sebagai (path, header If-None-Match).
+    """
+    state = {"files": {}, "errors": {}, "requests": []}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            with lock:
+                state["requests"].append((self.path, self.headers.get("If-None-Match")))
+                pending = state["errors"].get(self.path)
+                error = pending.pop(0) if pending else None
+
+            body, etag = state["files"].get(self.path, (None, None))
+            if error == "cut":
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body[:len(body) // 2])
+                self.close_connection = True
+                return
+            if error:
+                self.send_response(error)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if body is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if etag and self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            if etag:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(downloader, "BACKOFF", 0.01)
+    state["base_url"] = f"http://127.0.0.1:{server.server_address[1]}"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def leftovers(tmp_path):
+    return [name for name in os.listdir(tmp_path) if name.endswith(".part")]
+
+
+def test_existing_file_is_skipped(image_server, tmp_path):
+    target = tmp_path / "a.png"
+    target.write_bytes(PNG)
+
+    assert download_file(f"{image_server['base_url']}/a.png", str(target), session=requests.Session())
+    assert image_server["requests"] == []
+
+
+def test_revalidate_uses_etag_and_304(image_server, tmp_path):
+    url = f"{image_server['base_url']}/a.png"
+    target = str(tmp_path / "a.png")
+    image_server["files"]["/a.png"] = (PNG, '"v1"')
+    session = requests.Session()
+
+    assert download_file(url, target, session=session)
+    mtime = os.path.getmtime(target)
+    assert download_file(url, target, revalidate=True, session=session)
+
+    assert image_server["requests"] == [("/a.png", None), ("/a.png", '"v1"')]
+    assert os.path.getmtime(target) == mtime
+
+    # ETag berubah: file diganti isi baru
+    image_server["files"]["/a.png"] = (PNG + b"baru", '"v2"')
+    assert download_file(url, target, revalidate=True, session=session)
+    with open(target, "rb") as f:
+        assert f.read().endswith(b"baru")
+    assert leftovers(tmp_path) == []
+
+
+def test_retries_server_errors_and_broken_body(image_server, tmp_path):
+    image_server["files"]["/a.png"] = (PNG, None)
+    image_server["errors"]["/a.png"] = [503, "cut"]
+    target = str(tmp_path / "a.png")
+
+    assert download_file(f"{image_server['base_url']}/a.png", target, session=requests.Session())
+
+    assert len(image_server["requests"]) == 3
+    with open(target, "rb") as f:
+        assert f.read() == PNG
+    assert leftovers(tmp_path) == []
+
+
+def test_failed_download_keeps_old_file(image_server, tmp_path):
+    target = tmp_path / "a.png"
+    target.write_bytes(PNG)
+    image_server["files"]["/a.png"] = (PNG + b"baru", '"v2"')
+    image_server["errors"]["/a.png"] = ["cut"] * downloader.RETRIES
+
+    assert not download_file(f"{image_server['base_url']}/a.png", str(target), revalidate=True,
+                             session=requests.Session())
+
+    assert len(image_server["requests"]) == downloader.RETRIES
+    assert target.read_bytes() == PNG
+    assert leftovers(tmp_path) == []
+
+
+@pytest.mark.parametrize("path, body", [("/missing.png", None), ("/page.png", b"<html>login</html>")])
+def test_client_error_and_invalid_image_not_saved(image_server, tmp_path, path, body):
+    if body:
+        image_server["files"][path] = (body, None)
+    target = tmp_path / path.lstrip("/")
+
+    assert not download_file(f"{image_server['base_url']}{path}", str(target), session=requests.Session())
+
+    assert len(image_server["requests"]) == 1     # 404 / bukan gambar tidak dicoba ulang
+    assert not target.exists()
+    assert leftovers(tmp_path) == []
+
+
+def test_many_parallel_downloads_share_session(image_server, tmp_path):
+    for i in range(200):
+        image_server["files"][f"/{i}.png"] = (PNG + str(i).encode(), None)
+    session = requests.Session()
+
+    def fetch(i):
+        return download_file(f"{image_server['base_url']}/{i}.png", str(tmp_path / f"{i}.png"), session=session)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert all(pool.map(fetch, range(200)))
+
+    assert len(image_server["requests"]) == 200
+    assert (tmp_path / "199.png").read_bytes() == PNG + b"199"
+    assert leftovers(tmp_path) == []
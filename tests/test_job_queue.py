@@ -0,0 +1,124 @@
+# tests/test_job_queue.py
+
+import threading
+
+import pytest
+
+from utils.job_queue import JobQueue, QueueFull
+
+
+class Handler:
+    """
+    Handler job yang bisa ditahan (`release`) untuk menguji antrian / dedup.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, key):
+        self.calls.append(key)
+        self.started.set()
+        if not self.release.wait(5):
+            raise TimeoutError("tidak pernah dilepas")
+        if key == "bad":
+            raise ValueError("gagal")
+        return key.upper()
+
+
+@pytest.fixture
+def handler():
+    h = Handler()
+    yield h
+    h.release.set()
+
+
+def test_same_key_is_joined(handler):
+    jobs = JobQueue(handler, workers=1)
+    done = []
+
+    first, status1, _ = jobs.submit("ai", "ai", on_done=done.append)
+    second, status2, position = jobs.submit("ai", "ai", on_done=done.append)
+    handler.release.set()
+    jobs.close()
+
+    assert (status1, status2) == ("queued", "joined")
+    assert second is first and first.requests == 2
+    assert position == 0
+    assert handler.calls == ["ai"]
+    assert done == [first, first]
+    assert first.wait() == "AI"
+
+
+def test_positions_follow_queue(handler):
+    jobs = JobQueue(handler, workers=1)
+    jobs.submit("a", "a")
+    handler.started.wait(5)
+    _, _, pos_b = jobs.submit("b", "b")
+    _, _, pos_c = jobs.submit("c", "c")
+    handler.release.set()
+    jobs.close()
+
+    assert (pos_b, pos_c) == (1, 2)
+    assert handler.calls == ["a", "b", "c"]
+
+
+def test_result_cached_within_ttl(handler):
+    handler.release.set()
+    jobs = JobQueue(handler, workers=1, ttl=60)
+    job, _, _ = jobs.submit("ai", "ai")
+    job.wait(5)
+
+    done = []
+    cached, status, position = jobs.submit("ai", "ai", on_done=done.append)
+    jobs.close()
+
+    assert (status, position) == ("cached", 0)
+    assert cached is job and done == [job]
+    assert handler.calls == ["ai"]
+    assert jobs.stats["cached"] == 1
+
+
+def test_no_cache_without_ttl_or_after_failure(handler):
+    handler.release.set()
+    jobs = JobQueue(handler, workers=1, ttl=0)
+    jobs.submit("ai", "ai")[0].wait(5)
+    _, status, _ = jobs.submit("ai", "ai")
+
+    bad = jobs.submit("bad", "bad")[0]
+    with pytest.raises(ValueError):
+        bad.wait(5)
+    _, bad_status, _ = jobs.submit("bad", "bad")
+    jobs.close()
+
+    assert status == "queued"
+    assert bad_status == "queued"
+    assert jobs.stats["failed"] == 2
+
+
+def test_queue_full(handler):
+    jobs = JobQueue(handler, workers=1, max_pending=1)
+    jobs.submit("a", "a")
+    handler.started.wait(5)   # "a" sudah diambil worker, antrian kosong lagi
+    jobs.submit("b", "b")
+
+    with pytest.raises(QueueFull):
+        jobs.submit("c", "c")
+    # Key yang sudah antre tetap boleh digabung walau antrian penuh
+    assert jobs.submit("b", "b")[1] == "joined"
+
+    handler.release.set()
+    jobs.close()
+    assert handler.calls == ["a", "b"]
+
+
+def test_thread_exit_hook_runs_per_worker(handler):
+    handler.release.set()
+    exited = []
+    jobs = JobQueue(handler, workers=3, on_thread_exit=lambda: exited.append(threading.current_thread().name))
+    jobs.close()
+
+    assert sorted(exited) == ["job-0", "job-1", "job-2"]
+    with pytest.raises(RuntimeError):
+        jobs.submit("ai", "ai")
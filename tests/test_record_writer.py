@@ -0,0 +1,70 @@
+# tests/test_record_writer.py
+
+import csv
+import gzip
+import json
+import os
+
+import pytest
+
+from storage import record_writer
+from storage.record_writer import RecordWriter
+
+
+def read_csv(path, opener=open):
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f, delimiter=";"))
+
+
+@pytest.mark.parametrize("name, opener", [("out.csv", open), ("out.csv.gz", gzip.open)])
+def test_schema_growth_keeps_rows(tmp_path, name, opener):
+    path = str(tmp_path / name)
+    with RecordWriter(path, fsync_every=1) as w:
+        w.write({"title": "a", "views": 1})
+        w.write({"title": "b", "views": 2, "views_api": 20})
+        w.write({"title": "c", "views": 3})
+
+    rows = read_csv(path, opener)
+    assert [r["title"] for r in rows] == ["a", "b", "c"]
+    assert [r["views_api"] for r in rows] == ["", "20", ""]
+    assert not os.path.exists(path + ".partial")
+    assert not os.path.exists(path + ".partial.grow")
+
+
+def test_crash_during_schema_growth_keeps_partial(tmp_path, monkeypatch):
+    path = str(tmp_path / "out.csv")
+    w = RecordWriter(path, fsync_every=1)
+    w.write({"title": "a", "views": 1})
+    w.write({"title": "b", "views": 2})
+
+    def crash(self, rows):
+        raise OSError("disk penuh")
+
+    monkeypatch.setattr(record_writer.csv.DictWriter, "writerows", crash)
+    with pytest.raises(OSError):
+        w.write({"title": "c", "views": 3, "views_api": 30})
+    monkeypatch.undo()
+
+    # Record lama masih utuh di .partial, dan writer masih bisa dipakai
+    assert [r["title"] for r in read_csv(path + ".partial")] == ["a", "b"]
+    assert not os.path.exists(path + ".partial.grow")
+
+    w.write({"title": "d", "views": 4})
+    w.abort()
+    assert [r["title"] for r in read_csv(path + ".partial")] == ["a", "b", "d"]
+
+
+def test_jsonl_and_discard(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    with RecordWriter(path) as w:
+        w.write({"a": 1})
+        w.write({"b": 2})
+    with open(path, encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == [{"a": 1}, {"b": 2}]
+
+    empty = RecordWriter(str(tmp_path / "empty.csv"))
+    empty.discard()
+    assert not os.path.exists(str(tmp_path / "empty.csv.partial"))
+
+    with pytest.raises(ValueError):
+        empty.write({"a": 1})
@@ -0,0 +1,129 @@
+# tests/test_registry.py
+
+import csv
+import os
+import threading
+import time
+
+from analysis.trend_state import update_trend_state
+from collectors import youtube
+from storage.record_writer import RecordWriter
+from storage.registry import get_registry
+from utils import download_queue
+from utils.download_queue import DownloadQueue
+
+
+def card(video_id):
+    return {"title": video_id, "href": f"/watch?v={video_id}", "channel": "c", "views_text": "1K views"}
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f, delimiter=";"))
+
+
+def test_shared_thumbnail_linked_into_each_keyword(workdir, monkeypatch):
+    release = threading.Event()
+    calls = []
+
+    def slow_download(url, path):
+        calls.append(url)
+        # Keyword pertama masih men-download saat keyword kedua selesai scraping
+        release.wait(5)
+        with open(path, "wb") as f:
+            f.write(b"jpg")
+        return True
+
+    monkeypatch.setattr(download_queue, "download_file", slow_download)
+
+    results = {}
+
+    def collect(keyword, cards):
+        writer = RecordWriter(os.path.join("data", f"{keyword}.csv"))
+        records = youtube._build_records(cards, keyword, "test", writer=writer)
+        writer.close()
+        results[keyword] = records
+
+    first = threading.Thread(target=collect, args=("ai", [card("AAAAAAAAAAA")]))
+    first.start()
+    while not calls:
+        time.sleep(0.01)
+
+    second = threading.Thread(target=collect, args=("ai tools", [card("AAAAAAAAAAA"), card("BBBBBBBBBBB")]))
+    second.start()
+    time.sleep(0.2)
+    release.set()
+    first.join(10)
+    second.join(10)
+
+    # Satu download untuk video yang sama, tapi tiap keyword punya file sendiri
+    assert calls.count("https://i.ytimg.com/vi/AAAAAAAAAAA/maxresdefault.jpg") == 1
+    shot_a = results["ai"][0]["screenshot"]
+    shot_b = results["ai tools"][0]["screenshot"]
+    assert shot_a and shot_b and shot_a != shot_b
+    assert os.path.join("ai-tools", "") in shot_b
+    assert os.path.samefile(shot_a, shot_b)
+
+    # Writer keyword kedua baru ditutup setelah thumbnail bersama-nya siap
+    rows = read_rows(os.path.join("data", "ai tools.csv"))
+    assert sorted(r["video_id"] for r in rows) == ["AAAAAAAAAAA", "BBBBBBBBBBB"]
+    assert all(r["screenshot"] for r in rows)
+
+
+def test_waiter_error_does_not_skip_others(workdir):
+    registry = get_registry()
+    got = []
+
+    def broken(path):
+        raise RuntimeError("boom")
+
+    assert registry.claim_thumbnail("youtube", "vid", got.append)
+    assert not registry.claim_thumbnail("youtube", "vid", broken)
+    assert not registry.claim_thumbnail("youtube", "vid", got.append)
+    registry.thumbnail_done("youtube", "vid", "a.jpg")
+
+    assert got == ["a.jpg", "a.jpg"]
+
+
+def test_failed_shared_thumbnail_releases_join(workdir, monkeypatch):
+    monkeypatch.setattr(download_queue, "download_file", lambda url, path: False)
+    downloads = DownloadQueue()
+    got = []
+    registry = get_registry()
+
+    registry.fetch_thumbnail("youtube", "vid", ["http://x/1.jpg"], "a.jpg", downloads, got.append)
+    registry.fetch_thumbnail("youtube", "vid", ["http://x/1.jpg"], "b.jpg", downloads, got.append)
+    downloads.close()
+
+    assert got == [None, None]
+
+
+def trend_record(views):
+    return {"video_id": "vid", "url": "https://www.youtube.com/watch?v=vid", "views": views,
+            "collected_at": "2024-05-02T08:00:00Z"}
+
+
+def test_same_day_rescrape_recomputes_trend(workdir):
+    today = get_registry().cycle
+    update_trend_state("youtube", [trend_record(100)], "2024-05-01")
+    first = update_trend_state("youtube", [trend_record(200)], today)[0]
+    again = update_trend_state("youtube", [trend_record(200)], today)[0]
+    rescrape = update_trend_state("youtube", [trend_record(350)], today)[0]
+
+    assert first["views_today"] == again["views_today"] == 200
+    assert get_registry().stats["trend_reused"] == 1
+    assert rescrape["views_today"] == 350
+    assert rescrape["delta_views"] == 250
+
+
+def test_new_cycle_drops_enrichment_and_trend(workdir):
+    registry = get_registry()
+    registry.set_enrichment("youtube", "vid", {"views_api": 100})
+    registry.set_trend("youtube", "vid", registry.cycle, {"views_today": 100, "delta_views": 10})
+    assert registry.get_enrichment("youtube", "vid") == {"views_api": 100}
+
+    registry.new_cycle()
+
+    assert registry.get_enrichment("youtube", "vid") is None
+    assert registry.get_trend("youtube", "vid", registry.cycle, 100) is None
+    assert registry.stats["enrich_reused"] == 0
@@ -0,0 +1,63 @@
+# tests/test_scheduler.py
+
+import pytest
+
+import config
+import runner
+import scheduler
+from collectors import youtube
+from storage.db import last_run
+from storage.registry import get_registry
+
+CFG = {
+    "youtube": {"keywords": ["ai", "broken", "empty"], "max_videos": 5},
+    "schedule": {"start_jitter_seconds": 0, "concurrency": {"youtube": 2}},
+}
+
+
+def fake_collect(keyword, max_videos=20, writer=None, extract="dom"):
+    if keyword == "broken":
+        raise ConnectionError("youtube tidak bisa dihubungi")
+    if keyword == "empty":
+        return []
+    records = [{
+        "platform": "youtube", "keyword": keyword, "video_id": "vid", "title": "Video",
+        "url": "https://www.youtube.com/watch?v=vid", "views": 100, "screenshot": None,
+    }]
+    for r in records:
+        writer.write(r)
+    return records
+
+
+@pytest.fixture
+def collect(workdir, monkeypatch):
+    monkeypatch.setattr(youtube, "collect_youtube_trends_http", fake_collect)
+    monkeypatch.setattr(config, "API_KEY", None)   # enrichment dilewati
+
+
+def test_failed_collect_raises(collect):
+    with pytest.raises(runner.CollectError):
+        runner.run_collect("youtube", "broken")
+    with pytest.raises(runner.CollectError):
+        runner.run_collect("youtube", "empty")
+    assert runner.run_collect("youtube", "ai") == "ai"
+
+
+def test_cycle_counts_failed_keywords(collect):
+    summary = scheduler.run_cycle(CFG, platforms=("youtube",))
+
+    assert summary == {"run": 1, "skipped": 0, "failed": 2}
+    assert last_run("youtube", "ai")["record_count"] == 1
+    assert last_run("youtube", "broken") is None
+
+    # Siklus berikutnya di window yang sama: yang gagal dicoba lagi
+    summary = scheduler.run_cycle(CFG, platforms=("youtube",))
+    assert summary == {"run": 0, "skipped": 1, "failed": 2}
+
+
+def test_each_cycle_starts_a_new_registry_cycle(collect):
+    # Interval < 1 hari: views_api siklus sebelumnya tidak boleh dipakai ulang
+    get_registry().set_enrichment("youtube", "vid", {"views_api": 1})
+    scheduler.run_cycle({**CFG, "youtube": {"keywords": ["ai"]}}, platforms=("youtube",), force=True)
+
+    assert get_registry().get_enrichment("youtube", "vid") is None
@@ -0,0 +1,90 @@
+# tests/test_telegram_sender.py
+
+import pytest
+
+import runner
+from notifications import sender
+from notifications.sender import BATCH_SEPARATOR, get_sender
+
+TOKEN = "123:alerts"
+BREAKOUT = {"early_breakout": True, "title": "Video A", "channel": "c", "url": "https://youtu.be/a",
+            "views_today": 5000, "delta_views": 4000, "trend_score": 9.1, "trend_label": "hot"}
+
+
+def sent_at(telegram):
+    return [at for method, _, at in telegram.calls if method == "sendMessage"]
+
+
+def test_429_waits_retry_after_then_resends(telegram):
+    telegram.responses = [(429, {"ok": False, "error_code": 429, "parameters": {"retry_after": 1}})]
+    s = get_sender(TOKEN)
+
+    assert s.send(42, "halo")
+
+    first, second = sent_at(telegram)
+    assert second - first >= 0.95
+    assert telegram.messages() == [(42, "halo"), (42, "halo")]
+    assert s.stats["rate_limited"] == 1 and s.stats["sent"] == 1
+
+
+def test_client_error_is_not_retried(telegram):
+    telegram.responses = [(400, {"ok": False, "description": "Bad Request: chat not found"})]
+    s = get_sender(TOKEN)
+
+    assert not s.send(42, "halo")
+    assert len(telegram.messages()) == 1
+    assert s.stats["failed"] == 1
+
+
+def test_queued_messages_are_batched_under_rate_limit(telegram, monkeypatch):
+    monkeypatch.setattr(sender, "CHAT_RATE", 2.0)
+    monkeypatch.setattr(sender, "CHAT_BURST", 1)
+    s = get_sender(TOKEN)
+
+    texts = [f"breakout {i}" for i in range(6)]
+    for text in texts:
+        s.enqueue(42, text)
+    s.enqueue(43, "chat lain")
+    assert s.flush(timeout=10)
+
+    to_42 = [text for chat, text in telegram.messages() if chat == 42]
+    assert 1 < len(to_42) < len(texts)
+    assert BATCH_SEPARATOR.join(to_42).split(BATCH_SEPARATOR) == texts
+    assert (43, "chat lain") in telegram.messages()
+    assert s.stats["batched"] >= 2
+
+
+def test_unbatched_messages_are_sent_separately(telegram, monkeypatch):
+    monkeypatch.setattr(sender, "CHAT_RATE", 20.0)
+    monkeypatch.setattr(sender, "CHAT_BURST", 1)
+    s = get_sender(TOKEN)
+
+    for i in range(3):
+        s.enqueue(42, f"pesan {i}", batch=False)
+    assert s.flush(timeout=10)
+
+    assert telegram.messages() == [(42, "pesan 0"), (42, "pesan 1"), (42, "pesan 2")]
+
+
+@pytest.mark.parametrize("cfg, enabled", [
+    ({"telegram": {"bot_token": TOKEN, "chat_id": 7, "breakout_alerts": True}}, True),
+    ({"telegram": {"bot_token": TOKEN, "chat_id": 7}}, False),
+    ({}, False),
+])
+def test_alert_config(cfg, enabled):
+    assert (runner.alert_config(cfg) is not None) == enabled
+
+
+def test_run_compare_sends_breakout_alert(telegram, workdir, monkeypatch):
+    records = [BREAKOUT, {**BREAKOUT, "title": "Video B", "early_breakout": False}]
+    monkeypatch.setattr(runner, "compare_incremental", lambda platform, kw: (records, "2024-05-02"))
+    alerts = runner.alert_config({"telegram": {"bot_token": TOKEN, "chat_id": 7, "breakout_alerts": True}})
+
+    runner.run_compare("youtube", "ai", alerts=alerts)
+    runner.run_compare("youtube", "cars", alerts=None)
+    assert runner.flush_alerts(alerts, timeout=5)
+
+    (chat, text), = telegram.messages()
+    assert chat == 7
+    assert "ai (youtube)" in text and "Video A" in text and "Video B" not in text
+    assert "2024-05-02" in text
@@ -0,0 +1,71 @@
+# tests/test_thumb_features.py
+
+import json
+import os
+import threading
+
+import numpy as np
+from PIL import Image
+
+from analysis import thumb_features
+from analysis.thumb_features import FeatureCache, compute_features, extract_features_batch
+
+
+def make_image(path, color):
+    Image.new("RGB", (128, 72), color).save(path)
+    return str(path)
+
+
+def test_solid_colors(tmp_path):
+    rgb = np.zeros((2, 36, 64, 3), dtype=np.uint8)
+    rgb[0, ..., 0] = 255          # merah penuh
+    rgb[1] = 255                  # putih
+    feats = extract_features_batch(rgb)
+
+    names = thumb_features.COLOR_NAMES
+    assert names[int(np.argmax(feats["color_hist"][0]))] == "merah"
+    assert names[int(np.argmax(feats["color_hist"][1]))] == "putih"
+    assert feats["brightness"][1] > feats["brightness"][0]
+    assert np.allclose(feats["contrast"], 0)
+
+
+def test_concurrent_saves_keep_every_entry(workdir):
+    os.makedirs("img")
+    paths = [make_image(workdir / "img" / f"{i}.png", (i * 12, 255 - i * 12, 80)) for i in range(16)]
+    errors = []
+    start = threading.Barrier(8)
+
+    def worker(chunk):
+        # Tiap worker scheduler memakai FeatureCache sendiri, path cache sama
+        try:
+            start.wait()
+            for path in chunk:
+                compute_features([path])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(paths[i::8],)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    with open(thumb_features.CACHE_PATH, encoding="utf-8") as f:
+        data = json.load(f)
+    assert len(data["features"]) == 16
+    assert set(data["files"]) == set(paths)
+    assert [n for n in os.listdir(os.path.dirname(thumb_features.CACHE_PATH)) if n.endswith(".tmp")] == []
+
+
+def test_cached_features_are_not_recomputed(workdir, monkeypatch):
+    path = make_image(workdir / "a.png", (200, 30, 30))
+    first = compute_features([path])
+
+    def no_decode(*args, **kwargs):
+        raise AssertionError("gambar di-decode ulang")
+
+    monkeypatch.setattr(thumb_features, "load_batch", no_decode)
+    again = compute_features([path], FeatureCache())
+
+    assert again == first
@@ -0,0 +1,71 @@
+# tests/test_thumb_hash.py
+
+import numpy as np
+import pytest
+
+from analysis.thumb_hash import ThumbIndex, hamming
+
+
+def make_index(tmp_path, phash: np.ndarray) -> ThumbIndex:
+    shas = [f"sha{i:04d}" for i in range(len(phash))]
+    paths = {}
+    for sha in shas:
+        path = tmp_path / f"{sha}.jpg"
+        path.write_bytes(b"x")
+        paths[sha] = [str(path)]
+    return ThumbIndex(shas, np.zeros(len(phash), dtype=np.uint64), phash, paths)
+
+
+def brute_force_clusters(index: ThumbIndex, max_distance: int) -> set[frozenset]:
+    n = len(index)
+    parent = list(range(n))
+
+    def find(x):
+        while parent[x] != x:
+            x = parent[x]
+        return x
+
+    d = hamming(index.phash[:, None], index.phash[None, :])
+    for i in range(n):
+        for j in range(i + 1, n):
+            if d[i, j] <= max_distance:
+                parent[find(j)] = find(i)
+
+    groups = {}
+    for row in range(n):
+        groups.setdefault(find(row), set()).add(index.path_for(row))
+    return {frozenset(g) for g in groups.values() if len(g) >= 2}
+
+
+def test_clusters_large_bucket_matches_brute_force(tmp_path):
+    rng = np.random.default_rng(1)
+    n = 200
+    # Tiga potongan bawah identik untuk semua hash -> satu bucket berisi 200 baris
+    high = rng.integers(0, 1 << 16, n, dtype=np.uint64)
+    phash = (high << np.uint64(48)) | np.uint64(0x123456789ABC)
+    # Near-duplicate di baris pertama & terakhir (jauh di tabel terurut), beda 1 bit
+    phash[-1] = phash[0] ^ np.uint64(1 << 50)
+
+    index = make_index(tmp_path, phash)
+    got = {frozenset(g) for g in index.clusters(max_distance=3)}
+
+    assert got == brute_force_clusters(index, 3)
+    assert any({index.path_for(0), index.path_for(n - 1)} <= g for g in got)
+
+
+def test_clusters_random_hashes_match_brute_force(tmp_path):
+    rng = np.random.default_rng(2)
+    base = rng.integers(0, 2**63, 40, dtype=np.uint64)
+    flips = [np.uint64(1) << np.uint64(b) for b in rng.integers(0, 64, 80)]
+    phash = np.concatenate([base, base[rng.integers(0, 40, 80)] ^ np.array(flips, dtype=np.uint64)])
+
+    index = make_index(tmp_path, phash)
+    for distance in (0, 1, 3):
+        got = {frozenset(g) for g in index.clusters(max_distance=distance)}
+        assert got == brute_force_clusters(index, distance)
+
+
+def test_clusters_rejects_unsupported_distance(tmp_path):
+    index = make_index(tmp_path, np.array([1, 2, 3], dtype=np.uint64))
+    with pytest.raises(ValueError):
+        index.clusters(max_distance=4)
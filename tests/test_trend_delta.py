@@ -0,0 +1,80 @@
+# tests/test_trend_delta.py
+
+import pytest
+
+from analysis.trend_delta import compare_daily_db, compare_incremental, compare_window
+from analysis.trend_state import update_trend_state
+from storage.db import save_run
+
+# views [100, 200, 500] pada hari 0, 1, 3: velocity 100 lalu 150/hari,
+# acceleration = (150 - 100) / 2 hari (interval terakhir) = 25
+SERIES = [("2024-05-01", 100), ("2024-05-02", 200), ("2024-05-04", 500)]
+
+
+def record(date, views, video_id="vid1"):
+    return {
+        "video_id": video_id,
+        "url": f"https://www.youtube.com/watch?v={video_id}",
+        "title": video_id,
+        "views": views,
+        "collected_at": f"{date}T08:00:00Z",
+    }
+
+
+def test_window_and_incremental_agree(workdir):
+    incremental = None
+    for date, views in SERIES:
+        save_run("youtube", "ai", date, [record(date, views)])
+        incremental = update_trend_state("youtube", [record(date, views)], date)[0]
+
+    records, date = compare_window("youtube", "ai")
+    window = records[0]
+
+    assert date == "2024-05-04"
+    assert window["acceleration"] == pytest.approx(25.0)
+    assert incremental["acceleration"] == pytest.approx(25.0)
+    for field in ("velocity_ewma", "days_in_trend"):
+        assert window[field] == pytest.approx(incremental[field]), field
+
+
+def test_window_needs_three_observations(workdir):
+    for date, views in SERIES[:2]:
+        save_run("youtube", "ai", date, [record(date, views), record(date, views, "vid2")])
+    save_run("youtube", "ai", "2024-05-03", [record("2024-05-03", 300), record("2024-05-03", 50, "vid3")])
+
+    records, _ = compare_window("youtube", "ai")
+    by_id = {r["video_id"]: r for r in records}
+
+    assert by_id["vid1"]["window_obs"] == 3
+    assert by_id["vid1"]["acceleration"] == pytest.approx(0.0)
+    assert by_id["vid3"]["window_obs"] == 1
+    assert by_id["vid3"]["acceleration"] is None
+
+
+def test_keyword_added_later_gets_real_delta(workdir):
+    for date, views in (("2024-05-01", 100), ("2024-05-02", 200)):
+        save_run("youtube", "a", date, [record(date, views, "vidA")])
+    assert compare_incremental("youtube", "a")[0][0]["delta_views"] == 100
+
+    # Keyword "b" baru muncul setelah "a" sudah punya state
+    save_run("youtube", "b", "2024-05-03", [record("2024-05-03", 1000, "vidB")])
+    save_run("youtube", "b", "2024-05-04", [record("2024-05-04", 5000, "vidB")])
+    records, date = compare_incremental("youtube", "b")
+
+    assert date == "2024-05-04"
+    assert [(r["status"], r["delta_views"]) for r in records] == [("existing", 4000)]
+    baseline, _ = compare_daily_db("youtube", "b")
+    assert baseline[0]["delta_views"] == records[0]["delta_views"]
+
+
+def test_first_snapshot_becomes_baseline(workdir):
+    save_run("youtube", "a", "2024-05-01", [record("2024-05-01", 100, "vidA")])
+    save_run("youtube", "c", "2024-05-01", [record("2024-05-01", 300, "vidC")])
+    compare_incremental("youtube", "a")
+    assert compare_incremental("youtube", "c") is None   # baru satu tanggal
+
+    save_run("youtube", "c", "2024-05-02", [record("2024-05-02", 450, "vidC")])
+    records, _ = compare_incremental("youtube", "c")
+
+    assert records[0]["views_yesterday"] == 300
+    assert records[0]["delta_views"] == 150
@@ -0,0 +1,125 @@
+# tests/test_webhook.py
+
+import json
+import socket
+
+import pytest
+import requests
+
+import bot_listener
+from notifications.webhook import SECRET_HEADER, WebhookServer
+
+SECRET = "s3cret"
+TOKEN = "123:webhook"
+
+
+@pytest.fixture
+def server():
+    received = []
+
+    def handle(update):
+        if update.get("update_id") == 99:
+            raise RuntimeError("handler rusak")
+        received.append(update)
+
+    srv = WebhookServer(handle, SECRET, port=0)
+    srv.received = received
+    srv.start()
+    yield srv
+    srv.stop()
+
+
+def post(srv, body, secret=SECRET, path=None):
+    host, port = srv.address
+    data = body if isinstance(body, bytes) else json.dumps(body).encode()
+    headers = {"Content-Type": "application/json"}
+    if secret is not None:
+        headers[SECRET_HEADER] = secret
+    return requests.post(f"http://{host}:{port}{path or srv.path}", data=data, headers=headers, timeout=5)
+
+
+def test_update_is_handled_once(server):
+    update = {"update_id": 1, "message": {"chat": {"id": 10}, "text": "ai"}}
+
+    assert post(server, update).status_code == 200
+    assert post(server, update).status_code == 200   # kiriman ulang Telegram
+
+    assert server.received == [update]
+    assert server.stats["received"] == 1 and server.stats["duplicate"] == 1
+
+
+@pytest.mark.parametrize("secret", ["salah", "", None])
+def test_bad_secret_is_rejected(server, secret):
+    resp = post(server, {"update_id": 2}, secret=secret)
+
+    assert resp.status_code == 403
+    assert server.received == []
+    assert server.stats["rejected"] == 1
+
+
+@pytest.mark.parametrize("body", [b"[1, 2]", b'"teks"', b"bukan json", b""])
+def test_bad_body_is_400(server, body):
+    assert post(server, body).status_code == 400
+    assert server.received == []
+
+
+def test_wrong_path_and_get_are_404(server):
+    host, port = server.address
+    assert post(server, {"update_id": 3}, path="/lain").status_code == 404
+    assert requests.get(f"http://{host}:{port}{server.path}", timeout=5).status_code == 404
+
+
+def test_handler_error_still_acknowledged(server):
+    assert post(server, {"update_id": 99}).status_code == 200
+    assert server.stats["failed"] == 1
+    # update yang gagal tidak diproses ulang saat dikirim lagi
+    assert post(server, {"update_id": 99}).status_code == 200
+    assert server.stats["duplicate"] == 1
+
+
+def test_run_webhook_needs_url_or_secret(telegram):
+    assert bot_listener.run_webhook(TOKEN, lambda u: None, {"enabled": True}) is False
+    assert telegram.calls == []
+
+
+def test_run_webhook_port_in_use(telegram):
+    with socket.socket() as busy:
+        busy.bind(("127.0.0.1", 0))
+        busy.listen()
+        port = busy.getsockname()[1]
+        webhook = {"secret_token": SECRET, "port": port}
+        assert bot_listener.run_webhook(TOKEN, lambda u: None, webhook) is False
+
+
+def test_rejected_set_webhook_falls_back_to_polling(telegram, monkeypatch):
+    telegram.responses = [(200, {"ok": False, "description": "bad webhook: HTTPS url must be provided"})]
+    cfg = {"telegram": {
+        "bot_token": TOKEN,
+        "chat_id": 1,
+        "webhook": {"enabled": True, "url": "http://bot.example.com/telegram", "port": 0},
+    }}
+    polled = []
+    monkeypatch.setattr(bot_listener, "load_config", lambda: cfg)
+    monkeypatch.setattr(bot_listener, "run_polling", lambda token, handle: polled.append(token))
+    monkeypatch.setattr("sys.argv", ["bot_listener.py"])
+
+    bot_listener.main()
+
+    methods = [method for method, _, _ in telegram.calls]
+    assert methods == ["setWebhook", "deleteWebhook"]
+    assert telegram.calls[0][1]["url"] == "http://bot.example.com/telegram"
+    assert polled == [TOKEN]
+
+
+def test_polling_flag_skips_webhook(telegram, monkeypatch):
+    cfg = {"telegram": {"bot_token": TOKEN, "chat_id": 1, "webhook": {"enabled": True, "secret_token": SECRET}}}
+    polled = []
+    monkeypatch.setattr(bot_listener, "load_config", lambda: cfg)
+    monkeypatch.setattr(bot_listener, "run_polling", lambda token, handle: polled.append(token))
+    monkeypatch.setattr("sys.argv", ["bot_listener.py", "--polling"])
+
+    bot_listener.main()
+
+    # Webhook lama dihapus dulu: getUpdates ditolak selama webhook terdaftar
+    assert [method for method, _, _ in telegram.calls] == ["deleteWebhook"]
+    assert polled == [TOKEN]
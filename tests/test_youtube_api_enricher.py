@@ -0,0 +1,151 @@
+# tests/test_youtube_api_enricher.py
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import httplib2
+import pytest
+
+import config
+from enrich import youtube_api_enricher as enricher
+from enrich.youtube_api_enricher import QuotaTracker, enrich_youtube_records
+
+
+class VideosStub:
+    """
+    Stub lokal videos.list: `errors` = daftar (status, reason) yang dibalas
+    dulu sebelum respons sukses.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.errors = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                with stub._lock:
+                    stub.calls.append((url.path, query))
+                    error = stub.errors.pop(0) if stub.errors else None
+
+                if error:
+                    status, reason = error
+                    body = {"error": {"code": status, "errors": [{"reason": reason}]}}
+                else:
+                    status = 200
+                    body = {"items": [
+                        {
+                            "id": vid,
+                            "statistics": {"viewCount": "1000", "likeCount": "10", "commentCount": "1"},
+                            "snippet": {"publishedAt": "2024-05-01T00:00:00Z"},
+                        }
+                        for vid in query["id"][0].split(",")
+                        if not vid.startswith("gone")
+                    ]}
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+
+@pytest.fixture
+def stub(workdir, monkeypatch):
+    server = VideosStub()
+    monkeypatch.setattr(config, "API_KEY", "test-key")
+    monkeypatch.setattr(enricher, "API_ENDPOINT", server.endpoint)
+    monkeypatch.setattr(enricher, "_yt", None)
+    monkeypatch.setattr(enricher, "BACKOFF", 0.01)
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+
+def records(n, prefix="v"):
+    return [{"video_id": f"{prefix}{i:04d}"} for i in range(n)]
+
+
+def test_videos_list_batches_and_cache(stub):
+    data = records(120) + [{"video_id": "gone0001"}]
+    quota = QuotaTracker()
+    enrich_youtube_records(data, quota=quota)
+
+    assert len(stub.calls) == 3
+    assert all(path.endswith("/youtube/v3/videos") for path, _ in stub.calls)
+    assert max(len(q["id"][0].split(",")) for _, q in stub.calls) == enricher.BATCH_SIZE
+    assert data[0]["views_api"] == 1000 and data[0]["published_at"] == "2024-05-01T00:00:00Z"
+    assert "views_api" not in data[-1]
+    assert quota.units == 3
+
+    # Run ulang dalam TTL: semua dari cache (termasuk video yang tidak ada)
+    enrich_youtube_records(records(120) + [{"video_id": "gone0001"}], quota=quota)
+    assert len(stub.calls) == 3
+
+
+def test_rate_limit_is_retried(stub):
+    stub.errors = [(429, "rateLimitExceeded"), (403, "userRateLimitExceeded")]
+    data = records(5)
+    enrich_youtube_records(data, quota=QuotaTracker())
+
+    assert len(stub.calls) == 3
+    assert all(r["views_api"] == 1000 for r in data)
+
+
+def test_quota_exceeded_stops_enrichment(stub):
+    stub.errors = [(403, "quotaExceeded")]
+    quota = QuotaTracker()
+    data = records(5)
+    enrich_youtube_records(data, quota=quota)
+
+    assert len(stub.calls) == 1
+    assert not any("views_api" in r for r in data)
+    assert quota.remaining() == 0
+    assert not quota.reserve(1)
+
+
+def test_server_not_found_is_handled(stub, monkeypatch):
+    class Unreachable(httplib2.Http):
+        def request(self, *args, **kwargs):
+            raise httplib2.ServerNotFoundError("Unable to find the server")
+
+    monkeypatch.setattr(enricher, "_http", Unreachable)
+    data = records(3)
+    enrich_youtube_records(data, quota=QuotaTracker())
+
+    assert not stub.calls
+    assert not any("views_api" in r for r in data)
+
+
+def test_quota_reserve_is_atomic_across_connections(workdir):
+    # Tiap thread punya koneksi SQLite sendiri, seperti proses yang berbeda
+    quotas = [QuotaTracker(limit=300, reserve=0) for _ in range(4)]
+    granted = []
+
+    def spend(quota):
+        granted.append(sum(quota.reserve(1) for _ in range(100)))
+
+    threads = [threading.Thread(target=spend, args=(q,)) for q in quotas]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sum(granted) == 300
+    assert quotas[0].units == 300
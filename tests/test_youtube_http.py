@@ -0,0 +1,138 @@
+# tests/test_youtube_http.py
+
+import contextlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+from conftest import load_fixture
+
+from collectors import youtube
+
+INITIAL = load_fixture("youtube", "search_initial.json")
+PAGES = {
+    "TOKEN-PAGE-2": load_fixture("youtube", "search_continuation_2.json"),
+    "TOKEN-PAGE-3": load_fixture("youtube", "search_continuation_3.json"),
+}
+YTCFG = {
+    "INNERTUBE_API_KEY": "test-key",
+    "INNERTUBE_CONTEXT": {"client": {"clientName": "WEB", "clientVersion": "2.20260101"}},
+}
+
+
+def search_html(initial) -> str:
+    return (
+        "<html><head><script>ytcfg.set("
+        + json.dumps(YTCFG)
+        + ");</script></head><body><script>var ytInitialData = "
+        + json.dumps(initial)
+        + ";</script></body></html>"
+    )
+
+
+@pytest.fixture
+def youtube_server():
+    """
+    Server lokal pengganti youtube.com: GET /results (HTML + ytInitialData)
+    dan POST /youtubei/v1/search (continuation dari fixture).
+    """
+    state = {"html": search_html(INITIAL), "searches": [], "posts": []}
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, code, body: bytes, content_type="application/json"):
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/results":
+                self._send(404, b"")
+                return
+            state["searches"].append(parse_qs(url.query))
+            self._send(200, state["html"].encode(), "text/html; charset=utf-8")
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            state["posts"].append((parse_qs(url.query), body))
+            data = PAGES.get(body.get("continuation"))
+            if url.path != "/youtubei/v1/search" or data is None:
+                self._send(400, b"{}")
+                return
+            self._send(200, json.dumps(data).encode())
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state["base_url"] = f"http://127.0.0.1:{server.server_address[1]}"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_collect_follows_continuations(workdir, fake_downloads, youtube_server):
+    records = youtube.collect_youtube_trends_http(
+        "ai tools", max_videos=55, session=requests.Session(),
+        base_url=youtube_server["base_url"], downloads=fake_downloads,
+    )
+
+    assert len(records) == 55
+    assert len({r["video_id"] for r in records}) == 55
+    assert youtube_server["searches"][0]["search_query"] == ["ai tools"]
+
+    # 20 video awal + 2 halaman continuation, request memakai ytcfg halaman
+    assert len(youtube_server["posts"]) == 2
+    params, body = youtube_server["posts"][0]
+    assert params["key"] == ["test-key"]
+    assert body == {"context": YTCFG["INNERTUBE_CONTEXT"], "continuation": "TOKEN-PAGE-2"}
+    assert youtube_server["posts"][1][1]["continuation"] == "TOKEN-PAGE-3"
+
+
+def test_http_collect_stops_without_extra_requests(workdir, fake_downloads, youtube_server):
+    records = youtube.collect_youtube_trends_http(
+        "ai", max_videos=10, session=requests.Session(),
+        base_url=youtube_server["base_url"], downloads=fake_downloads,
+    )
+    assert len(records) == 10
+    assert youtube_server["posts"] == []
+
+
+def test_http_collect_without_data_and_no_fallback(workdir, fake_downloads, youtube_server):
+    youtube_server["html"] = "<html><body>consent</body></html>"
+    records = youtube.collect_youtube_trends_http(
+        "ai", session=requests.Session(), base_url=youtube_server["base_url"],
+        fallback=False, downloads=fake_downloads,
+    )
+    assert records == []
+
+
+def test_http_collect_falls_back_to_browser(workdir, fake_downloads, youtube_server, monkeypatch):
+    import browser.pool
+
+    class FakePool:
+        @contextlib.contextmanager
+        def page(self, routing=None):
+            yield f"page:{routing}"
+
+    calls = []
+    monkeypatch.setattr(browser.pool, "get_pool", lambda headless=True: FakePool())
+    monkeypatch.setattr(
+        youtube, "collect_youtube_browser",
+        lambda page, keyword, extract="dom", **kw: calls.append((page, keyword, extract)) or ["record"],
+    )
+
+    youtube_server["html"] = "<html><body>consent</body></html>"
+    records = youtube.collect_youtube_trends_http(
+        "ai", session=requests.Session(), base_url=youtube_server["base_url"],
+        downloads=fake_downloads, extract="json",
+    )
+    assert records == ["record"]
+    assert calls == [("page:youtube", "ai", "json")]
@@ -0,0 +1,142 @@
+# tests/test_youtube_json.py
+
+import copy
+import json
+
+import pytest
+from conftest import load_fixture
+
+from collectors import youtube
+from collectors.youtube_data import (
+    duration_to_seconds,
+    extract_initial_data,
+    find_continuation_token,
+    follow_continuations,
+    parse_search_cards,
+)
+
+INITIAL = load_fixture("youtube", "search_initial.json")
+PAGES = {
+    "TOKEN-PAGE-2": load_fixture("youtube", "search_continuation_2.json"),
+    "TOKEN-PAGE-3": load_fixture("youtube", "search_continuation_3.json"),
+}
+
+
+class FakePage:
+    """
+    Page Playwright minimal untuk jalur JSON: ytInitialData dan respons
+    continuation diambil dari fixture.
+    """
+
+    def __init__(self, initial=INITIAL, pages=PAGES):
+        self.initial = initial
+        self.pages = pages
+        self.continuations = []
+        self.listeners = []
+
+    def on(self, event, callback):
+        self.listeners.append((event, callback))
+
+    def remove_listener(self, event, callback):
+        self.listeners.remove((event, callback))
+
+    def goto(self, url, **kwargs):
+        self.url = url
+
+    def content(self):
+        return ""
+
+    def evaluate(self, script, arg=None):
+        if "ytInitialData" in script:
+            return copy.deepcopy(self.initial)
+        self.continuations.append(arg)
+        return copy.deepcopy(self.pages.get(arg))
+
+
+def test_parse_initial_data_fixture():
+    cards = parse_search_cards(INITIAL)
+
+    # channelRenderer diabaikan, video di shelf yang sudah muncul tidak dobel
+    assert len(cards) == 20
+    assert len({c["video_id"] for c in cards}) == 20
+
+    first = cards[0]
+    assert first["title"] == "AI video 0"
+    assert first["href"] == f"/watch?v={first['video_id']}"
+    assert first["channel"] == "Channel 0"
+    assert first["views_text"] == "1,234 views"
+    assert first["upload_time"] == "1 hours ago"
+    assert first["duration"] == "1:00"
+    assert first["duration_seconds"] == 60
+    assert first["badges"] == "New, Verified"
+
+    assert find_continuation_token(INITIAL) == "TOKEN-PAGE-2"
+
+
+def test_parse_continuation_fixture():
+    cards = parse_search_cards(PAGES["TOKEN-PAGE-2"])
+    assert [c["title"] for c in cards[:2]] == ["AI video 20", "AI video 21"]
+    assert find_continuation_token(PAGES["TOKEN-PAGE-2"]) == "TOKEN-PAGE-3"
+    assert find_continuation_token(PAGES["TOKEN-PAGE-3"]) is None
+
+
+def test_extract_initial_data_from_html():
+    html = f'<script>var ytInitialData = {json.dumps(INITIAL)};</script><p>after</p>'
+    assert extract_initial_data(html) == INITIAL
+    assert extract_initial_data("<html></html>") is None
+
+
+def test_duration_to_seconds():
+    assert duration_to_seconds("12:34") == 754
+    assert duration_to_seconds("1:02:03") == 3723
+    assert duration_to_seconds("LIVE") is None
+
+
+def test_follow_continuations_stops_at_max_videos():
+    fetched = []
+
+    def fetch(token):
+        fetched.append(token)
+        return PAGES.get(token)
+
+    cards = follow_continuations(parse_search_cards(INITIAL), "TOKEN-PAGE-2", fetch, max_videos=30)
+    assert fetched == ["TOKEN-PAGE-2"]
+    assert len(cards) == 40
+
+
+def test_collect_json_follows_continuations(workdir, fake_downloads):
+    page = FakePage()
+    records = youtube.collect_youtube_trends_json(page, "ai", max_videos=55, downloads=fake_downloads)
+
+    assert page.continuations == ["TOKEN-PAGE-2", "TOKEN-PAGE-3"]
+    assert len(records) == 55
+    assert len({r["video_id"] for r in records}) == 55
+    assert page.listeners == []  # listener response dilepas lagi
+
+    r = records[0]
+    assert r["platform"] == "youtube"
+    assert r["keyword"] == "ai"
+    assert r["views"] == 1234
+    assert r["url"] == f"https://www.youtube.com/watch?v={r['video_id']}"
+    assert r["duration_seconds"] == 60
+    assert len(fake_downloads.enqueued) == 55
+
+
+def test_collect_json_falls_back_to_dom_when_empty(workdir, fake_downloads, monkeypatch):
+    calls = []
+    monkeypatch.setattr(youtube, "collect_youtube_trends", lambda page, keyword, **kw: calls.append(keyword) or [])
+
+    page = FakePage(initial={"contents": {}})
+    assert youtube.collect_youtube_trends_json(page, "ai", downloads=fake_downloads) == []
+    assert calls == ["ai"]
+
+
+def test_collect_browser_dispatch(monkeypatch):
+    monkeypatch.setattr(youtube, "collect_youtube_trends_json", lambda page, keyword, **kw: "json")
+    monkeypatch.setattr(youtube, "collect_youtube_trends", lambda page, keyword, **kw: "dom")
+
+    assert youtube.collect_youtube_browser(None, "ai", extract="json") == "json"
+    assert youtube.collect_youtube_browser(None, "ai") == "dom"
+
+    with pytest.raises(ValueError):
+        youtube.collect_youtube_browser(None, "ai", extract="xml")
@@ -0,0 +1,124 @@
+# utils/download_queue.py
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from utils.downloader import download_file
+from storage.blobstore import get_store
+
+MAX_WORKERS = 8
+MAX_PER_HOST = 4
+
+
+class DownloadQueue:
+    """
+    Tahap download di background: collector cukup enqueue lalu lanjut scraping.
+
+        downloads = DownloadQueue()
+        downloads.enqueue([maxres_url, hq_url], target, on_done=callback)
+        ...
+        downloads.join()   # tunggu semua selesai + ringkasan
+
+    URL dicoba berurutan (URL pertama, lalu fallback). `on_done(path)` dipanggil
+    dengan path hasil download, atau None kalau semua URL gagal.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS, per_host: int = MAX_PER_HOST):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="download")
+        self._per_host = per_host
+        self._host_limits: dict[str, threading.Semaphore] = {}
+        self._lock = threading.Lock()
+        self._futures = []
+        self._started = time.perf_counter()
+        self.summary = {"queued": 0, "ok": 0, "failed": 0, "fallback_used": 0}
+
+    def _host_limit(self, url: str) -> threading.Semaphore:
+        host = urlparse(url).netloc
+        with self._lock:
+            sem = self._host_limits.get(host)
+            if sem is None:
+                sem = self._host_limits[host] = threading.Semaphore(self._per_host)
+            return sem
+
+    def _count(self, key: str):
+        with self._lock:
+            self.summary[key] += 1
+
+    def _download(self, url: str, path: str) -> bool:
+        with self._host_limit(url):
+            return download_file(url, path)
+
+    def _run(self, urls: list[str], target_path: str, key: str | None, on_done):
+        saved = None
+        if key:
+            # Lewat blob store: thumbnail yang sama hanya di-download sekali
+            saved = get_store().fetch(key, urls, target_path, download=self._download)
+        else:
+            for i, url in enumerate(urls):
+                if url and self._download(url, target_path):
+                    saved = target_path
+                    if i > 0:
+                        self._count("fallback_used")
+                    break
+
+        self._count("ok" if saved else "failed")
+
+        if on_done:
+            try:
+                on_done(saved)
+            except Exception as e:
+                print(f"[WARN] Callback download gagal: {e}")
+
+        return saved
+
+    def enqueue(self, urls: list[str] | str, target_path: str, on_done=None, key: str | None = None):
+        """
+        `key` (mis. 'youtube:<video_id>') = simpan lewat storage.blobstore dan
+        tautkan ke target_path; tanpa key file di-download langsung ke target_path.
+        """
+        if isinstance(urls, str):
+            urls = [urls]
+
+        self._count("queued")
+        future = self._executor.submit(self._run, list(urls), target_path, key, on_done)
+        with self._lock:
+            self._futures.append(future)
+        return future
+
+    def defer(self) -> Future:
+        """
+        Future kosong yang ikut ditunggu join() / close(); pemanggil yang
+        menyelesaikannya (set_result). Untuk pekerjaan yang menunggu queue lain,
+        mis. thumbnail yang sedang di-download keyword lain (storage.registry).
+        """
+        future = Future()
+        with self._lock:
+            self._futures.append(future)
+        return future
+
+    def join(self) -> dict:
+        """
+        Tunggu semua download selesai. Return ringkasan (queued/ok/failed/seconds).
+        Queue bisa dipakai lagi setelah join.
+        """
+        while True:
+            with self._lock:
+                pending = self._futures
+                self._futures = []
+            if not pending:
+                break
+            for future in pending:
+                future.result()
+
+        summary = dict(self.summary, seconds=round(time.perf_counter() - self._started, 2))
+        print(
+            f"[OK] Downloads: {summary['ok']}/{summary['queued']} ok, "
+            f"{summary['failed']} failed, {summary['seconds']}s"
+        )
+        return summary
+
+    def close(self):
+        self.join()
+        self._executor.shutdown(wait=True)
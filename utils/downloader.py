@@ -1,25 +1,134 @@
 # utils/downloader.py
 
-import requests
+import json
 import os
+import threading
+import time
 
-def download_file(url: str, save_path: str):
+from utils.http import get_session
+
+CHUNK_SIZE = 64 * 1024
+TIMEOUT = 10
+RETRIES = 3
+BACKOFF = 0.5  # detik, dikali 2 setiap percobaan
+
+# Status yang layak dicoba ulang (server sibuk / rate limit)
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Magic bytes format gambar yang kita simpan
+_IMAGE_MAGIC = (
+    b"\xff\xd8\xff",          # JPEG
+    b"\x89PNG\r\n\x1a\n",     # PNG
+    b"RIFF",                  # WEBP (RIFF....WEBP)
+    b"GIF8",                  # GIF
+)
+
+
+def _meta_path(save_path: str) -> str:
+    return save_path + ".meta"
+
+
+def is_valid_file(path: str, name: str | None = None) -> bool:
+    """
+    File ada, tidak kosong, dan (kalau gambar) header-nya utuh.
+    `name` dipakai untuk menentukan tipe file kalau `path` adalah file sementara.
+    """
+    try:
+        if os.path.getsize(path) == 0:
+            return False
+        with open(path, "rb") as f:
+            head = f.read(8)
+    except OSError:
+        return False
+
+    if (name or path).lower().endswith((".jpg", ".jpeg", ".png", ".webp", ".gif")):
+        return head.startswith(_IMAGE_MAGIC)
+    return True
+
+
+def _load_meta(save_path: str) -> dict:
+    try:
+        with open(_meta_path(save_path), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_meta(save_path: str, url: str, headers) -> None:
+    meta = {
+        "url": url,
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+    }
+    if not meta["etag"] and not meta["last_modified"]:
+        return
+    try:
+        with open(_meta_path(save_path), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+    except OSError:
+        pass
+
+
+def download_file(url: str, save_path: str, revalidate: bool = False, session=None):
     """
     Download file dari URL dan simpan ke path lokal.
-    Mengembalikan True jika sukses.
+    Mengembalikan True jika sukses (atau file lokal masih valid).
+
+    - Session keep-alive bersama (tanpa handshake TCP+TLS baru tiap file)
+    - Tulis ke file .part lalu rename atomik (gagal di tengah = tidak ada file korup)
+    - File yang sudah ada & valid dilewati; dengan revalidate=True dicek ulang
+      pakai If-None-Match / If-Modified-Since (304 = tetap pakai file lama)
+    - Retry dengan backoff untuk error jaringan / 429 / 5xx
     """
     if not url:
         return False
-        
-    try:
-        # Timeout 10 detik agar tidak hang
-        response = requests.get(url, stream=True, timeout=10)
-        if response.status_code == 200:
-            with open(save_path, 'wb') as f:
-                for chunk in response.iter_content(1024):
-                    f.write(chunk)
-            return True
-    except Exception as e:
-        print(f"[ERROR] Gagal download {url}: {e}")
-    
-    return False
\ No newline at end of file
+
+    exists = is_valid_file(save_path)
+    if exists and not revalidate:
+        return True
+
+    headers = {}
+    if exists:
+        meta = _load_meta(save_path)
+        if meta.get("url") == url:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+    session = session or get_session()
+    tmp_path = f"{save_path}.{os.getpid()}-{threading.get_ident()}.part"
+
+    for attempt in range(RETRIES):
+        if attempt:
+            time.sleep(BACKOFF * (2 ** (attempt - 1)))
+
+        try:
+            with session.get(url, headers=headers, stream=True, timeout=TIMEOUT) as response:
+                if response.status_code == 304 and exists:
+                    return True
+                if response.status_code in _RETRY_STATUS:
+                    continue
+                if response.status_code != 200:
+                    return False
+
+                with open(tmp_path, "wb") as f:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        f.write(chunk)
+
+                if not is_valid_file(tmp_path, name=save_path):
+                    os.remove(tmp_path)
+                    return False
+
+                os.replace(tmp_path, save_path)
+                _save_meta(save_path, url, response.headers)
+                return True
+
+        except Exception as e:
+            print(f"[ERROR] Gagal download {url} (percobaan {attempt + 1}): {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    return False
@@ -0,0 +1,35 @@
+# utils/http.py
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+_session = None
+_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Session HTTP bersama (keep-alive + connection pool) untuk seluruh proses.
+    """
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                s.headers.update({
+                    "User-Agent": USER_AGENT,
+                    "Accept-Language": "en-US,en;q=0.9",
+                })
+                _session = s
+    return _session
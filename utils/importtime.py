@@ -0,0 +1,66 @@
+# utils/importtime.py
+
+import os
+import re
+import subprocess
+import sys
+
+# Entry point -> budget waktu import (ms, kumulatif)
+ENTRY_POINTS = {
+    "runner": 300,
+    "bot_listener": 300,
+}
+# Modul berat yang tidak boleh ikut ter-import saat start
+HEAVY_MODULES = ("playwright", "googleapiclient", "PySide6")
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(module: str) -> list[tuple[str, int, int]]:
+    """
+    Jalankan `python -X importtime -c "import <module>"` di proses baru.
+    Return [(nama modul, self us, kumulatif us)] urut sesuai output.
+    """
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} gagal:\n{proc.stderr.strip()[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2))))
+    return rows
+
+
+def check(module: str, budget_ms: int, top: int = 10) -> bool:
+    rows = measure(module)
+    total = next((cum for name, _, cum in rows if name == module), 0) / 1000
+    heavy = sorted({name for name, _, _ in rows if name.split(".")[0] in HEAVY_MODULES})
+
+    print(f"[INFO] import {module}: {total:.0f} ms (budget {budget_ms} ms)")
+    for name, _, cum in sorted(rows, key=lambda r: r[2], reverse=True)[1:top + 1]:
+        print(f"       {cum / 1000:8.1f} ms  {name}")
+
+    ok = True
+    if total > budget_ms:
+        print(f"[ERROR] import {module} melebihi budget")
+        ok = False
+    if heavy:
+        print(f"[ERROR] import {module} ikut memuat: {', '.join(heavy[:5])}")
+        ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    # python -m utils.importtime [module ...]
+    modules = sys.argv[1:] or list(ENTRY_POINTS)
+    results = [check(m, ENTRY_POINTS.get(m, 300)) for m in modules]
+    if all(results):
+        print("[OK] Import time dalam budget")
+    else:
+        sys.exit(1)
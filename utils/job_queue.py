@@ -0,0 +1,221 @@
+# utils/job_queue.py
+
+import threading
+import time
+from collections import deque
+
+MAX_WORKERS = 2
+MAX_PENDING = 50
+RESULT_TTL = 15 * 60  # detik
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    """
+    Satu pekerjaan di JobQueue. Request dengan key sama yang datang selama job
+    belum selesai digabung ke job ini (callback-nya ditambahkan).
+    """
+
+    def __init__(self, key: str, args: tuple):
+        self.key = key
+        self.args = args
+        self.submitted_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.result = None
+        self.error: BaseException | None = None
+        self.requests = 1
+        self._callbacks = []
+        self._done = threading.Event()
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: float | None = None):
+        """
+        Tunggu selesai. Return result, raise error dari handler kalau gagal.
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Job {self.key} belum selesai")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def age(self) -> float | None:
+        # Umur hasil (detik sejak selesai)
+        return None if self.finished_at is None else time.time() - self.finished_at
+
+
+class JobQueue:
+    """
+    Antrian kerja dengan worker pool terbatas:
+
+        jobs = JobQueue(handle_keyword, workers=2, ttl=600, on_thread_exit=close_pool)
+        job, status, position = jobs.submit("ai", "ai", on_done=reply)
+
+    - status "queued": job baru, `position` = urutan di antrian (0 = langsung jalan)
+    - status "joined": key yang sama sedang diproses / antre, digabung
+    - status "cached": hasil dengan key sama masih dalam TTL, on_done langsung dipanggil
+    - antrian penuh (max_pending) -> QueueFull
+
+    Worker berupa thread yang hidup lama, jadi resource per thread (mis. browser
+    pool dari browser.pool.get_pool) dipakai ulang antar job. `on_thread_exit`
+    dipanggil di thread worker sebelum berhenti.
+    """
+
+    def __init__(
+        self,
+        handler,
+        workers: int = MAX_WORKERS,
+        max_pending: int = MAX_PENDING,
+        ttl: float = RESULT_TTL,
+        on_thread_exit=None,
+        name: str = "job",
+    ):
+        self.handler = handler
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.on_thread_exit = on_thread_exit
+
+        self._cond = threading.Condition()
+        self._pending: deque[Job] = deque()
+        self._active: dict[str, Job] = {}     # antre + sedang jalan
+        self._results: dict[str, Job] = {}    # selesai sukses, untuk cache
+        self._closed = False
+        self.stats = {"submitted": 0, "joined": 0, "cached": 0, "done": 0, "failed": 0}
+
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    # --- API ---
+    def submit(self, key: str, *args, on_done=None) -> tuple[Job, str, int]:
+        """
+        `on_done(job)` dipanggil sekali saat job selesai (dari thread worker,
+        atau langsung kalau hasil diambil dari cache).
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("JobQueue sudah ditutup")
+
+            cached = self._results.get(key)
+            if cached is not None and cached.age() < self.ttl:
+                self.stats["cached"] += 1
+                job, status, position = cached, "cached", 0
+            elif key in self._active:
+                job = self._active[key]
+                job.requests += 1
+                self.stats["joined"] += 1
+                status = "joined"
+                position = self._position(job)
+                if on_done:
+                    job._callbacks.append(on_done)
+                return job, status, position
+            else:
+                if len(self._pending) >= self.max_pending:
+                    raise QueueFull(f"Antrian penuh ({self.max_pending} job)")
+                job = Job(key, args)
+                if on_done:
+                    job._callbacks.append(on_done)
+                self._active[key] = job
+                self._pending.append(job)
+                self.stats["submitted"] += 1
+                position = self._position(job)
+                self._cond.notify()
+                return job, "queued", position
+
+        if on_done:
+            self._call(on_done, job)
+        return job, status, position
+
+    def _position(self, job: Job) -> int:
+        # 0 = sedang jalan / langsung diambil worker yang menganggur
+        if job.started_at is not None:
+            return 0
+        idle = sum(1 for t in self._threads if t.is_alive()) - self._running()
+        index = self._pending.index(job)
+        return max(index + 1 - idle, 0)
+
+    def _running(self) -> int:
+        return sum(1 for j in self._active.values() if j.started_at is not None and not j.done())
+
+    def position(self, job: Job) -> int:
+        with self._cond:
+            if job.done():
+                return 0
+            return self._position(job)
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def close(self, wait: bool = True):
+        """
+        Berhenti menerima job; worker menyelesaikan sisa antrian lalu berhenti.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            for t in self._threads:
+                t.join()
+
+    # --- worker ---
+    def _call(self, callback, job: Job):
+        try:
+            callback(job)
+        except Exception as e:
+            print(f"[WARN] Callback job {job.key} gagal: {e}")
+
+    def _next(self) -> Job | None:
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return None
+            job = self._pending.popleft()
+            job.started_at = time.time()
+            return job
+
+    def _finish(self, job: Job):
+        with self._cond:
+            job.finished_at = time.time()
+            self._active.pop(job.key, None)
+            if job.error is None:
+                self._results[job.key] = job
+                self.stats["done"] += 1
+            else:
+                self.stats["failed"] += 1
+            # Buang hasil yang sudah lewat TTL
+            for key in [k for k, j in self._results.items() if j.age() >= self.ttl]:
+                del self._results[key]
+            callbacks, job._callbacks = job._callbacks, []
+            job._done.set()
+
+        for callback in callbacks:
+            self._call(callback, job)
+
+    def _worker(self):
+        try:
+            while True:
+                job = self._next()
+                if job is None:
+                    break
+                try:
+                    job.result = self.handler(*job.args)
+                except Exception as e:
+                    print(f"[ERROR] Job {job.key} gagal: {e}")
+                    job.error = e
+                self._finish(job)
+        finally:
+            if self.on_thread_exit:
+                try:
+                    self.on_thread_exit()
+                except Exception as e:
+                    print(f"[WARN] Cleanup worker gagal: {e}")
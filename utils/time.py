@@ -17,3 +17,10 @@ def utc_today() -> str:
     Example: 2026-01-19
     """
     return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+def iso_to_epoch(value: str) -> float:
+    """
+    Kebalikan utc_now_iso(): "2026-01-19T05:12:33Z" -> epoch detik.
+    """
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp()